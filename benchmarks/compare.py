@@ -0,0 +1,75 @@
+"""
+Compares two benchmark result files written by ``benchmarks.run``.
+
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import json
+
+
+METRICS = (
+    ("throughput_rps", lambda result: result["throughput_rps"]),
+    ("p50", lambda result: result["latency_ms"]["p50"]),
+    ("p95", lambda result: result["latency_ms"]["p95"]),
+    ("p99", lambda result: result["latency_ms"]["p99"]),
+)
+
+
+def change(before, after):
+    if not before or after is None:
+        return None
+
+    return (after - before) / before * 100
+
+
+def format_value(value):
+    return f"{'n/a':>10}" if value is None else f"{value:>10.2f}"
+
+
+def compare(before, after):
+    """
+        Returns ``{route: {metric: (before, after, % change)}}`` for the routes
+        in both reports.
+    """
+    comparison = {}
+
+    for route in sorted(set(before["routes"]) & set(after["routes"])):
+        comparison[route] = {}
+
+        for metric, get in METRICS:
+            old = get(before["routes"][route])
+            new = get(after["routes"][route])
+            comparison[route][metric] = (old, new, change(old, new))
+
+    return comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args(argv)
+
+    with open(args.before) as stream:
+        before = json.load(stream)
+
+    with open(args.after) as stream:
+        after = json.load(stream)
+
+    print(
+        f"{before['meta'].get('commit') or args.before} -> "
+        f"{after['meta'].get('commit') or args.after}"
+    )
+
+    for route, metrics in compare(before, after).items():
+        print(route)
+
+        for metric, (old, new, percent) in metrics.items():
+            print(
+                f"    {metric:<15} {format_value(old)} -> {format_value(new)}"
+                f"  {'n/a' if percent is None else f'{percent:+.1f}%'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Benchmarks the gateway request path on a single box.
+
+Boots GatewayService in process with the accounts rpc replaced by a stub (no
+RabbitMQ needed) and redis at REDIS_URL, or an in-process fakeredis with
+--fake-redis. Every route is then driven with --requests requests from
+--concurrency concurrent clients, and throughput and latency percentiles are
+reported per route and written to --output as JSON.
+
+    python -m benchmarks.run --concurrency 20 --requests 2000 --output bench.json
+    python -m benchmarks.compare before.json after.json
+"""
+import eventlet
+
+eventlet.monkey_patch()  # noqa: E402
+
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from collections import Counter
+
+import requests
+import yaml
+from benchmarks.scenarios import encode_body, get_scenarios
+from benchmarks.stubs import StubAccounts
+from gateway.dependencies.redis import utils as redis_utils
+from gateway.dependencies.rpc.provider import RpcClient, RpcProxy
+from gateway.entrypoints import HttpEntrypoint
+from gateway.service import GatewayService
+from nameko import config
+from nameko.cli.main import setup_yaml_parser
+from nameko.containers import ServiceContainer
+from nameko.rpc import ReplyListener
+from nameko.testing.services import replace_dependencies, restrict_entrypoints
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values, percent):
+    # nearest rank on sorted values
+    if not values:
+        return None
+
+    return values[max(math.ceil(percent / 100 * len(values)) - 1, 0)]
+
+
+def summarise(durations, statuses, errors, elapsed):
+    durations = sorted(durations)
+    latencies = [duration * 1000 for duration in durations]
+
+    return {
+        "requests": len(durations) + errors,
+        "errors": errors,
+        "status_codes": {str(status): count for status, count in statuses.items()},
+        "throughput_rps": len(durations) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": sum(latencies) / len(latencies) if latencies else None,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None,
+        },
+    }
+
+
+def run_scenario(base_url, scenario, requests_count, concurrency):
+    name, method, path, headers, body = scenario
+    data = encode_body(body)
+
+    durations = []
+    statuses = Counter()
+    errors = 0
+    remaining = [requests_count]
+
+    def client():
+        nonlocal errors
+        session = requests.Session()
+
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            start = time.perf_counter()
+
+            try:
+                response = session.request(
+                    method, base_url + path, headers=headers, data=data
+                )
+            except requests.RequestException:
+                errors += 1
+                continue
+
+            durations.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+
+        session.close()
+
+    pool = eventlet.GreenPool(concurrency)
+    start = time.perf_counter()
+
+    for _ in range(concurrency):
+        pool.spawn(client)
+
+    pool.waitall()
+
+    return summarise(durations, statuses, errors, time.perf_counter() - start)
+
+
+def load_config(path, overrides):
+    setup_yaml_parser()
+
+    with open(path) as stream:
+        loaded = yaml.unsafe_load(stream.read())
+
+    loaded.update(overrides)
+    config.update(loaded)
+
+
+def use_fake_redis():
+    import fakeredis
+
+    # every pool created by get_redis_pool connects to the same fake server
+    redis_utils.DEFAULT_CONNECTION_OPTIONS.update(
+        connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer()
+    )
+
+
+def create_container(rpc_latency, rate_limit):
+    container = ServiceContainer(GatewayService)
+
+    # only the http routes are benchmarked, the event handlers need rabbitmq
+    restrict_entrypoints(
+        container,
+        *{
+            entrypoint.method_name
+            for entrypoint in container.entrypoints
+            if isinstance(entrypoint, HttpEntrypoint)
+        },
+    )
+
+    for extension in list(container.subextensions):
+        if isinstance(extension, ReplyListener):
+            container.subextensions.remove(extension)
+
+    # keeps the gateway side of accounts_rpc (timeouts, circuit breaker and
+    # coalescing) in the path
+    provider = RpcProxy("accounts", coalesce=GatewayService.accounts_rpc.coalesce)
+    provider.configure()
+
+    replace_dependencies(
+        container, accounts_rpc=RpcClient(StubAccounts(latency=rpc_latency), provider)
+    )
+
+    if rate_limit:
+        for entrypoint in container.entrypoints:
+            if entrypoint.rate_limit:
+                entrypoint.rate_limit = rate_limit
+            if entrypoint.private_rate_limit:
+                entrypoint.private_rate_limit = rate_limit
+
+    return container
+
+
+def get_commit():
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "HEAD"],
+                cwd=PROJECT_ROOT,
+                stderr=subprocess.DEVNULL,
+            )
+            .decode("utf-8")
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--config", default=os.path.join(PROJECT_ROOT, "config.yml"))
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=1000, help="per route")
+    parser.add_argument("--warmup", type=int, default=50, help="per route")
+    parser.add_argument(
+        "--rpc-latency",
+        type=float,
+        default=0.005,
+        help="seconds every stubbed accounts rpc call takes",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=int,
+        default=10 ** 9,
+        help="replaces every route's rate limit so the benchmark isn't "
+        "measuring 429s (0 keeps the configured limits)",
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fake-redis", action="store_true")
+    parser.add_argument(
+        "--route",
+        action="append",
+        help="only run these routes, e.g. 'GET /v1/projects'",
+    )
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    load_config(args.config, {"WEB_SERVER_ADDRESS": f"127.0.0.1:{args.port}"})
+
+    if args.fake_redis:
+        use_fake_redis()
+
+    container = create_container(args.rpc_latency, args.rate_limit)
+    container.start()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    results = {}
+
+    try:
+        for scenario in get_scenarios():
+            name = scenario[0]
+
+            if args.route and name not in args.route:
+                continue
+
+            if args.warmup:
+                run_scenario(base_url, scenario, args.warmup, args.concurrency)
+
+            results[name] = run_scenario(
+                base_url, scenario, args.requests, args.concurrency
+            )
+
+            latency = results[name]["latency_ms"]
+            print(
+                f"{name:<36} {results[name]['throughput_rps']:>9.1f} req/s"
+                f"  p50 {latency['p50']:>8.2f}ms"
+                f"  p95 {latency['p95']:>8.2f}ms"
+                f"  p99 {latency['p99']:>8.2f}ms"
+                f"  {dict(results[name]['status_codes'])}"
+            )
+    finally:
+        container.stop()
+
+    report = {
+        "meta": {
+            "commit": get_commit(),
+            "timestamp": datetime.datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "rpc_latency": args.rpc_latency,
+            "fake_redis": args.fake_redis,
+        },
+        "routes": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as stream:
+            json.dump(report, stream, indent=2, sort_keys=True)
+
+    return report
+
+
+if __name__ == "__main__":
+    main()
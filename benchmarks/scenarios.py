@@ -0,0 +1,94 @@
+import json
+import time
+
+import jwt
+from nameko import config
+
+
+def get_jwt():
+    return jwt.encode(
+        {"user_id": 1, "email": "bench@findfeatures.io", "exp": time.time() + 3600},
+        config.get("JWT_SECRET"),
+        algorithm="HS256",
+    ).decode("utf-8")
+
+
+def get_scenarios():
+    """
+        Returns ``(name, method, path, headers, body)`` for every route in
+        ``gateway.service``.
+    """
+    token = get_jwt()
+    jwt_headers = {"Authorization": token}
+    api_headers = {"Authorization": "web-app"}
+    user = {"email": "bench@findfeatures.io", "password": "password"}
+
+    return [
+        ("GET /health-check", "GET", "/health-check", {}, None),
+        ("GET /metrics", "GET", "/metrics", {}, None),
+        ("GET /v1/rate-limit", "GET", "/v1/rate-limit", api_headers, None),
+        ("POST /v1/user/auth", "POST", "/v1/user/auth", {}, user),
+        (
+            "HEAD /v1/user/<email>",
+            "HEAD",
+            "/v1/user/bench@findfeatures.io",
+            {},
+            None,
+        ),
+        ("POST /v1/user", "POST", "/v1/user", {}, dict(user, display_name="bench")),
+        (
+            "POST /v1/user/token",
+            "POST",
+            "/v1/user/token",
+            {},
+            {"email": user["email"], "token": "token"},
+        ),
+        ("POST /v1/user/resend-email", "POST", "/v1/user/resend-email", {}, user),
+        (
+            "GET /v1/user/notifications",
+            "GET",
+            "/v1/user/notifications",
+            jwt_headers,
+            None,
+        ),
+        ("GET /v1/projects", "GET", "/v1/projects", jwt_headers, None),
+        (
+            "POST /v1/batch",
+            "POST",
+            "/v1/batch",
+            jwt_headers,
+            {
+                "requests": [
+                    {"path": "/v1/projects"},
+                    {"path": "/v1/user/notifications"},
+                    {"path": "/v1/rate-limit", "headers": api_headers},
+                ]
+            },
+        ),
+        # without a websocket handshake this measures authentication up to the
+        # rejected upgrade (400), not the socket itself
+        ("GET /v1/push", "GET", f"/v1/push?token={token}", {}, None),
+        (
+            "OPTIONS /v1/projects",
+            "OPTIONS",
+            "/v1/projects",
+            {"Origin": "https://findfeatures.io"},
+            None,
+        ),
+        (
+            "POST /v1/stripe/checkout-session",
+            "POST",
+            "/v1/stripe/checkout-session",
+            jwt_headers,
+            {
+                "plan": "plan",
+                "success_url": "https://findfeatures.io/success",
+                "cancel_url": "https://findfeatures.io/cancel",
+                "project_id": 1,
+            },
+        ),
+    ]
+
+
+def encode_body(body):
+    return None if body is None else json.dumps(body)
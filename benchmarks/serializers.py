@@ -0,0 +1,93 @@
+"""
+Benchmarks the compiled response serializers against plain marshmallow.
+
+Every schema in ``gateway.schemas`` is dumped or loaded with a new marshmallow
+schema per call (how handlers used to do it), a schema built once and its
+CompiledSchema, after checking the compiled output is identical.
+
+    python -m benchmarks.serializers --projects 100 --number 2000
+"""
+import argparse
+import timeit
+
+from gateway.schemas import projects, stripe, users
+
+
+def get_cases(projects_count):
+    project_list = [
+        {"id": index, "name": f"project {index}", "created_datetime_utc": "2020-01-01"}
+        for index in range(projects_count)
+    ]
+    user = {"email": "bench@findfeatures.io", "password": "password"}
+
+    return [
+        (
+            f"dumps GetProjectsResponse ({projects_count} projects)",
+            projects.GetProjectsResponse,
+            projects.get_projects_response,
+            "dumps",
+            {"projects": project_list},
+        ),
+        ("dumps UserAuthResponse", users.UserAuthResponse, users.user_auth_response)
+        + ("dumps", {"JWT": "token"}),
+        ("load AuthUserRequest", users.AuthUserRequest, users.auth_user_request)
+        + ("load", user),
+        (
+            "load CreateStripeCheckoutSessionRequest",
+            stripe.CreateStripeCheckoutSessionRequest,
+            stripe.create_stripe_checkout_session_request,
+            "load",
+            {
+                "plan": "plan",
+                "success_url": "https://findfeatures.io/success",
+                "cancel_url": "https://findfeatures.io/cancel",
+                "project_id": 1,
+            },
+        ),
+    ]
+
+
+def run_case(schema_cls, compiled, method, data, number):
+    schema = schema_cls()
+
+    if getattr(compiled, method)(data) != getattr(schema, method)(data):
+        raise AssertionError(f"{schema_cls.__name__}.{method} output differs")
+
+    timings = {
+        "marshmallow_per_call": lambda: getattr(schema_cls(), method)(data),
+        "marshmallow_shared": lambda: getattr(schema, method)(data),
+        "compiled": lambda: getattr(compiled, method)(data),
+    }
+
+    # microseconds per call
+    return {
+        name: timeit.timeit(function, number=number) / number * 10 ** 6
+        for name, function in timings.items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    results = {}
+
+    for name, schema_cls, compiled, method, data in get_cases(args.projects):
+        results[name] = run_case(schema_cls, compiled, method, data, args.number)
+        timings = results[name]
+
+        print(
+            f"{name:<45}"
+            f"  per call {timings['marshmallow_per_call']:>9.1f}us"
+            f"  shared {timings['marshmallow_shared']:>9.1f}us"
+            f"  compiled {timings['compiled']:>9.1f}us"
+            f"  ({timings['marshmallow_per_call'] / timings['compiled']:.1f}x)"
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import eventlet
+
+
+class StubAccounts:
+    """
+    Stands in for the accounts service rpc.
+
+    Every call sleeps for ``latency`` seconds (cooperatively, like waiting
+    for a reply over AMQP) and returns a canned result.
+    """
+
+    def __init__(self, latency=0.005, projects=10):
+        self.latency = latency
+        self.projects = [
+            {
+                "id": index,
+                "name": f"project {index}",
+                "created_datetime_utc": "2019-01-01T00:00:00Z",
+            }
+            for index in range(projects)
+        ]
+
+    def _wait(self):
+        if self.latency:
+            eventlet.sleep(self.latency)
+
+    def auth_user(self, email, password):
+        self._wait()
+        return {"JWT": "token"}
+
+    def user_already_exists(self, email):
+        self._wait()
+        return False
+
+    def create_user(self, user_details):
+        self._wait()
+
+    def verify_user(self, email, token):
+        self._wait()
+
+    def resend_user_token(self, email, password):
+        self._wait()
+
+    def get_verified_projects(self, user_id, after=None, limit=None, fields=None):
+        self._wait()
+
+        projects = [
+            project
+            for project in self.projects
+            if after is None or project["id"] > after
+        ]
+
+        if limit is not None:
+            projects = projects[:limit]
+
+        if fields is not None:
+            projects = [{key: project[key] for key in fields} for project in projects]
+
+        return projects
+
+    def create_stripe_checkout_session(self, session_details):
+        self._wait()
+        return "session"
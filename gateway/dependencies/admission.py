@@ -0,0 +1,89 @@
+from gateway.exceptions.base import ServiceOverloaded
+from gateway.utils.metrics import metrics
+from nameko import config
+from nameko.extensions import SharedExtension
+
+
+CRITICAL = "critical"
+HIGH = "high"
+NORMAL = "normal"
+LOW = "low"
+
+# priority -> share of ADMISSION_MAX_IN_FLIGHT a route can use before its
+# requests are shed. Critical routes are never shed.
+PRIORITY_LIMITS = {CRITICAL: None, HIGH: 1.0, NORMAL: 0.9, LOW: 0.75}
+
+# priorities that are shed while requests wait too long for a worker
+QUEUE_WAIT_SHED_PRIORITIES = (NORMAL, LOW)
+
+
+class AdmissionController(SharedExtension):
+    """
+    Sheds load before requests queue up for a worker.
+
+    Counts the requests in flight across every HttpEntrypoint and keeps a
+    moving average of how long requests waited for a worker. A request is
+    rejected with ServiceOverloaded, before auth, rate limiting or the
+    handler run, when:
+
+        - the requests in flight reach its priority's share of
+          ADMISSION_MAX_IN_FLIGHT (defaults to twice max_workers, so
+          requests can queue for a worker), or
+        - requests are queueing for a worker (more than max_workers in
+          flight), the average queue wait is over ADMISSION_MAX_QUEUE_WAIT
+          seconds and its priority is normal or low.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.queue_wait = 0.0
+        self.stats = {
+            "admitted": 0,
+            "shed": {priority: 0 for priority in PRIORITY_LIMITS},
+        }
+
+    def setup(self):
+        self.max_workers = int(config.get("max_workers", 10))
+        self.max_in_flight = int(
+            config.get("ADMISSION_MAX_IN_FLIGHT") or self.max_workers * 2
+        )
+        self.max_queue_wait = float(config.get("ADMISSION_MAX_QUEUE_WAIT", 1))
+        self.retry_after = config.get("ADMISSION_RETRY_AFTER", 1)
+        # weight of the latest measurement in the queue wait average
+        self.queue_wait_weight = float(config.get("ADMISSION_QUEUE_WAIT_WEIGHT", 0.2))
+
+        metrics.register_stats("gateway_admission", self.get_stats)
+
+    def admit(self, priority):
+        limit = PRIORITY_LIMITS[priority]
+
+        queueing = self.in_flight >= self.max_workers
+
+        if (limit is not None and self.in_flight >= self.max_in_flight * limit) or (
+            queueing
+            and priority in QUEUE_WAIT_SHED_PRIORITIES
+            and self.queue_wait > self.max_queue_wait
+        ):
+            self.stats["shed"][priority] += 1
+            raise ServiceOverloaded(
+                "Service is overloaded.", retry_after=self.retry_after
+            )
+
+        self.in_flight += 1
+        self.stats["admitted"] += 1
+
+    def release(self):
+        self.in_flight -= 1
+
+    def record_queue_wait(self, seconds):
+        self.queue_wait += self.queue_wait_weight * (seconds - self.queue_wait)
+
+    def get_stats(self):
+        return dict(
+            self.stats,
+            shed=dict(self.stats["shed"]),
+            in_flight=self.in_flight,
+            queue_wait=self.queue_wait,
+            max_workers=self.max_workers,
+            busy_workers=min(self.in_flight, self.max_workers),
+        )
@@ -0,0 +1,249 @@
+import json
+from functools import partial
+
+from eventlet.greenpool import GreenPool
+from gateway.dependencies.redis.provider import check_rate_limits
+from gateway.dependencies.redis.utils import hash_identifier
+from gateway.entrypoints import HttpEntrypoint
+from gateway.exceptions.base import (
+    AuthorizationHeaderMissing,
+    RateLimitExceeded,
+    RequestBodyTooLarge,
+    RouteNotFound,
+    UnauthorizedRequest,
+    UnsupportedMediaType,
+)
+from gateway.utils.timing import get_timer
+from marshmallow import ValidationError
+from nameko import config
+from nameko.extensions import DependencyProvider
+from werkzeug import Request
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+from werkzeug.routing import Map, Rule
+from werkzeug.test import EnvironBuilder
+
+
+def serialize_response(response):
+    data = response.get_data(as_text=True)
+
+    if not data:
+        body = "null"
+    elif response.mimetype == "application/json":
+        # already JSON, so it's added as is instead of parsed and dumped again
+        body = data
+    else:
+        body = json.dumps(data)
+
+    headers = {
+        name: value for name, value in response.headers if name != "Content-Length"
+    }
+
+    return (
+        f'{{"status": {response.status_code}, "headers": {json.dumps(headers)}, '
+        f'"body": {body}}}'
+    )
+
+
+class BatchCall:
+    __slots__ = (
+        "entrypoint",
+        "request",
+        "path_values",
+        "body",
+        "rate_limit",
+        "response",
+    )
+
+    def __init__(self, request, body):
+        self.entrypoint = None
+        self.request = request
+        self.path_values = {}
+        self.body = body
+        self.rate_limit = None
+        self.response = None
+
+
+class BatchDispatcher(DependencyProvider):
+    """
+    Runs the sub-requests of a batch against the service's own http routes,
+    concurrently inside the batch's worker, and returns the JSON of their
+    responses.
+
+    Sub-requests go through the same checks as direct calls to their routes
+    (body size and Content-Type, api token and rate limits), but the rate
+    limits that aren't checked locally (rate_limit_local_ratio) are checked in
+    a single pipelined round trip for the whole batch, and the jwt is only
+    verified by the first jwt_required sub-request that sends it, the others
+    get it from the jwt cache. They run under the batch's admission slot.
+
+    Sub-requests get the batch's address, and its Authorization header unless
+    they send their own ``headers``. Their responses aren't compressed and
+    don't get ETags, the batch's response is.
+
+    At most BATCH_MAX_REQUESTS sub-requests are accepted per batch.
+    """
+
+    def setup(self):
+        self.max_requests = int(config.get("BATCH_MAX_REQUESTS", 10))
+
+    def start(self):
+        # every entrypoint is set up by now
+        self.url_map = Map(
+            [
+                Rule(entrypoint.url, methods=[entrypoint.method], endpoint=entrypoint)
+                for entrypoint in self.container.entrypoints
+                if isinstance(entrypoint, HttpEntrypoint) and entrypoint.batchable
+            ]
+        )
+
+    def get_dependency(self, worker_ctx):
+        return partial(self.dispatch, worker_ctx.service, worker_ctx.entrypoint)
+
+    def dispatch(self, service, batch_entrypoint, request, sub_requests):
+        if len(sub_requests) > self.max_requests:
+            raise ValidationError(
+                f"A batch can't have more than {self.max_requests} requests."
+            )
+
+        calls = []
+
+        for sub_request in sub_requests:
+            call = self._build_call(request, sub_request)
+
+            try:
+                self._route(call)
+            except RouteNotFound as exc:
+                call.response = batch_entrypoint.response_from_exception(exc)
+
+            calls.append(call)
+
+        self._check_rate_limits(service, request, calls)
+
+        pool = GreenPool(len(calls))
+        responses = pool.imap(partial(self._run, service), calls)
+
+        return '{"responses": [' + ", ".join(responses) + "]}"
+
+    def _build_call(self, request, sub_request):
+        headers = {}
+
+        if "Authorization" in request.headers:
+            headers["Authorization"] = request.headers["Authorization"]
+
+        # e.g. an api token for one sub-request and a jwt for the others
+        headers.update(sub_request.get("headers", {}))
+
+        builder = EnvironBuilder(
+            path=sub_request["path"],
+            method=sub_request["method"],
+            headers=headers,
+            json=sub_request.get("body"),
+            environ_base={"REMOTE_ADDR": request.remote_addr},
+        )
+
+        sub = Request(builder.get_environ())
+        sub.timer = request.timer
+
+        return BatchCall(sub, sub_request.get("body"))
+
+    def _route(self, call):
+        request = call.request
+
+        try:
+            call.entrypoint, call.path_values = self.url_map.bind_to_environ(
+                request.environ
+            ).match()
+        except (NotFound, MethodNotAllowed):
+            raise RouteNotFound(f"No route for {request.method} {request.path}.")
+
+        entrypoint = call.entrypoint
+
+        try:
+            if entrypoint.auth_required:
+                request.auth_token = entrypoint._get_auth_token_from_header(request)
+
+            # after auth, like direct calls
+            entrypoint._check_body(request)
+        except (
+            RequestBodyTooLarge,
+            UnsupportedMediaType,
+            AuthorizationHeaderMissing,
+            UnauthorizedRequest,
+        ) as exc:
+            call.response = entrypoint.response_from_exception(exc)
+
+    def _check_rate_limits(self, service, request, calls):
+        limited = [
+            call
+            for call in calls
+            if call.response is None
+            and (call.entrypoint.rate_limit or call.entrypoint.private_rate_limit)
+        ]
+        pipelined = []
+
+        with get_timer(request).stage("rate_limit"):
+            for call in limited:
+                if call.entrypoint.rate_limit_local_ratio:
+                    self._check_local_rate_limit(call)
+                else:
+                    pipelined.append(call)
+
+            # public rate limits are per api token, private ones per ip address
+            checks = [
+                (
+                    hash_identifier(call.request.auth_token)
+                    if call.entrypoint.rate_limit
+                    else call.request.remote_addr,
+                    call.entrypoint.url,
+                    call.entrypoint.rate_limit or call.entrypoint.private_rate_limit,
+                    call.entrypoint.rate_limit_algorithm,
+                    1,
+                )
+                for call in pipelined
+            ]
+
+            results = check_rate_limits(checks, client=service.redis)
+
+        for call, result in zip(pipelined, results):
+            call.rate_limit = (result.remaining, result.reset)
+
+            if not result.allowed:
+                call.response = call.entrypoint.response_from_exception(
+                    RateLimitExceeded(reset=result.reset)
+                )
+
+    def _check_local_rate_limit(self, call):
+        entrypoint = call.entrypoint
+
+        try:
+            if entrypoint.rate_limit:
+                call.rate_limit = entrypoint._get_rate_limit(
+                    call.request.auth_token, sensitive=True
+                )
+            else:
+                call.rate_limit = entrypoint._get_rate_limit(
+                    call.request.remote_addr, sensitive=False
+                )
+        except RateLimitExceeded as exc:
+            call.rate_limit = (0, exc.reset)
+            call.response = entrypoint.response_from_exception(exc)
+
+    def _run(self, service, call):
+        entrypoint = call.entrypoint
+
+        if call.response is None:
+            try:
+                if entrypoint.schema is not None:
+                    call.request.validated_data = entrypoint.schema.load(call.body)
+
+                result = getattr(service, entrypoint.method_name)(
+                    call.request, **call.path_values
+                )
+                call.response = entrypoint.response_from_result(result)
+            except Exception as exc:
+                call.response = entrypoint.response_from_exception(exc)
+
+        if call.rate_limit is not None:
+            entrypoint._add_rate_limit(call.response, *call.rate_limit)
+
+        return serialize_response(call.response)
@@ -0,0 +1,222 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+
+from gateway.dependencies.redis.utils import get_redis_connection
+from gateway.utils.etag import compute_etag
+from gateway.utils.metrics import metrics
+from nameko import config
+from nameko.extensions import DependencyProvider
+from redis.exceptions import RedisError
+
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry:
+    __slots__ = ("value", "stored_at", "etag")
+
+    def __init__(self, value, stored_at):
+        self.value = value
+        self.stored_at = stored_at
+        self.etag = None
+
+
+class ResponseCache(DependencyProvider):
+    """
+    Two level cache for responses that rarely change.
+
+    L1 is a per-process LRU of up to ``{NAME}_CACHE_L1_SIZE`` entries, L2 is
+    redis and shared by every gateway node (``cache:{name}:{key}``).
+
+    An entry is fresh for ``{NAME}_CACHE_TTL`` seconds and can then be served
+    stale for another ``{NAME}_CACHE_STALE_TTL`` seconds while it is refreshed
+    in a background greenlet. Only a miss waits for the loader.
+
+    ``invalidate(key)`` drops the key from both levels. A load that was in
+    flight when the key was invalidated is not stored.
+
+    ``get_etag(key)`` returns the ETag of a fresh cached response body, so
+    conditional requests can be answered without loading anything.
+
+    Redis errors are logged and treated as misses, so the cache never fails a
+    request that the loader can answer.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.client = None
+        self.entries = OrderedDict()
+        # key -> token of the load allowed to store its result
+        self.loading = {}
+        self.stats = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "invalidations": 0,
+        }
+
+    def setup(self):
+        prefix = self.name.upper()
+
+        self.ttl = float(config.get(f"{prefix}_CACHE_TTL", 60))
+        self.stale_ttl = float(config.get(f"{prefix}_CACHE_STALE_TTL", 300))
+        self.l1_size = int(config.get(f"{prefix}_CACHE_L1_SIZE", 1000))
+
+        metrics.register_stats(f"gateway_{self.name}_cache", self.get_stats)
+
+    def start(self):
+        self.client = get_redis_connection()
+
+    def stop(self):
+        self.client = None
+
+    def kill(self):
+        self.client = None
+
+    def get_dependency(self, worker_ctx):
+        return self
+
+    def redis_key(self, key):
+        return f"cache:{self.name}:{key}"
+
+    def get(self, key, loader):
+        """
+            Returns the cached value for ``key``, calling ``loader()`` to load
+            it on a miss and refreshing it in the background once it is stale.
+        """
+        now = time.time()
+        entry = self.entries.get(key)
+
+        if entry is not None and now < entry.stored_at + self.ttl + self.stale_ttl:
+            self.entries.move_to_end(key)
+            self.stats["l1_hits"] += 1
+        else:
+            entry = self._get_l2(key)
+
+            if entry is not None and now < entry.stored_at + self.ttl + self.stale_ttl:
+                self._set_l1(key, entry)
+                self.stats["l2_hits"] += 1
+            else:
+                self.stats["misses"] += 1
+                return self._load(key, loader)
+
+        if now >= entry.stored_at + self.ttl:
+            self.stats["stale_hits"] += 1
+
+            if key not in self.loading:
+                # reserved before spawning, so concurrent stale hits don't
+                # spawn their own refresh
+                token = self.loading[key] = object()
+                self.container.spawn_managed_thread(
+                    lambda: self._refresh(key, loader, token)
+                )
+
+        return entry.value
+
+    def get_etag(self, key):
+        """
+            Returns the ETag (see gateway.utils.etag) of the cached value for
+            ``key`` if it is fresh, or None.
+        """
+        entry = self.entries.get(key)
+
+        if entry is None:
+            entry = self._get_l2(key)
+
+            if entry is None:
+                return None
+
+            self._set_l1(key, entry)
+
+        if time.time() >= entry.stored_at + self.ttl:
+            return None
+
+        if entry.etag is None:
+            entry.etag = compute_etag(entry.value)
+
+        return entry.etag
+
+    def set(self, key, value):
+        entry = CacheEntry(value, time.time())
+
+        self._set_l1(key, entry)
+
+        try:
+            self.client.set(
+                self.redis_key(key),
+                json.dumps({"value": value, "stored_at": entry.stored_at}),
+                ex=int(self.ttl + self.stale_ttl),
+            )
+        except RedisError:
+            logger.warning("unable to store %s cache entry", self.name, exc_info=True)
+
+    def invalidate(self, key):
+        self.entries.pop(key, None)
+        self.loading.pop(key, None)
+        self.stats["invalidations"] += 1
+
+        try:
+            self.client.delete(self.redis_key(key))
+        except RedisError:
+            logger.warning(
+                "unable to invalidate %s cache entry", self.name, exc_info=True
+            )
+
+    def get_stats(self):
+        return dict(self.stats, size=len(self.entries))
+
+    def _load(self, key, loader, token=None):
+        if token is None:
+            token = self.loading[key] = object()
+
+        try:
+            value = loader()
+        except Exception:
+            if self.loading.get(key) is token:
+                del self.loading[key]
+            raise
+
+        if self.loading.get(key) is token:
+            del self.loading[key]
+            self.set(key, value)
+
+        return value
+
+    def _refresh(self, key, loader, token):
+        self.stats["refreshes"] += 1
+
+        try:
+            self._load(key, loader, token)
+        except Exception:
+            # the stale entry keeps being served until it expires
+            self.stats["refresh_errors"] += 1
+            logger.warning("unable to refresh %s cache entry", self.name, exc_info=True)
+
+    def _get_l2(self, key):
+        try:
+            data = self.client.get(self.redis_key(key))
+        except RedisError:
+            logger.warning("unable to read %s cache entry", self.name, exc_info=True)
+            return None
+
+        if data is None:
+            return None
+
+        data = json.loads(data)
+
+        return CacheEntry(data["value"], data["stored_at"])
+
+    def _set_l1(self, key, entry):
+        if self.l1_size <= 0:
+            return
+
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.l1_size:
+            self.entries.popitem(last=False)
@@ -0,0 +1,204 @@
+import logging
+import time
+
+from eventlet.event import Event
+from gateway.dependencies.redis.provider import (
+    RATE_LIMIT_ALGORITHMS,
+    RATE_LIMIT_WINDOW_MS,
+    SLIDING_LOG,
+    RateLimitResult,
+    check_rate_limit,
+    rate_limit_key,
+)
+from gateway.dependencies.redis.scripts import script_registry
+from gateway.dependencies.redis.utils import hash_identifier
+from gateway.utils.metrics import metrics
+from nameko import config
+from nameko.extensions import SharedExtension
+from redis.exceptions import RedisError
+
+
+logger = logging.getLogger(__name__)
+
+
+class LocalRateLimitState:
+    __slots__ = ("limit", "algorithm", "remaining", "pending", "reset_at", "expires_at")
+
+    def __init__(self, limit, algorithm):
+        self.limit = limit
+        self.algorithm = algorithm
+        # remaining quota last reported by redis
+        self.remaining = 0
+        # requests admitted locally that redis doesn't know about yet
+        self.pending = 0
+        self.reset_at = 0
+        # the local state is only trusted until then
+        self.expires_at = 0
+
+    def update(self, now, remaining, reset, max_age):
+        self.remaining = remaining
+        self.reset_at = now + reset
+        self.expires_at = now + min(max_age, reset)
+
+
+class LocalRateLimiter(SharedExtension):
+    """
+    Optional in-process tier in front of the redis rate limits.
+
+    Entrypoints opt in with ``rate_limit_local_ratio``. While less than that
+    fraction of a key's limit is used, requests are admitted from a local
+    counter and the counts are reconciled with redis in one pipelined batch
+    every RATE_LIMIT_LOCAL_SYNC_INTERVAL seconds. Once a key gets closer to its
+    limit, or its local state is older than RATE_LIMIT_LOCAL_MAX_AGE, requests
+    fall through to the usual synchronous redis check.
+
+    Other gateway processes can use the same quota between reconciliations,
+    so a key can be over admitted by up to ``ratio * limit`` per process.
+    ``stats["over_admitted"]`` counts the requests reconciliation found over
+    the limit.
+    """
+
+    def __init__(self):
+        self.states = {}
+        self.stats = {
+            "local": 0,
+            "sync": 0,
+            "reconciliations": 0,
+            "reconciled": 0,
+            "over_admitted": 0,
+        }
+        self._running = False
+        self._wake = Event()
+        self._gt = None
+
+    def setup(self):
+        self.sync_interval = float(config.get("RATE_LIMIT_LOCAL_SYNC_INTERVAL", 0.5))
+        self.max_age = float(config.get("RATE_LIMIT_LOCAL_MAX_AGE", 1))
+        self.max_keys = int(config.get("RATE_LIMIT_LOCAL_MAX_KEYS", 10000))
+
+        metrics.register_stats(
+            "gateway_local_rate_limit", lambda: dict(self.stats, keys=len(self.states))
+        )
+
+    def start(self):
+        self._running = True
+        self._gt = self.container.spawn_managed_thread(self._run)
+
+    def stop(self):
+        self._running = False
+
+        if not self._wake.ready():
+            self._wake.send()
+
+        if self._gt is not None:
+            self._gt.wait()
+            self._gt = None
+
+    def kill(self):
+        self._running = False
+
+        if self._gt is not None:
+            self._gt.kill()
+            self._gt = None
+
+    def check(
+        self, identifier, url, rate_limit, ratio, sensitive=True, algorithm=SLIDING_LOG
+    ):
+        if sensitive:
+            identifier = hash_identifier(identifier)
+
+        key = rate_limit_key(identifier, url, algorithm)
+        state = self.states.get(key)
+        now = time.monotonic()
+
+        if state is not None and now < state.expires_at:
+            remaining = state.remaining - state.pending
+
+            if rate_limit - remaining < rate_limit * ratio:
+                state.pending += 1
+                self.stats["local"] += 1
+
+                return RateLimitResult(True, remaining - 1, state.reset_at - now)
+
+        self.stats["sync"] += 1
+
+        try:
+            result = check_rate_limit(
+                identifier, url, rate_limit, sensitive=False, algorithm=algorithm
+            )
+        except Exception:
+            if state is not None:
+                state.remaining = 0
+            raise
+
+        if state is None:
+            if len(self.states) >= self.max_keys:
+                return result
+
+            state = self.states[key] = LocalRateLimitState(rate_limit, algorithm)
+
+        state.update(now, result.remaining, result.reset, self.max_age)
+
+        # redis doesn't know about the pending requests yet
+        return result._replace(remaining=max(result.remaining - state.pending, 0))
+
+    def reconcile(self):
+        """
+            Sends the pending local counts to redis in one round trip and
+            refreshes the remaining quota of those keys.
+        """
+        now = time.monotonic()
+
+        # forget keys redis already knows everything about
+        for key in [
+            key
+            for key, state in self.states.items()
+            if not state.pending and now >= state.expires_at
+        ]:
+            del self.states[key]
+
+        pending = [
+            (key, state, state.pending)
+            for key, state in self.states.items()
+            if state.pending
+        ]
+
+        if not pending:
+            return
+
+        calls = [
+            (
+                RATE_LIMIT_ALGORITHMS[state.algorithm],
+                [key],
+                # the requests were already admitted, so they are always
+                # recorded even when they go over the shared limit
+                [state.limit, RATE_LIMIT_WINDOW_MS, count, 1],
+            )
+            for key, state, count in pending
+        ]
+
+        try:
+            results = script_registry.call_many(calls)
+        except RedisError:
+            logger.warning("unable to reconcile local rate limits", exc_info=True)
+            return
+
+        self.stats["reconciliations"] += 1
+
+        for (key, state, count), (allowed, remaining, reset) in zip(pending, results):
+            state.pending -= count
+            state.update(now, remaining, reset / 1000, self.max_age)
+
+            if allowed:
+                self.stats["reconciled"] += count
+            else:
+                self.stats["over_admitted"] += count
+                state.remaining = 0
+
+    def _run(self):
+        while self._running:
+            self._wake.wait(self.sync_interval)
+            self.reconcile()
+
+        # send anything admitted while we were stopping
+        self.reconcile()
@@ -1,38 +1,209 @@
+# Every rate limit script takes the same arguments and returns the same result:
+#
+#   KEYS[1] - the rate limit key for the identifier and url
+#   ARGV[1] - number of requests allowed per window
+#   ARGV[2] - window size in milliseconds
+#   ARGV[3] - cost of the request, 0 only checks the quota without using it
+#   ARGV[4] - optional, "1" records the cost even if it doesn't fit the quota,
+#             for requests that were already admitted (the sliding log and GCRA
+#             only record up to the limit)
+#
+#   returns {allowed (1 or 0), remaining requests, milliseconds until reset}
+#
+# Scripts that need the time read it with redis TIME so every gateway node
+# shares the same clock (FIXED_WINDOW only needs the key's PTTL).
+# replicate_commands() is needed to write after reading TIME on redis < 5 (it is
+# a no-op on newer versions).
+
+
 # modified from here:
 # https://medium.com/@sahiljadon/rate-limiting-using-redis-lists-and-sorted-sets-9b42bc192222
-RATE_LIMIT = """
+# stores one sorted set member per request, so memory is O(limit) per key.
+SLIDING_LOG = """
+if redis.replicate_commands then
+    redis.replicate_commands()
+end
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local force = ARGV[4] == '1'
+
 --[[
-    remove any scores for the at key between 0 and 1 minute before the 
+    remove any scores for the key older than one window before the
     current request time
 ]]--
-redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, ARGV[1] - 60 * 1000 )
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+
+local count = tonumber(redis.call('ZCARD', KEYS[1]))
+local allowed = 0
 
 --[[
     check if number of scores in the key are < requests allowed and if so
-    add the score to the sorted set
+    add the score to the sorted set. Members include the microsecond time and
+    the count so requests within the same millisecond are all counted.
 ]]--
-local num_of_existing_scores = tonumber(redis.call('ZCARD', KEYS[1]))
+if count + math.max(cost, 1) <= limit then
+    allowed = 1
+end
 
-if num_of_existing_scores < tonumber(ARGV[2])
-then
-    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[1])
-    return num_of_existing_scores..':pass'
-else
-    return num_of_existing_scores..':limit-exceeded'
+if allowed == 1 or force then
+    -- one member per request, so forced costs stop at the limit
+    local recorded = math.min(cost, math.max(limit - count, 0))
+
+    for i = 1, recorded do
+        local member = time[1] .. '.' .. time[2] .. ':' .. (count + i)
+        redis.call('ZADD', KEYS[1], now, member)
+    end
+
+    count = count + recorded
+
+    if recorded > 0 then
+        redis.call('PEXPIRE', KEYS[1], window)
+    end
 end
 
+local reset = window
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+
+if oldest[2] then
+    reset = tonumber(oldest[2]) + window - now
+end
+
+return {allowed, math.max(limit - count, 0), reset}
 """
 
-GET_RATE_LIMIT_QUERY = """
---[[
-    remove any scores for the at key between 0 and 1 minute before the 
-    current request time
-]]--
-redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, ARGV[1] - 60 * 1000 )
+# one counter per window that expires with the window. O(1) memory per key but
+# allows up to 2x the limit across a window boundary.
+FIXED_WINDOW = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local force = ARGV[4] == '1'
 
---[[
-    check if number of scores in the key are < requests allowed and if so
-    add the score to the sorted set
-]]--
-return tonumber(redis.call('ZCARD', KEYS[1]))
+local count = tonumber(redis.call('GET', KEYS[1]) or '0')
+local reset = tonumber(redis.call('PTTL', KEYS[1]))
+local allowed = 0
+
+if reset < 0 then
+    reset = window
+end
+
+if count + math.max(cost, 1) <= limit then
+    allowed = 1
+end
+
+if (allowed == 1 or force) and cost > 0 then
+    count = redis.call('INCRBY', KEYS[1], cost)
+
+    if count == cost then
+        redis.call('PEXPIRE', KEYS[1], window)
+        reset = window
+    end
+end
+
+return {allowed, math.max(limit - count, 0), reset}
+"""
+
+# keeps the counts for the current and previous fixed windows and weights the
+# previous count by how much of it still overlaps the sliding window.
+# O(1) memory per key.
+SLIDING_WINDOW_COUNTER = """
+if redis.replicate_commands then
+    redis.replicate_commands()
+end
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local force = ARGV[4] == '1'
+
+local current_start = now - (now % window)
+local state = redis.call('HMGET', KEYS[1], 'start', 'current', 'previous')
+local start = tonumber(state[1])
+local current = tonumber(state[2]) or 0
+local previous = tonumber(state[3]) or 0
+
+if start ~= current_start then
+    if start == current_start - window then
+        previous = current
+    else
+        previous = 0
+    end
+    current = 0
+end
+
+local elapsed = now - current_start
+local estimate = previous * (window - elapsed) / window + current
+local allowed = 0
+
+if estimate + math.max(cost, 1) <= limit then
+    allowed = 1
+end
+
+if (allowed == 1 or force) and cost > 0 then
+    current = current + cost
+    estimate = estimate + cost
+
+    redis.call(
+        'HMSET', KEYS[1],
+        'start', current_start, 'current', current, 'previous', previous
+    )
+    redis.call('PEXPIRE', KEYS[1], window * 2)
+end
+
+return {allowed, math.max(math.floor(limit - estimate), 0), window - elapsed}
+"""
+
+# generic cell rate algorithm (the token bucket expressed as a single
+# "theoretical arrival time"). Requests are spaced window / limit apart with a
+# burst of up to limit requests. O(1) memory per key.
+GCRA = """
+if redis.replicate_commands then
+    redis.replicate_commands()
+end
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local force = ARGV[4] == '1'
+
+local emission_interval = window / limit
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+
+if tat < now then
+    tat = now
+end
+
+local allow_at = tat + emission_interval * math.max(cost, 1) - window
+local allowed = 0
+local reset
+
+if now >= allow_at then
+    allowed = 1
+end
+
+if (allowed == 1 or force) and cost > 0 then
+    -- an empty bucket is a tat one window ahead, so forced costs stop there
+    tat = math.min(math.ceil(tat + emission_interval * cost), now + window)
+    redis.call('SET', KEYS[1], tat, 'PX', tat - now)
+end
+
+if allowed == 1 then
+    -- time until the bucket is full again
+    reset = math.ceil(tat - now)
+else
+    -- time until the request would be allowed
+    reset = math.ceil(allow_at - now)
+end
+
+local remaining = math.floor((window - (tat - now)) / emission_interval)
+
+return {allowed, math.max(remaining, 0), reset}
 """
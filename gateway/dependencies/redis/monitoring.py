@@ -0,0 +1,137 @@
+import logging
+from collections import deque
+
+from eventlet.event import Event
+from gateway.dependencies.redis.utils import get_redis_connection
+from gateway.utils.metrics import metrics
+from nameko import config
+from nameko.extensions import SharedExtension
+from redis.exceptions import RedisError
+
+
+logger = logging.getLogger(__name__)
+
+MONITORING_STREAM_NAME = "MONITORING_STREAM"
+
+DROP_OLDEST = "drop-oldest"
+DROP_NEWEST = "drop-newest"
+
+
+def build_monitor_event(monitor_name, data=None):
+    if data is None:
+        data = {}
+
+    # add __MONITOR_NAME to data dict
+    if "__MONITOR_NAME" in data:
+        raise ValueError("__MONITOR_NAME can only be defined once.")
+
+    data["__MONITOR_NAME"] = monitor_name
+
+    return data
+
+
+class MonitoringEmitter(SharedExtension):
+    """
+    Buffers monitoring events in memory and writes them to MONITORING_STREAM
+    from a background greenlet, so request handling never waits on redis.
+
+    Events are XADDed in pipelined batches once MONITORING_BATCH_SIZE events are
+    queued or every MONITORING_FLUSH_INTERVAL seconds, whichever comes first.
+    The queue holds at most MONITORING_QUEUE_SIZE events; when it is full
+    MONITORING_OVERFLOW_POLICY decides whether the oldest or the newest event
+    is dropped. Anything left in the queue is flushed when the container stops.
+    """
+
+    def __init__(self):
+        self.queue = deque()
+        self.stats = {"queued": 0, "sent": 0, "dropped": 0, "failed": 0}
+        self._running = False
+        self._wake = Event()
+        self._gt = None
+
+    def setup(self):
+        self.queue_size = int(config.get("MONITORING_QUEUE_SIZE", 10000))
+        self.batch_size = int(config.get("MONITORING_BATCH_SIZE", 100))
+        self.flush_interval = float(config.get("MONITORING_FLUSH_INTERVAL", 1))
+        self.overflow_policy = config.get("MONITORING_OVERFLOW_POLICY", DROP_OLDEST)
+
+        if self.overflow_policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(
+                f"unknown MONITORING_OVERFLOW_POLICY: {self.overflow_policy}"
+            )
+
+        metrics.register_stats(
+            "gateway_monitoring", lambda: dict(self.stats, queue_size=len(self.queue))
+        )
+
+    def start(self):
+        self._running = True
+        self._gt = self.container.spawn_managed_thread(self._run)
+
+    def stop(self):
+        self._running = False
+        self._notify()
+
+        if self._gt is not None:
+            self._gt.wait()
+            self._gt = None
+
+    def kill(self):
+        self._running = False
+
+        if self._gt is not None:
+            self._gt.kill()
+            self._gt = None
+
+    def send(self, monitor_name, data=None):
+        event = build_monitor_event(monitor_name, data)
+
+        if len(self.queue) >= self.queue_size:
+            self.stats["dropped"] += 1
+
+            if self.overflow_policy == DROP_NEWEST:
+                return
+
+            self.queue.popleft()
+
+        self.queue.append(event)
+        self.stats["queued"] += 1
+
+        if len(self.queue) >= self.batch_size:
+            self._notify()
+
+    def flush(self):
+        r = get_redis_connection()
+
+        while self.queue:
+            batch = [
+                self.queue.popleft()
+                for _ in range(min(self.batch_size, len(self.queue)))
+            ]
+
+            pipe = r.pipeline(transaction=False)
+            for event in batch:
+                pipe.xadd(MONITORING_STREAM_NAME, event)
+
+            try:
+                pipe.execute()
+            except RedisError:
+                self.stats["failed"] += len(batch)
+                logger.warning(
+                    "unable to send %s monitoring events", len(batch), exc_info=True
+                )
+            else:
+                self.stats["sent"] += len(batch)
+
+    def _notify(self):
+        if not self._wake.ready():
+            self._wake.send()
+
+    def _run(self):
+        while self._running:
+            self._wake.wait(self.flush_interval)
+            self._wake = Event()
+            self.flush()
+
+        # final flush for anything queued while we were stopping
+        self.flush()
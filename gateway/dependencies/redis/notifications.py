@@ -0,0 +1,80 @@
+import datetime
+
+from gateway.dependencies.redis.utils import get_redis_connection
+from nameko import config
+from nameko.extensions import DependencyProvider
+
+
+def notifications_key(user_id):
+    return f"notifications:{user_id}"
+
+
+def next_stream_id(stream_id):
+    # XRANGE's exclusive "(" ranges need redis 6.2, the next possible id
+    # gives the same result
+    milliseconds, sequence = stream_id.split("-")
+
+    return f"{milliseconds}-{int(sequence) + 1}"
+
+
+class NotificationInbox(DependencyProvider):
+    """
+    Per user notification inbox, stored in a redis stream
+    (``notifications:{user_id}``) with a flat ``{field: str}`` entry per
+    notification.
+
+    Streams are trimmed to about NOTIFICATIONS_MAX_PER_USER entries on every
+    add and expire NOTIFICATIONS_TTL seconds after the user's last
+    notification. Reads are a single XRANGE, paginated with the stream id of
+    the last notification seen.
+    """
+
+    def __init__(self):
+        self.client = None
+
+    def setup(self):
+        self.max_per_user = int(config.get("NOTIFICATIONS_MAX_PER_USER", 100))
+        self.ttl = int(config.get("NOTIFICATIONS_TTL", 30 * 24 * 60 * 60))
+
+    def start(self):
+        self.client = get_redis_connection(decode_responses=True)
+
+    def stop(self):
+        self.client = None
+
+    def kill(self):
+        self.client = None
+
+    def get_dependency(self, worker_ctx):
+        return self
+
+    def add(self, user_id, notification):
+        """
+            Adds ``notification`` to the user's inbox and returns it as
+            stored, with its id.
+        """
+        fields = dict(notification)
+        fields.setdefault(
+            "created_datetime_utc", datetime.datetime.utcnow().isoformat()
+        )
+        key = notifications_key(user_id)
+
+        pipe = self.client.pipeline(transaction=False)
+        pipe.xadd(key, fields, maxlen=self.max_per_user, approximate=True)
+        pipe.expire(key, self.ttl)
+        stream_id, _ = pipe.execute()
+
+        return dict(fields, id=stream_id)
+
+    def get(self, user_id, after=None, limit=20):
+        """
+            Returns up to ``limit`` of the user's notifications, oldest first,
+            added after the notification with id ``after``.
+        """
+        entries = self.client.xrange(
+            notifications_key(user_id),
+            min=next_stream_id(after) if after else "-",
+            count=limit,
+        )
+
+        return [dict(fields, id=stream_id) for stream_id, fields in entries]
@@ -1,66 +1,132 @@
-import datetime
 import logging
+from collections import namedtuple
 
-import walrus
-from gateway.dependencies.redis.lua_scripts import RATE_LIMIT
+from gateway.dependencies.redis.monitoring import (
+    MONITORING_STREAM_NAME,
+    build_monitor_event,
+)
+from gateway.dependencies.redis.scripts import script_registry
 from gateway.dependencies.redis.utils import get_redis_connection, hash_identifier
 from gateway.exceptions.base import RateLimitExceeded
 from nameko import config
 from nameko.extensions import DependencyProvider
+from redis.exceptions import RedisError
 
 
 logger = logging.getLogger(__name__)
 
-MONITORING_STREAM_NAME = "MONITORING_STREAM"
+RATE_LIMIT_WINDOW_MS = 60 * 1000
 
+SLIDING_LOG = "sliding-log"
+FIXED_WINDOW = "fixed-window"
+SLIDING_WINDOW_COUNTER = "sliding-window-counter"
+GCRA = "gcra"
+
+# rate_limit_algorithm -> lua script implementing it
+RATE_LIMIT_ALGORITHMS = {
+    SLIDING_LOG: "SLIDING_LOG",
+    FIXED_WINDOW: "FIXED_WINDOW",
+    SLIDING_WINDOW_COUNTER: "SLIDING_WINDOW_COUNTER",
+    GCRA: "GCRA",
+}
+
+RateLimitResult = namedtuple("RateLimitResult", ["allowed", "remaining", "reset"])
+
+
+def store_redis_rate_limits(rate_limits):
+    """
+        Stores ``{url: rate_limit}`` as ``rate-limit:{url}`` keys in one MSET.
+    """
+    if not rate_limits:
+        return
 
-def store_redis_rate_limit_for_url(url, rate_limit):
     r = get_redis_connection()
 
-    r.set(f"rate-limit:{url}", rate_limit)
+    r.mset({f"rate-limit:{url}": rate_limit for url, rate_limit in rate_limits.items()})
 
 
 def redis_send_monitor(monitor_name, data=None):
-    if data is None:
-        data = {}
+    """
+        Synchronously sends a monitoring event. Request handling should use the
+        buffered ``HttpEntrypoint.monitoring`` emitter instead.
+    """
+    r = get_redis_connection()
 
-    # add __MONITOR_NAME to data dict
-    if "__MONITOR_NAME__" in data:
-        raise ValueError("__MONITOR_NAME can only be defined once.")
+    r.xadd(MONITORING_STREAM_NAME, build_monitor_event(monitor_name, data))
 
-    data["__MONITOR_NAME"] = monitor_name
 
-    r = get_redis_connection()
+def rate_limit_key(identifier, url, algorithm=SLIDING_LOG):
+    # sliding log keys keep their original name so existing windows carry over
+    if algorithm == SLIDING_LOG:
+        return f"{identifier}:{url}"
+
+    return f"{identifier}:{url}:{algorithm}"
 
-    r.xadd(MONITORING_STREAM_NAME, data)
 
+def check_rate_limit(
+    identifier, url, rate_limit, sensitive=True, algorithm=SLIDING_LOG, cost=1
+):
+    """
+        Uses ``cost`` requests of the ``rate_limit`` per minute for
+        ``identifier`` on ``url``, raising RateLimitExceeded if there aren't
+        enough left. A ``cost`` of 0 only checks the quota.
 
-def check_rate_limit(identifier, url, rate_limit, sensitive=True):
+        Returns a RateLimitResult with the remaining requests and the seconds
+        until the limit resets.
+    """
     if sensitive:
         identifier = hash_identifier(identifier)
 
-    r = get_redis_connection()
-
     # Using Lua makes sure that no other redis
     # client can execute the script parallelly.
-    milliseconds_since_epoch = int(datetime.datetime.utcnow().timestamp() * 1000)
-
-    script = r.register_script(RATE_LIMIT)
-    result = script(
-        keys=[f"{identifier}:{url}"], args=[milliseconds_since_epoch, rate_limit]
+    allowed, remaining, reset = script_registry.call(
+        RATE_LIMIT_ALGORITHMS[algorithm],
+        keys=[rate_limit_key(identifier, url, algorithm)],
+        args=[rate_limit, RATE_LIMIT_WINDOW_MS, cost],
+        client=get_redis_connection(),
     )
 
-    existing_scores, result = result.decode("utf-8").split(":")
-    existing_scores = int(existing_scores)
+    result = RateLimitResult(bool(allowed), remaining, reset / 1000)
+
+    if not result.allowed and cost:
+        raise RateLimitExceeded(reset=result.reset)
+
+    return result
 
-    if existing_scores == rate_limit and result == "limit-exceeded":
-        raise RateLimitExceeded()
 
-    # -1 because num_of_existing_scores is before we insert another 1
-    return rate_limit - existing_scores - 1
+def check_rate_limits(checks, client=None):
+    """
+        Runs several rate limit checks in a single pipelined round trip.
+
+        ``checks`` is a list of ``(identifier, url, rate_limit, algorithm, cost)``
+        with identifiers already hashed where needed. Returns a RateLimitResult
+        for each check, in order, without raising RateLimitExceeded.
+    """
+    if not checks:
+        return []
+
+    results = script_registry.call_many(
+        [
+            (
+                RATE_LIMIT_ALGORITHMS[algorithm],
+                [rate_limit_key(identifier, url, algorithm)],
+                [rate_limit, RATE_LIMIT_WINDOW_MS, cost],
+            )
+            for identifier, url, rate_limit, algorithm, cost in checks
+        ],
+        client=client,
+    )
+
+    return [
+        RateLimitResult(bool(allowed), remaining, reset / 1000)
+        for allowed, remaining, reset in results
+    ]
 
 
 class Redis(DependencyProvider):
+
+    scripts = script_registry
+
     def __init__(self, **options):
         self.client = None
         self.options = {"decode_responses": True}
@@ -70,7 +136,14 @@ class Redis(DependencyProvider):
         self.redis_uri = config.get("REDIS_URL", "redis://127.0.0.1:6379/0")
 
     def start(self):
-        self.client = walrus.Database().from_url(self.redis_uri, **self.options)
+        # shares the process wide connection pool with the module level helpers
+        self.client = get_redis_connection(**self.options)
+
+        try:
+            self.scripts.load(self.client)
+        except RedisError:
+            # scripts are loaded on first use if redis isn't reachable yet
+            logger.warning("unable to load lua scripts into redis", exc_info=True)
 
     def stop(self):
         self.client = None
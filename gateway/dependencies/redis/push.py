@@ -0,0 +1,252 @@
+import json
+import logging
+from functools import partial
+
+import eventlet
+from eventlet.greenpool import GreenPool
+from eventlet.websocket import WebSocketWSGI
+from gateway.dependencies.redis.utils import (
+    get_redis_connection,
+    get_redis_subscriber_connection,
+)
+from gateway.utils.jwt_utils import jwt_cache
+from gateway.utils.metrics import metrics
+from jwt.exceptions import InvalidTokenError
+from nameko import config
+from nameko.extensions import DependencyProvider, SharedExtension
+from nameko.web.server import WebServer
+from redis.exceptions import RedisError
+from werkzeug import Response
+from werkzeug.routing import Rule
+
+
+logger = logging.getLogger(__name__)
+
+
+# every gateway node subscribes to this channel and delivers the events for
+# users connected to it
+PUSH_CHANNEL = "push:events"
+
+
+def serialize_event(event, data):
+    return json.dumps({"type": "event", "event": event, "data": data})
+
+
+def error_response(status, error, message):
+    return Response(
+        json.dumps({"error": error, "message": message}),
+        status=status,
+        mimetype="application/json",
+    )
+
+
+class PushServer(SharedExtension):
+    """
+    WebSocket endpoint (PUSH_URL, /v1/push by default) that pushes a user's
+    events to their open sockets.
+
+    Sockets authenticate with the same jwt as ``jwt_required``, in the
+    Authorization header or, since browsers can't set headers on websockets,
+    a ``token`` query parameter. Messages from clients are ignored.
+
+    Each socket only costs its eventlet websocket, a greenthread blocked on
+    it and a set entry, and the number of sockets is capped by
+    PUSH_MAX_CONNECTIONS (and PUSH_MAX_CONNECTIONS_PER_USER). Events are sent
+    from a pool of PUSH_SEND_POOL_SIZE greenthreads and a socket that doesn't
+    take an event within PUSH_SEND_TIMEOUT seconds is closed, so slow
+    clients never buffer events in the gateway.
+
+    Events published to redis (``PushHub.publish``) are received by every
+    node on a single pub/sub subscription, on its own connection without a
+    socket timeout.
+    """
+
+    wsgi_server = WebServer()
+
+    def __init__(self):
+        self.sockets = {}
+        self.connections = 0
+        self.stats = {"rejected": 0, "delivered": 0, "dropped": 0}
+        self._running = False
+        self._pubsub = None
+        self._gt = None
+
+    def setup(self):
+        self.url = config.get("PUSH_URL", "/v1/push")
+        self.max_connections = int(config.get("PUSH_MAX_CONNECTIONS", 20000))
+        self.max_connections_per_user = int(
+            config.get("PUSH_MAX_CONNECTIONS_PER_USER", 10)
+        )
+        self.send_timeout = float(config.get("PUSH_SEND_TIMEOUT", 5))
+        self.pool = GreenPool(int(config.get("PUSH_SEND_POOL_SIZE", 100)))
+
+        self.wsgi_server.register_provider(self)
+
+        metrics.register_stats("gateway_push", self.get_stats)
+
+    def start(self):
+        self._running = True
+        self._gt = self.container.spawn_managed_thread(self._listen)
+
+    def stop(self):
+        self.wsgi_server.unregister_provider(self)
+        self._running = False
+
+        if self._gt is not None:
+            self._gt.kill()
+            self._gt = None
+
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+        # ends the sockets' wait() loops, which removes them
+        for sockets in list(self.sockets.values()):
+            for ws in list(sockets):
+                ws.close()
+
+        super().stop()
+
+    def get_url_rule(self):
+        return Rule(self.url, methods=["GET"])
+
+    def handle_request(self, request):
+        token = request.headers.get("Authorization") or request.args.get("token")
+
+        if not token:
+            return error_response(401, "USER_NOT_AUTHORISED", "")
+
+        try:
+            user_id = str(jwt_cache.decode(token)["user_id"])
+        except InvalidTokenError:
+            return error_response(401, "USER_NOT_AUTHORISED", "")
+
+        if (
+            self.connections >= self.max_connections
+            or len(self.sockets.get(user_id, ())) >= self.max_connections_per_user
+        ):
+            self.stats["rejected"] += 1
+            return error_response(
+                503, "SERVICE_OVERLOADED", "Too many push connections."
+            )
+
+        return WebSocketWSGI(partial(self._handle_socket, user_id))
+
+    def send(self, user_id, event, data):
+        """
+            Sends an event to the user's sockets on this node and returns how
+            many sockets it was sent to.
+        """
+        sockets = self.sockets.get(str(user_id))
+
+        if not sockets:
+            return 0
+
+        payload = serialize_event(event, data)
+
+        for ws in list(sockets):
+            self.pool.spawn_n(self._send, ws, payload)
+
+        return len(sockets)
+
+    def get_stats(self):
+        return dict(self.stats, connections=self.connections, users=len(self.sockets))
+
+    def _handle_socket(self, user_id, ws):
+        sockets = self.sockets.setdefault(user_id, set())
+        sockets.add(ws)
+        self.connections += 1
+
+        try:
+            while ws.wait() is not None:
+                pass
+        finally:
+            sockets.discard(ws)
+            self.connections -= 1
+
+            if not sockets and self.sockets.get(user_id) is sockets:
+                del self.sockets[user_id]
+
+    def _send(self, ws, payload):
+        try:
+            with eventlet.Timeout(self.send_timeout):
+                ws.send(payload)
+        except (eventlet.Timeout, OSError):
+            self.stats["dropped"] += 1
+            # ends the socket's wait() loop, which removes it
+            ws.close()
+        else:
+            self.stats["delivered"] += 1
+
+    def _listen(self):
+        while self._running:
+            try:
+                # a dedicated connection, idle subscriptions would otherwise
+                # time out and hold one of the shared pool's connections
+                self._pubsub = get_redis_subscriber_connection().pubsub(
+                    ignore_subscribe_messages=True
+                )
+                self._pubsub.subscribe(PUSH_CHANNEL)
+
+                for message in self._pubsub.listen():
+                    self._deliver(message["data"])
+            except Exception:
+                # listen() raises AttributeError or ValueError once stop()
+                # has closed the pubsub connection
+                if not self._running:
+                    return
+
+                logger.warning("push subscription failed", exc_info=True)
+
+                if self._pubsub is not None:
+                    self._pubsub.close()
+
+                eventlet.sleep(1)
+
+    def _deliver(self, data):
+        # one bad message must not end the subscription
+        try:
+            event = json.loads(data)
+            self.send(event["user_id"], event["event"], event["data"])
+        except Exception:
+            logger.exception("unable to deliver push message %r", data)
+
+
+class PushHub(DependencyProvider):
+    """
+    Sends events to users connected to the PushServer.
+
+    ``send`` only reaches sockets on this node, which is enough from
+    broadcast event handlers. ``publish`` goes through redis pub/sub and
+    reaches the user's sockets on every node.
+    """
+
+    server = PushServer()
+
+    def __init__(self):
+        self.client = None
+
+    def start(self):
+        self.client = get_redis_connection(decode_responses=True)
+
+    def stop(self):
+        self.client = None
+
+    def kill(self):
+        self.client = None
+
+    def get_dependency(self, worker_ctx):
+        return self
+
+    def send(self, user_id, event, data):
+        return self.server.send(user_id, event, data)
+
+    def publish(self, user_id, event, data):
+        # pushes are best effort, clients still page with ?after= on connect
+        try:
+            self.client.publish(
+                PUSH_CHANNEL,
+                json.dumps({"user_id": str(user_id), "event": event, "data": data}),
+            )
+        except RedisError:
+            logger.warning("unable to publish push event %s", event, exc_info=True)
@@ -0,0 +1,37 @@
+import logging
+
+from gateway.dependencies.redis.provider import store_redis_rate_limits
+from nameko.extensions import SharedExtension
+from redis.exceptions import RedisError
+
+
+logger = logging.getLogger(__name__)
+
+# url -> HttpEntrypoint for every rate limited route, filled in as the
+# entrypoints are declared so the limits can always be read locally
+rate_limited_routes = {}
+
+
+def register_rate_limited_route(entrypoint):
+    rate_limited_routes[entrypoint.url] = entrypoint
+
+
+def get_rate_limits():
+    return {
+        url: entrypoint.rate_limit or entrypoint.private_rate_limit
+        for url, entrypoint in rate_limited_routes.items()
+    }
+
+
+class RateLimitRegistry(SharedExtension):
+    """
+    Publishes the limit of every rate limited route to redis
+    (``rate-limit:{url}``) in a single write when the container starts, for
+    anything outside this process that wants to read them.
+    """
+
+    def start(self):
+        try:
+            store_redis_rate_limits(get_rate_limits())
+        except RedisError:
+            logger.warning("unable to publish rate limits to redis", exc_info=True)
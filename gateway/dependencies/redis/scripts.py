@@ -0,0 +1,149 @@
+import hashlib
+import logging
+import time
+
+from gateway.dependencies.redis import lua_scripts
+from gateway.dependencies.redis.utils import get_redis_connection
+from redis.exceptions import NoScriptError
+
+
+logger = logging.getLogger(__name__)
+
+
+class ScriptRegistry:
+    """
+        Registry of the lua scripts in ``lua_scripts``.
+
+        Every script is SCRIPT LOADed once (see ``Redis.start``) and then
+        invoked with EVALSHA, so the script body is never sent on the hot path.
+        If redis has lost the script (restart or failover) it is loaded again
+        and the call retried.
+
+        Keeps per script call counts, errors, reloads and latency.
+    """
+
+    def __init__(self, scripts):
+        self.scripts = scripts
+        self.shas = {
+            name: hashlib.sha1(source.encode("utf-8")).hexdigest()
+            for name, source in scripts.items()
+        }
+        self.stats = {}
+        self.reset_stats()
+
+    @classmethod
+    def from_module(cls, module):
+        return cls(
+            {
+                name: source
+                for name, source in vars(module).items()
+                if name.isupper() and isinstance(source, str)
+            }
+        )
+
+    def reset_stats(self):
+        self.stats = {
+            name: {"calls": 0, "errors": 0, "reloads": 0, "total_seconds": 0.0}
+            for name in self.scripts
+        }
+
+    def load(self, client=None):
+        if client is None:
+            client = get_redis_connection()
+
+        pipe = client.pipeline(transaction=False)
+
+        for source in self.scripts.values():
+            pipe.script_load(source)
+
+        pipe.execute()
+
+    def call(self, name, keys=(), args=(), client=None):
+        if client is None:
+            client = get_redis_connection()
+
+        sha = self.shas[name]
+        stats = self.stats[name]
+
+        start = time.perf_counter()
+
+        try:
+            try:
+                return client.evalsha(sha, len(keys), *keys, *args)
+            except NoScriptError:
+                stats["reloads"] += 1
+                client.script_load(self.scripts[name])
+                return client.evalsha(sha, len(keys), *keys, *args)
+        except Exception:
+            stats["errors"] += 1
+            raise
+        finally:
+            stats["calls"] += 1
+            stats["total_seconds"] += time.perf_counter() - start
+
+    def call_many(self, calls, client=None):
+        """
+            Runs every ``(name, keys, args)`` in ``calls`` in one pipelined round
+            trip and returns their results in order. Only the calls that failed
+            with NOSCRIPT are retried, after the scripts are loaded again.
+        """
+        if client is None:
+            client = get_redis_connection()
+
+        start = time.perf_counter()
+
+        results = self._execute_many(calls, client)
+
+        missing = [
+            index
+            for index, result in enumerate(results)
+            if isinstance(result, NoScriptError)
+        ]
+
+        if missing:
+            for index in missing:
+                self.stats[calls[index][0]]["reloads"] += 1
+
+            self.load(client)
+
+            retried = self._execute_many([calls[index] for index in missing], client)
+            for index, result in zip(missing, retried):
+                results[index] = result
+
+        # the round trip is shared, so each call is charged an equal part of it
+        elapsed = (time.perf_counter() - start) / max(len(calls), 1)
+
+        for (name, _, _), result in zip(calls, results):
+            self.stats[name]["calls"] += 1
+            self.stats[name]["total_seconds"] += elapsed
+
+            if isinstance(result, Exception):
+                self.stats[name]["errors"] += 1
+
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+        return results
+
+    def _execute_many(self, calls, client):
+        pipe = client.pipeline(transaction=False)
+
+        for name, keys, args in calls:
+            pipe.evalsha(self.shas[name], len(keys), *keys, *args)
+
+        return pipe.execute(raise_on_error=False)
+
+    def get_stats(self):
+        return {
+            name: dict(
+                stats,
+                average_seconds=(
+                    stats["total_seconds"] / stats["calls"] if stats["calls"] else 0.0
+                ),
+            )
+            for name, stats in self.stats.items()
+        }
+
+
+script_registry = ScriptRegistry.from_module(lua_scripts)
@@ -1,13 +1,161 @@
+import hashlib
+import hmac
+from functools import lru_cache
+
+import redis
 import walrus
 from nameko import config
-from passlib.hash import pbkdf2_sha256
+
+
+# rate limit keys written before identifiers were hashed with HMAC
+LEGACY_IDENTIFIER_KEY_PATTERN = "$pbkdf2-sha256$*"
+
+IDENTIFIER_HASH_CACHE_SIZE = 4096
+
+DEFAULT_CONNECTION_OPTIONS = {"decode_responses": True}
+
+# one bounded connection pool per distinct set of connection options, shared by
+# every client in the process. Pools are created lazily and never yield to the
+# eventlet hub while being built, so no lock is needed around _pools.
+_pools = {}
 
 
 def hash_identifier(identifier):
-    return pbkdf2_sha256.hash(identifier)
+    """
+        Deterministically hashes ``identifier`` (e.g. an api token) so it can be
+        used in a redis key without storing it in plain text.
+
+        Uses HMAC-SHA256 keyed with RATE_LIMIT_HASH_SECRET, so the same
+        identifier always maps to the same key. Recently seen identifiers are
+        served from an in-process LRU cache.
+    """
+    return _hmac_identifier(
+        identifier, config.get("RATE_LIMIT_HASH_SECRET", "super_secret")
+    )
+
+
+@lru_cache(maxsize=IDENTIFIER_HASH_CACHE_SIZE)
+def _hmac_identifier(identifier, secret):
+    return hmac.new(
+        secret.encode("utf-8"), identifier.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+
+
+def get_identifier_hash_cache_stats():
+    cache_info = _hmac_identifier.cache_info()
+
+    return {
+        "hits": cache_info.hits,
+        "misses": cache_info.misses,
+        "size": cache_info.currsize,
+        "max_size": cache_info.maxsize,
+    }
+
+
+def purge_legacy_rate_limit_keys(client=None, batch_size=500):
+    """
+        Deletes rate limit keys created with the old pbkdf2 identifier hash.
+
+        Those hashes were randomly salted so every request created a new key
+        that was never read again. Run once after deploying, e.g. from
+        ``nameko shell``. Returns the number of keys deleted.
+    """
+    if client is None:
+        client = get_redis_connection()
+
+    deleted = 0
+    batch = []
+
+    for key in client.scan_iter(match=LEGACY_IDENTIFIER_KEY_PATTERN, count=batch_size):
+        batch.append(key)
+
+        if len(batch) >= batch_size:
+            deleted += client.delete(*batch)
+            batch = []
+
+    if batch:
+        deleted += client.delete(*batch)
+
+    return deleted
+
+
+def get_redis_pool(**options):
+    """
+        Returns the process wide ``BlockingConnectionPool`` for ``options``.
+
+        The pool is bounded by REDIS_MAX_CONNECTIONS; when every connection is
+        checked out callers block (cooperatively under eventlet) for up to
+        REDIS_POOL_TIMEOUT seconds instead of opening new sockets.
+    """
+    connection_options = dict(DEFAULT_CONNECTION_OPTIONS, **options)
+    pool_key = tuple(sorted(connection_options.items()))
+
+    pool = _pools.get(pool_key)
+
+    if pool is None:
+        pool = redis.BlockingConnectionPool.from_url(
+            config.get("REDIS_URL", "redis://127.0.0.1:6379/0"),
+            max_connections=int(config.get("REDIS_MAX_CONNECTIONS", 50)),
+            timeout=float(config.get("REDIS_POOL_TIMEOUT", 5)),
+            socket_timeout=float(config.get("REDIS_SOCKET_TIMEOUT", 5)),
+            socket_connect_timeout=float(config.get("REDIS_SOCKET_CONNECT_TIMEOUT", 2)),
+            health_check_interval=int(config.get("REDIS_HEALTH_CHECK_INTERVAL", 30)),
+            **connection_options
+        )
+        _pools[pool_key] = pool
+
+    return pool
+
+
+def get_redis_connection(**options):
+    return walrus.Database(connection_pool=get_redis_pool(**options))
+
+
+def get_redis_subscriber_connection(**options):
+    """
+        Returns a client with its own connection, outside the shared pools,
+        for long lived blocking reads such as pub/sub subscriptions. Those
+        would otherwise hold a pooled connection forever and hit
+        REDIS_SOCKET_TIMEOUT whenever nothing is published for a while, so
+        reads never time out and dead connections are found with TCP
+        keepalives instead.
+    """
+    return redis.Redis.from_url(
+        config.get("REDIS_URL", "redis://127.0.0.1:6379/0"),
+        max_connections=1,
+        socket_timeout=None,
+        socket_connect_timeout=float(config.get("REDIS_SOCKET_CONNECT_TIMEOUT", 2)),
+        socket_keepalive=True,
+        **dict(DEFAULT_CONNECTION_OPTIONS, **options)
+    )
+
+
+def get_redis_pool_stats():
+    """
+        Returns a list of usage stats for every pool created in this process.
+    """
+    stats = []
+
+    for pool_key, pool in _pools.items():
+        # idle connections sit in the queue, unused slots are filled with None
+        idle = sum(1 for connection in list(pool.pool.queue) if connection)
+        created = len(pool._connections)
+
+        stats.append(
+            {
+                "options": dict(pool_key),
+                "max_connections": pool.max_connections,
+                "created_connections": created,
+                "idle_connections": idle,
+                "in_use_connections": created - idle,
+            }
+        )
+
+    return stats
 
 
-def get_redis_connection():
-    redis_url = config.get("REDIS_URL", "redis://127.0.0.1:6379/0")
+def close_redis_pools():
+    for pool in _pools.values():
+        pool.disconnect()
 
-    return walrus.Database().from_url(redis_url)
+    _pools.clear()
@@ -0,0 +1,134 @@
+import time
+from collections import deque
+
+from gateway.exceptions.rpc import CircuitBreakerOpen
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """
+    Fails calls to a target service fast while it is unhealthy.
+
+    The outcome of the last ``window_size`` calls is kept. Once at least
+    ``min_calls`` are recorded, the breaker opens if the share of failed calls
+    reaches ``error_threshold`` or the share of calls slower than
+    ``slow_call_seconds`` reaches ``slow_call_threshold``.
+
+    While open every call raises CircuitBreakerOpen. After ``reset_timeout``
+    seconds the breaker is half-open and lets up to ``half_open_calls`` probes
+    through: a successful probe closes it, a failed or slow one opens it again.
+
+    ``before_call`` returns the breaker's generation, which changes on every
+    state change, and the outcome of a call from an earlier generation (e.g.
+    a late success from before the breaker opened) is ignored.
+    """
+
+    def __init__(
+        self,
+        name,
+        window_size=20,
+        min_calls=10,
+        error_threshold=0.5,
+        slow_call_seconds=2,
+        slow_call_threshold=0.5,
+        reset_timeout=10,
+        half_open_calls=1,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_threshold = slow_call_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+
+        self.state = CLOSED
+        # (failed, slow) of the most recent calls
+        self.calls = deque(maxlen=window_size)
+        self.opened_at = 0
+        self.probes = 0
+        self.generation = 0
+        self.stats = {"opened": 0, "rejected": 0, "failures": 0, "slow_calls": 0}
+
+    def before_call(self):
+        if self.state == OPEN:
+            retry_after = self.opened_at + self.reset_timeout - time.monotonic()
+
+            if retry_after > 0:
+                self._reject(retry_after)
+
+            self._set_state(HALF_OPEN)
+            self.probes = 0
+
+        if self.state == HALF_OPEN:
+            if self.probes >= self.half_open_calls:
+                self._reject(self.reset_timeout)
+
+            self.probes += 1
+
+        return self.generation
+
+    def record(self, generation, duration, failed):
+        slow = duration >= self.slow_call_seconds
+
+        self.stats["failures"] += failed
+        self.stats["slow_calls"] += slow
+
+        if generation != self.generation:
+            # a call that started before the latest state change
+            return
+
+        if self.state == HALF_OPEN:
+            if failed or slow:
+                self._open()
+            else:
+                self._set_state(CLOSED)
+                self.calls.clear()
+            return
+
+        self.calls.append((failed, slow))
+
+        if len(self.calls) < self.min_calls:
+            return
+
+        failures = sum(failed for failed, _ in self.calls)
+        slow_calls = sum(slow for _, slow in self.calls)
+
+        if (
+            failures / len(self.calls) >= self.error_threshold
+            or slow_calls / len(self.calls) >= self.slow_call_threshold
+        ):
+            self._open()
+
+    def release(self, generation):
+        """
+            Gives back the probe slot of a call that ended without an outcome,
+            e.g. because its worker was killed, so the breaker can't get stuck
+            half-open.
+        """
+        if generation == self.generation and self.state == HALF_OPEN and self.probes:
+            self.probes -= 1
+
+    def get_stats(self):
+        return dict(self.stats, state=self.state, open=int(self.state == OPEN))
+
+    def _set_state(self, state):
+        self.state = state
+        self.generation += 1
+
+    def _open(self):
+        self._set_state(OPEN)
+        self.opened_at = time.monotonic()
+        self.calls.clear()
+        self.stats["opened"] += 1
+
+    def _reject(self, retry_after):
+        self.stats["rejected"] += 1
+
+        raise CircuitBreakerOpen(
+            f"{self.name} is unavailable", retry_after=retry_after
+        )
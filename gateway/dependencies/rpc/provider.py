@@ -0,0 +1,171 @@
+import time
+from functools import partial
+
+import eventlet
+from gateway.dependencies.rpc.circuit_breaker import CircuitBreaker
+from gateway.dependencies.rpc.single_flight import SingleFlight
+from gateway.exceptions.rpc import RpcTimeout
+from gateway.utils.metrics import metrics
+from gateway.utils.timing import NULL_TIMER, get_worker_timer
+from nameko import config
+from nameko.exceptions import registry
+from nameko.rpc import ServiceRpc
+
+
+rpc_calls = metrics.counter(
+    "gateway_rpc_calls_total",
+    "RPC calls made, by outcome (ok, error or timeout).",
+    ("service", "method", "outcome"),
+)
+rpc_call_duration = metrics.histogram(
+    "gateway_rpc_call_duration_seconds",
+    "Time taken by RPC calls.",
+    ("service", "method"),
+)
+
+
+class RpcClient:
+    """
+        Wraps a worker's rpc client so every call goes through the provider's
+        timeouts and circuit breaker, and calls to the ``coalesce`` methods
+        through its SingleFlight. Time spent in calls is added to the
+        request's "rpc" stage.
+    """
+
+    def __init__(self, client, provider, timer=NULL_TIMER):
+        self.client = client
+        self.provider = provider
+        self.timer = timer
+
+    def __getattr__(self, name):
+        call = partial(self.provider.call, name, getattr(self.client, name))
+
+        if name in self.provider.coalesce:
+            call = partial(self.provider.single_flight.call, name, call)
+
+        return partial(self._timed, call)
+
+    def _timed(self, call, *args, **kwargs):
+        with self.timer.stage("rpc"):
+            return call(*args, **kwargs)
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+
+class RpcProxy(ServiceRpc):
+    """
+    RPC proxy to ``target_service``.
+
+    Every call has a deadline: RPC_METHOD_TIMEOUTS["{service}.{method}"], or
+    RPC_TIMEOUT seconds, after which it raises RpcTimeout. Timeouts and
+    unexpected errors feed a CircuitBreaker for the target service (configured
+    with the RPC_CIRCUIT_BREAKER_* keys) that fails calls fast with
+    CircuitBreakerOpen while the service is unhealthy. Exceptions registered
+    with ``remote_error`` are answers from a healthy service and don't count.
+
+    Identical concurrent calls (same method and arguments) to any of the
+    ``coalesce`` methods are merged within the process into a single rpc, and
+    the result or exception is fanned out to every caller. Only opt in read
+    only methods whose results aren't mutated by the callers.
+
+    ``single_flight.get_stats()`` reports, per method, the rpcs made and the
+    calls that were coalesced into them.
+    """
+
+    def __init__(self, target_service, coalesce=(), **kwargs):
+        super().__init__(target_service, **kwargs)
+        self.coalesce = frozenset(coalesce)
+        self.single_flight = SingleFlight()
+        self.circuit_breaker = None
+
+    def setup(self):
+        super().setup()
+        self.configure()
+
+    def configure(self):
+        """
+            Reads the timeouts and circuit breaker settings from config.
+        """
+        self.timeout = config.get("RPC_TIMEOUT", 5)
+        self.method_timeouts = config.get("RPC_METHOD_TIMEOUTS") or {}
+
+        self.circuit_breaker = CircuitBreaker(
+            self.target_service,
+            window_size=int(config.get("RPC_CIRCUIT_BREAKER_WINDOW_SIZE", 20)),
+            min_calls=int(config.get("RPC_CIRCUIT_BREAKER_MIN_CALLS", 10)),
+            error_threshold=float(
+                config.get("RPC_CIRCUIT_BREAKER_ERROR_THRESHOLD", 0.5)
+            ),
+            slow_call_seconds=float(
+                config.get("RPC_CIRCUIT_BREAKER_SLOW_CALL_SECONDS", 2)
+            ),
+            slow_call_threshold=float(
+                config.get("RPC_CIRCUIT_BREAKER_SLOW_CALL_THRESHOLD", 0.5)
+            ),
+            reset_timeout=float(config.get("RPC_CIRCUIT_BREAKER_RESET_TIMEOUT", 10)),
+            half_open_calls=int(config.get("RPC_CIRCUIT_BREAKER_HALF_OPEN_CALLS", 1)),
+        )
+
+        metrics.register_stats(
+            "gateway_rpc_circuit_breaker",
+            lambda: {self.target_service: self.circuit_breaker.get_stats()},
+            labels=("service",),
+        )
+        metrics.register_stats(
+            "gateway_rpc_single_flight",
+            lambda: {self.target_service: self.single_flight.get_stats()},
+            labels=("service", "method"),
+        )
+
+    def get_dependency(self, worker_ctx):
+        return RpcClient(
+            super().get_dependency(worker_ctx), self, get_worker_timer(worker_ctx)
+        )
+
+    def get_timeout(self, method_name):
+        return self.method_timeouts.get(
+            f"{self.target_service}.{method_name}", self.timeout
+        )
+
+    def call(self, method_name, method, *args, **kwargs):
+        generation = self.circuit_breaker.before_call()
+
+        timeout = self.get_timeout(method_name)
+        start = time.monotonic()
+
+        try:
+            with eventlet.Timeout(
+                timeout,
+                RpcTimeout(
+                    f"{self.target_service}.{method_name} timed out after {timeout}s"
+                ),
+            ):
+                result = method(*args, **kwargs)
+        except Exception as exc:
+            duration = time.monotonic() - start
+            self.circuit_breaker.record(
+                generation,
+                duration,
+                failed=not isinstance(exc, tuple(registry.values())),
+            )
+            self._record_metrics(
+                method_name,
+                duration,
+                "timeout" if isinstance(exc, RpcTimeout) else "error",
+            )
+            raise
+        except BaseException:
+            # GreenletExit and the like say nothing about the service
+            self.circuit_breaker.release(generation)
+            raise
+
+        duration = time.monotonic() - start
+        self.circuit_breaker.record(generation, duration, failed=False)
+        self._record_metrics(method_name, duration, "ok")
+
+        return result
+
+    def _record_metrics(self, method_name, duration, outcome):
+        rpc_calls.inc(self.target_service, method_name, outcome)
+        rpc_call_duration.observe(duration, self.target_service, method_name)
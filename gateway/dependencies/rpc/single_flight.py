@@ -0,0 +1,54 @@
+import sys
+
+from eventlet.event import Event
+
+
+class SingleFlight:
+    """
+    Merges identical concurrent calls into one.
+
+    While a call for ``(name, args, kwargs)`` is in flight, any identical call
+    waits for it and gets the same result, or has the same exception raised,
+    instead of making its own. Calls with unhashable arguments are never
+    merged.
+
+    Results are shared between the callers, so they must not be mutated.
+    """
+
+    def __init__(self):
+        self.in_flight = {}
+        self.stats = {}
+
+    def call(self, name, fn, *args, **kwargs):
+        stats = self.stats.setdefault(name, {"calls": 0, "coalesced": 0})
+
+        try:
+            key = (name, args, frozenset(kwargs.items()))
+            event = self.in_flight.get(key)
+        except TypeError:
+            stats["calls"] += 1
+            return fn(*args, **kwargs)
+
+        if event is not None:
+            stats["coalesced"] += 1
+            return event.wait()
+
+        event = self.in_flight[key] = Event()
+        stats["calls"] += 1
+
+        # BaseException too, a leader stopped by eventlet.Timeout or killed
+        # with its worker must not leave the waiters (and later calls) hanging
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            event.send_exception(*sys.exc_info())
+            raise
+        else:
+            event.send(result)
+        finally:
+            del self.in_flight[key]
+
+        return result
+
+    def get_stats(self):
+        return {name: dict(stats) for name, stats in self.stats.items()}
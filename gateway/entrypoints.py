@@ -1,24 +1,42 @@
-import datetime
 import json
+import math
+import time
 from functools import partial
 from types import FunctionType
 
+from eventlet.event import Event
+from gateway.dependencies.admission import NORMAL, PRIORITY_LIMITS, AdmissionController
+from gateway.dependencies.redis.local_rate_limit import LocalRateLimiter
+from gateway.dependencies.redis.monitoring import MonitoringEmitter
 from gateway.dependencies.redis.provider import (
+    RATE_LIMIT_ALGORITHMS,
+    SLIDING_LOG,
     check_rate_limit,
-    redis_send_monitor,
-    store_redis_rate_limit_for_url,
+)
+from gateway.dependencies.redis.rate_limit_registry import (
+    RateLimitRegistry,
+    register_rate_limited_route,
 )
 from gateway.exceptions.base import (
     AuthorizationHeaderMissing,
     RateLimitExceeded,
+    RequestBodyTooLarge,
+    RouteNotFound,
+    ServiceOverloaded,
     UnauthorizedRequest,
+    UnsupportedMediaType,
 )
+from gateway.exceptions.rpc import CircuitBreakerOpen, RpcTimeout
 from gateway.exceptions.stripe import UnableToCreateCheckoutSession
 from gateway.exceptions.users import (
     UserAlreadyExists,
     UserNotAuthorised,
     UserNotVerified,
 )
+from gateway.utils.compression import Compressor, is_compressible
+from gateway.utils.etag import compute_etag, etag_matches, not_modified
+from gateway.utils.metrics import metrics
+from gateway.utils.timing import NULL_TIMER, StageTimer, stage_timings
 from marshmallow import ValidationError
 from nameko import config
 from nameko.exceptions import BadRequest, safe_for_serialization
@@ -27,18 +45,87 @@ from nameko.web.handlers import HttpRequestHandler
 from werkzeug import Response
 
 
+http_requests = metrics.counter(
+    "gateway_http_requests_total",
+    "HTTP requests handled.",
+    ("method", "route", "status"),
+)
+http_request_duration = metrics.histogram(
+    "gateway_http_request_duration_seconds",
+    "Time taken to handle HTTP requests.",
+    ("method", "route"),
+)
+compressed_responses = metrics.counter(
+    "gateway_http_compressed_responses_total",
+    "Responses compressed, by encoding.",
+    ("encoding",),
+)
+compression_bytes_in = metrics.counter(
+    "gateway_http_compression_bytes_in_total",
+    "Bytes of response bodies before compression.",
+    ("encoding",),
+)
+compression_bytes_out = metrics.counter(
+    "gateway_http_compression_bytes_out_total",
+    "Bytes of response bodies after compression.",
+    ("encoding",),
+)
+compression_duration = metrics.histogram(
+    "gateway_http_compression_duration_seconds",
+    "Time spent compressing response bodies.",
+    ("encoding",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1),
+)
+
+
 class HttpEntrypoint(HttpRequestHandler):
     """
     Custom HTTPEntrypoint that:
-        - Adds CORS support by default to requests
+        - Adds CORS support by default to requests. OPTIONS preflights are
+            answered from precomputed headers without spawning a worker, and
+            cached by browsers for max_age (CORS_MAX_AGE) seconds
         - Add rate_limit and private_rate_limit option
             (rate_limit is per minute on a rolling window)
+        - Add rate_limit_algorithm option to pick how the rate limit is enforced
+            (sliding-log by default, see RATE_LIMIT_ALGORITHMS)
+        - Add rate_limit_local_ratio option to admit requests from an in-process
+            counter until that fraction of the limit is used (see LocalRateLimiter)
         - Add rate_limit headers to requests that are rate limited
         - Add authorization option (requires Authorization header with valid api token)
         - Better exception handling to catch errors we care about and
             return sensible messages.
+        - Sends an API_REQUEST monitoring event for every request
+            (buffered and written to redis in the background)
+        - Times the stages of every request (auth, rate_limit, queue_wait,
+            handler, and jwt / rpc from inside the handler) with
+            request.timer. The timings are added to the API_REQUEST event and
+            aggregated in gateway.utils.timing.stage_timings
+            (STAGE_TIMINGS_ENABLED turns them off)
+        - Add priority option (critical, high, normal or low). Requests are
+            shed with a 503 before any other work when the gateway is
+            overloaded, lowest priority first (see AdmissionController)
+        - Rejects bodies over max_body_size bytes (MAX_REQUEST_BODY_SIZE) from
+            their Content-Length before anything else is done
+        - Add schema option. The JSON body is read (at most max_body_size
+            bytes), parsed and loaded with the schema before a worker is
+            spawned, and the result set on request.validated_data. Bodies
+            with a Content-Type that isn't in content_types are rejected
+        - Compresses text and json responses of COMPRESSION_MIN_SIZE bytes or
+            more with the best encoding in Accept-Encoding (gzip, and br / zstd
+            when installed, see gateway.utils.compression). compress=False
+            turns it off for a route
+        - Adds a strong ETag (a hash of the body, unless the handler set one)
+            to 200 GET responses and answers a matching If-None-Match with a
+            304. etag=False turns it off for a route
+        - Add batchable option. Routes can be called from /v1/batch (see
+            BatchDispatcher) unless batchable=False
     """
 
+    monitoring = MonitoringEmitter()
+    local_rate_limiter = LocalRateLimiter()
+    rate_limit_registry = RateLimitRegistry()
+    admission = AdmissionController()
+
     # standard mapped errors which are always caught
     standard_mapped_errors = {
         ValidationError: (400, "VALIDATION_ERROR"),
@@ -47,6 +134,12 @@ class HttpEntrypoint(HttpRequestHandler):
         AuthorizationHeaderMissing: (400, "AUTHORIZATION_HEADER_MISSING"),
         UnauthorizedRequest: (401, "UNAUTHORISED_REQUEST"),
         RateLimitExceeded: (429, "RATE_LIMIT_EXCEEDED"),
+        CircuitBreakerOpen: (503, "SERVICE_UNAVAILABLE"),
+        RpcTimeout: (504, "GATEWAY_TIMEOUT"),
+        ServiceOverloaded: (503, "SERVICE_OVERLOADED"),
+        RequestBodyTooLarge: (413, "REQUEST_BODY_TOO_LARGE"),
+        UnsupportedMediaType: (415, "UNSUPPORTED_MEDIA_TYPE"),
+        RouteNotFound: (404, "ROUTE_NOT_FOUND"),
     }
 
     mapped_errors = {
@@ -63,12 +156,45 @@ class HttpEntrypoint(HttpRequestHandler):
         self.allowed_origin = kwargs.get("origin", cors)
         self.allowed_methods = kwargs.get("methods", ["*"])
         self.allow_credentials = kwargs.get("credentials", True)
+        self.cors_max_age = kwargs.get("max_age", config.get("CORS_MAX_AGE", 600))
+
+        self._build_cors_headers()
 
         self.standard_mapped_errors_tuple = tuple(self.standard_mapped_errors.keys())
 
         self.rate_limit = kwargs.get("rate_limit")
         self.private_rate_limit = kwargs.get("private_rate_limit")
         self.auth_required = kwargs.get("auth_required", False)
+        self.rate_limit_algorithm = kwargs.get("rate_limit_algorithm", SLIDING_LOG)
+
+        if self.rate_limit_algorithm not in RATE_LIMIT_ALGORITHMS:
+            raise ValueError(
+                f"unknown rate_limit_algorithm: {self.rate_limit_algorithm}"
+            )
+
+        self.priority = kwargs.get("priority", NORMAL)
+
+        if self.priority not in PRIORITY_LIMITS:
+            raise ValueError(f"unknown priority: {self.priority}")
+
+        self.rate_limit_local_ratio = kwargs.get("rate_limit_local_ratio")
+
+        self.schema = kwargs.get("schema")
+        # bodies sent without a Content-Type arrive as text/plain, as do
+        # strings sent with fetch()
+        self.content_types = frozenset(
+            kwargs.get("content_types", ["application/json", "text/plain"])
+        )
+        self._max_body_size = kwargs.get("max_body_size")
+
+        self.compress = kwargs.get("compress", True)
+        self.etag = kwargs.get("etag", True) and method == "GET"
+        self.batchable = kwargs.get("batchable", True) and method != "OPTIONS"
+
+        if self.rate_limit_local_ratio is not None and not (
+            0 < self.rate_limit_local_ratio <= 1
+        ):
+            raise ValueError("rate_limit_local_ratio must be between 0 and 1")
 
         if self.rate_limit is not None and not self.auth_required:
             raise ValueError(
@@ -80,71 +206,192 @@ class HttpEntrypoint(HttpRequestHandler):
                 "cant define an entrypoint with a public and private rate limit"
             )
 
-        if self.rate_limit or self.private_rate_limit:
-            store_redis_rate_limit_for_url(
-                self.url, self.rate_limit or self.private_rate_limit
-            )
+        if (self.rate_limit or self.private_rate_limit) and method != "OPTIONS":
+            register_rate_limited_route(self)
 
-    def handle_request(self, request):
-        start = datetime.datetime.utcnow()
-
-        response = self._handle_request(request)
-
-        duration = datetime.datetime.utcnow() - start
-
-        redis_send_monitor(
-            "API_REQUEST",
-            {
-                "method": request.method,
-                "url": self.url,
-                "duration": duration.total_seconds(),
-                "status": response.status,
-                "status_code": response.status_code,
-                "remote_addr": request.remote_addr,
-            },
+    def setup(self):
+        super().setup()
+        self.stage_timings_enabled = config.get("STAGE_TIMINGS_ENABLED", True)
+        self.max_body_size = self._max_body_size or int(
+            config.get("MAX_REQUEST_BODY_SIZE", 65536)
+        )
+        self.compressor = (
+            Compressor().configure()
+            if self.compress and config.get("COMPRESSION_ENABLED", True)
+            else None
         )
 
+    def handle_request(self, request):
+        start = time.perf_counter()
+        request.timer = StageTimer() if self.stage_timings_enabled else NULL_TIMER
+
+        if request.method == "OPTIONS":
+            response = self._preflight_response(request)
+        else:
+            try:
+                self.admission.admit(self.priority)
+            except ServiceOverloaded as exc:
+                response = self.response_from_exception(exc)
+            else:
+                try:
+                    response = self._handle_request(request)
+                finally:
+                    self.admission.release()
+
+            if self.etag:
+                response = self._add_etag(request, response)
+
+            self._add_cors(request, response)
+
+            if self.compressor is not None:
+                self._compress(request, response)
+
+        duration = time.perf_counter() - start
+
+        http_requests.inc(request.method, self.url, response.status_code)
+        http_request_duration.observe(duration, request.method, self.url)
+
+        event = {
+            "method": request.method,
+            "url": self.url,
+            "duration": duration,
+            "status": response.status,
+            "status_code": response.status_code,
+            "remote_addr": request.remote_addr,
+        }
+
+        stages = request.timer.stages
+
+        if stages:
+            stage_timings.record(f"{self.method} {self.url}", stages)
+
+            for name, seconds in stages.items():
+                event[f"stage_{name}"] = seconds
+
+        self.monitoring.send("API_REQUEST", event)
+
         return response
 
     def _handle_request(self, request):
-        rate_limit_left = 0
-        self.request = request
-
-        if request.method == "OPTIONS":
-            return self.response_from_result(result="")
+        rate_limit_left, rate_limit_reset = 0, None
 
         if self.auth_required:
             try:
-                auth_token = self._get_auth_token_from_header(request)
+                with request.timer.stage("auth"):
+                    auth_token = self._get_auth_token_from_header(request)
                 request.auth_token = auth_token
                 if self.rate_limit:
-                    rate_limit_left = self._check_rate_limit(identifier=auth_token)
+                    rate_limit_left, rate_limit_reset = self._check_rate_limit(
+                        request, identifier=auth_token
+                    )
             except (
                 UnauthorizedRequest,
                 AuthorizationHeaderMissing,
                 RateLimitExceeded,
             ) as exc:
                 response = self.response_from_exception(exc)
-                response = self._add_rate_limit(response, rate_limit_left)
+                response = self._add_rate_limit(
+                    response, rate_limit_left, getattr(exc, "reset", None)
+                )
                 return response
 
+        # after auth, so unauthenticated callers get a 401 whatever they send
+        try:
+            self._check_body(request)
+        except (RequestBodyTooLarge, UnsupportedMediaType) as exc:
+            response = self.response_from_exception(exc)
+            return self._add_rate_limit(response, rate_limit_left, rate_limit_reset)
+
         if self.private_rate_limit:
             try:
-                rate_limit_left = self._check_rate_limit(
-                    identifier=request.remote_addr, sensitive=False
+                rate_limit_left, rate_limit_reset = self._check_rate_limit(
+                    request, identifier=request.remote_addr, sensitive=False
                 )
             except (RateLimitExceeded,) as exc:
                 response = self.response_from_exception(exc)
 
-                response = self._add_rate_limit(response, rate_limit_left)
+                response = self._add_rate_limit(response, rate_limit_left, exc.reset)
                 return response
-        response = super().handle_request(request)
-        response = self._add_rate_limit(response, rate_limit_left)
+
+        if self.schema is not None:
+            try:
+                with request.timer.stage("parse"):
+                    request.validated_data = self._load_body(request)
+            except (RequestBodyTooLarge, ValidationError) as exc:
+                response = self.response_from_exception(exc)
+                return self._add_rate_limit(
+                    response, rate_limit_left, rate_limit_reset
+                )
+
+        response = self._run_worker(request)
+        response = self._add_rate_limit(response, rate_limit_left, rate_limit_reset)
         return response
 
-    def response_from_result(self, *args, **kwargs):
-        response = super(HttpEntrypoint, self).response_from_result(*args, **kwargs)
-        response = self._add_cors(response)
+    def _check_body(self, request):
+        content_length = request.content_length
+
+        if content_length is not None and content_length > self.max_body_size:
+            raise RequestBodyTooLarge(
+                f"Request body is larger than {self.max_body_size} bytes."
+            )
+
+        if (
+            self.schema is not None
+            and request.mimetype
+            and request.mimetype not in self.content_types
+        ):
+            raise UnsupportedMediaType(
+                f"Unsupported Content-Type: {request.mimetype}."
+            )
+
+    def _load_body(self, request):
+        # the stream is already limited to Content-Length, this also bounds
+        # bodies without one
+        request.shallow = False
+        body = request.stream.read(self.max_body_size + 1)
+
+        if len(body) > self.max_body_size:
+            raise RequestBodyTooLarge(
+                f"Request body is larger than {self.max_body_size} bytes."
+            )
+
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise ValidationError("Request body is not valid JSON.")
+
+        return self.schema.load(data)
+
+    def _run_worker(self, request):
+        # HttpRequestHandler.handle_request, timing how long the request waits
+        # for a free worker
+        request.shallow = False
+        try:
+            context_data = self.server.context_data_from_headers(request)
+            args, kwargs = self.get_entrypoint_parameters(request)
+
+            self.check_signature(args, kwargs)
+            event = Event()
+
+            start = time.perf_counter()
+            self.container.spawn_worker(
+                self,
+                args,
+                kwargs,
+                context_data=context_data,
+                handle_result=partial(self.handle_result, event),
+            )
+            queue_wait = time.perf_counter() - start
+            self.admission.record_queue_wait(queue_wait)
+            request.timer.add("queue_wait", queue_wait)
+
+            with request.timer.stage("handler"):
+                result = event.wait()
+
+            response = self.response_from_result(result)
+
+        except Exception as exc:
+            response = self.response_from_exception(exc)
         return response
 
     def response_from_exception(self, exc):
@@ -166,27 +413,158 @@ class HttpEntrypoint(HttpRequestHandler):
             status=status_code,
             mimetype="application/json",
         )
-        response = self._add_cors(response)
+
+        retry_after = getattr(exc, "retry_after", None)
+
+        if retry_after is not None:
+            response.headers.add("Retry-After", math.ceil(retry_after))
 
         return response
 
-    def _add_cors(self, response):
-        response.headers.add(
-            "Access-Control-Allow-Headers",
-            self.request.headers.get("Access-Control-Request-Headers"),
-        )
-        response.headers.add(
-            "Access-Control-Allow-Credentials", str(self.allow_credentials).lower()
+    def _add_etag(self, request, response):
+        if response.status_code != 200 or response.is_streamed:
+            return response
+
+        etag, weak = response.get_etag()
+
+        if etag is None:
+            etag, weak = compute_etag(response.get_data()), False
+            response.set_etag(etag)
+
+        if etag_matches(request, etag):
+            if self.compressor is not None and self._is_compressible(
+                request, response
+            ):
+                # the 304 gets the Vary and ETag the 200 would have had
+                encoding = self._negotiate(request, response, len(response.get_data()))
+
+                if encoding is not None and not weak:
+                    response.set_etag(f"{etag}-{encoding}")
+
+            return not_modified(response)
+
+        return response
+
+    @staticmethod
+    def _is_compressible(request, response):
+        return (
+            request.method != "HEAD"
+            and "Content-Encoding" not in response.headers
+            and is_compressible(response.mimetype)
         )
-        response.headers.add(
-            "Access-Control-Allow-Methods", ",".join(self.allowed_methods)
+
+    def _negotiate(self, request, response, size):
+        """
+            Returns the encoding a body of ``size`` bytes is compressed with,
+            or None, adding Vary to the responses that depend on it.
+        """
+        if size < self.compressor.min_size:
+            return None
+
+        # from here the body depends on Accept-Encoding
+        response.headers.add("Vary", "Accept-Encoding")
+
+        return self.compressor.negotiate(request.accept_encodings)
+
+    def _compress(self, request, response):
+        if response.status_code in (204, 304) or not self._is_compressible(
+            request, response
+        ):
+            return
+
+        if response.is_streamed:
+            self._compress_stream(request, response)
+            return
+
+        data = response.get_data()
+        encoding = self._negotiate(request, response, len(data))
+
+        if encoding is None:
+            return
+
+        start = time.perf_counter()
+        compressed = self.compressor.compress(encoding, data)
+        duration = time.perf_counter() - start
+
+        request.timer.add("compress", duration)
+        compression_duration.observe(duration, encoding)
+
+        if len(compressed) >= len(data):
+            return
+
+        compressed_responses.inc(encoding)
+        compression_bytes_in.inc(encoding, amount=len(data))
+        compression_bytes_out.inc(encoding, amount=len(compressed))
+
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+
+        etag, weak = response.get_etag()
+
+        if etag and not weak:
+            # strong ETags are per representation
+            response.set_etag(f"{etag}-{encoding}")
+
+    def _compress_stream(self, request, response):
+        # streamed responses are only used for large bodies, so they skip the
+        # minimum size and are compressed chunk by chunk as they are sent
+        response.headers.add("Vary", "Accept-Encoding")
+
+        encoding = self.compressor.negotiate(request.accept_encodings)
+
+        if encoding is None:
+            return
+
+        compressed_responses.inc(encoding)
+
+        response.response = self.compressor.compress_stream(
+            encoding, response.iter_encoded()
         )
-        response.headers.add(
-            "Access-Control-Allow-Origin", ",".join(self.allowed_origin)
+        response.headers["Content-Encoding"] = encoding
+        response.headers.pop("Content-Length", None)
+
+    def _build_cors_headers(self):
+        self.allowed_origins = frozenset(
+            origin.strip() for origin in self.allowed_origin
         )
+        self.cors_headers = [
+            ("Access-Control-Allow-Credentials", str(self.allow_credentials).lower()),
+            ("Access-Control-Allow-Methods", ",".join(self.allowed_methods)),
+        ]
+
+        if "*" in self.allowed_origins:
+            self.cors_headers.append(("Access-Control-Allow-Origin", "*"))
+
+        self.preflight_headers = self.cors_headers + [
+            ("Access-Control-Max-Age", str(self.cors_max_age))
+        ]
+
+    def _preflight_response(self, request):
+        response = Response(headers=self.preflight_headers)
+        self._add_request_cors(request, response)
+        return response
+
+    def _add_cors(self, request, response):
+        response.headers.extend(self.cors_headers)
+        self._add_request_cors(request, response)
         return response
 
-    def _add_rate_limit(self, response, rate_limit_left):
+    def _add_request_cors(self, request, response):
+        allowed_headers = request.headers.get("Access-Control-Request-Headers")
+
+        if allowed_headers:
+            response.headers.add("Access-Control-Allow-Headers", allowed_headers)
+
+        if "*" not in self.allowed_origins:
+            # only the requesting origin is echoed, and only if it is allowed
+            origin = request.headers.get("Origin")
+
+            if origin in self.allowed_origins:
+                response.headers.add("Access-Control-Allow-Origin", origin)
+
+            response.headers.add("Vary", "Origin")
+
+    def _add_rate_limit(self, response, rate_limit_left, rate_limit_reset=None):
 
         if self.rate_limit or self.private_rate_limit:
             response.headers.add(
@@ -194,16 +572,38 @@ class HttpEntrypoint(HttpRequestHandler):
             )
             response.headers.add("X-Rate-Limit-Left", rate_limit_left)
 
+            if rate_limit_reset is not None:
+                reset = math.ceil(rate_limit_reset)
+                response.headers.add("X-Rate-Limit-Reset", reset)
+
+                if response.status_code == 429:
+                    response.headers.add("Retry-After", reset)
+
         return response
 
-    def _check_rate_limit(self, identifier="", sensitive=True):
-        rate_limit_left = check_rate_limit(
-            identifier,
-            self.url,
-            self.rate_limit or self.private_rate_limit,
-            sensitive=sensitive,
-        )
-        return rate_limit_left
+    def _check_rate_limit(self, request, identifier="", sensitive=True):
+        with request.timer.stage("rate_limit"):
+            return self._get_rate_limit(identifier, sensitive)
+
+    def _get_rate_limit(self, identifier, sensitive):
+        if self.rate_limit_local_ratio:
+            result = self.local_rate_limiter.check(
+                identifier,
+                self.url,
+                self.rate_limit or self.private_rate_limit,
+                self.rate_limit_local_ratio,
+                sensitive=sensitive,
+                algorithm=self.rate_limit_algorithm,
+            )
+        else:
+            result = check_rate_limit(
+                identifier,
+                self.url,
+                self.rate_limit or self.private_rate_limit,
+                sensitive=sensitive,
+                algorithm=self.rate_limit_algorithm,
+            )
+        return result.remaining, result.reset
 
     @staticmethod
     def _get_auth_token_from_header(request):
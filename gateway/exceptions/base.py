@@ -17,7 +17,10 @@ def remote_error(exc_path):
 
 
 class RateLimitExceeded(Exception):
-    pass
+    def __init__(self, message="", reset=None):
+        super().__init__(message)
+        # seconds until the rate limit resets
+        self.reset = reset
 
 
 class AuthorizationHeaderMissing(Exception):
@@ -26,3 +29,21 @@ class AuthorizationHeaderMissing(Exception):
 
 class UnauthorizedRequest(Exception):
     pass
+
+
+class RequestBodyTooLarge(Exception):
+    pass
+
+
+class UnsupportedMediaType(Exception):
+    pass
+
+
+class RouteNotFound(Exception):
+    pass
+
+
+class ServiceOverloaded(Exception):
+    def __init__(self, message="", retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,9 @@
+class RpcTimeout(Exception):
+    pass
+
+
+class CircuitBreakerOpen(Exception):
+    def __init__(self, message="", retry_after=None):
+        super().__init__(message)
+        # seconds until the circuit breaker lets a probe call through
+        self.retry_after = retry_after
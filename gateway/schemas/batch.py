@@ -0,0 +1,26 @@
+from gateway.schemas.compiled import CompiledSchema
+from marshmallow import Schema, fields, validate
+
+
+class BatchSubRequest(Schema):
+    # the methods the gateway's routes are served with
+    method = fields.String(
+        missing="GET", validate=validate.OneOf(["GET", "HEAD", "POST"])
+    )
+    # the route's path, with any query string
+    path = fields.String(required=True, validate=validate.Regexp(r"^/"))
+    body = fields.Raw()
+    # sent instead of the batch's, e.g. a different Authorization
+    headers = fields.Dict(keys=fields.String(), values=fields.String())
+
+
+class BatchRequest(Schema):
+    requests = fields.Nested(
+        BatchSubRequest,
+        many=True,
+        required=True,
+        validate=validate.Length(min=1),
+    )
+
+
+batch_request = CompiledSchema(BatchRequest())
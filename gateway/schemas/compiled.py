@@ -0,0 +1,163 @@
+import json
+from functools import partial
+
+from marshmallow import fields, missing
+from marshmallow.utils import ensure_text_type
+
+
+class CompiledSchema:
+    """
+        Wraps a marshmallow schema instance, built once, with ``dump`` and
+        ``load`` functions generated from its fields.
+
+        The generated functions only handle the common case (dicts with
+        String, Integer and Nested fields) and hand anything else to the
+        schema itself, so the output and the errors raised are the same as
+        marshmallow's. Schemas that can't be compiled (hooks, validators,
+        defaults, other field types, ...) always use marshmallow.
+
+        Example:
+            get_projects_response = CompiledSchema(GetProjectsResponse())
+            get_projects_response.dumps({"projects": projects})
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.dump = schema.dump
+        self.load = schema.load
+
+        if not schema.many:
+            self.dump = _compile_dump(schema, {}, "dump") or schema.dump
+            self.load = _compile_load(schema, {}, "load") or schema.load
+
+        if schema.opts.render_module is not json:
+            self.dumps = schema.dumps
+            self.loads = schema.loads
+
+    def dumps(self, obj):
+        return json.dumps(self.dump(obj))
+
+    def loads(self, json_data):
+        return self.load(json.loads(json_data))
+
+
+def _has_hooks(schema):
+    return any(schema._hooks.values())
+
+
+def _is_plain_key(key):
+    # keys marshmallow would treat as a path, or find on the dict itself
+    return "." not in key and not hasattr(dict, key)
+
+
+def _build(name, lines, namespace):
+    exec("\n".join(lines), namespace)
+
+    return namespace[name]
+
+
+def _compile_dump(schema, namespace, name):
+    # nested schemas are built with the field's many, but Nested dumps each
+    # item itself so only the top level schema's many matters
+    if _has_hooks(schema):
+        return None
+
+    namespace.update(missing=missing, ensure_text_type=ensure_text_type)
+    namespace[f"{name}_fallback"] = partial(schema.dump, many=False)
+
+    lines = [
+        f"def {name}(obj):",
+        "    if type(obj) is not dict:",
+        f"        return {name}_fallback(obj)",
+        "    result = {}",
+    ]
+
+    for index, (attr_name, field) in enumerate(schema.dump_fields.items()):
+        attribute = field.attribute or attr_name
+
+        if not _is_plain_key(attribute) or field.default is not missing:
+            return None
+
+        field_type = type(field)
+
+        if field_type is fields.String:
+            expression = "value if type(value) is str else ensure_text_type(value)"
+        elif field_type is fields.Integer and not field.as_string:
+            expression = "int(value)"
+        elif field_type is fields.Nested:
+            nested = _compile_dump(field.schema, namespace, f"{name}_{index}")
+
+            if nested is None:
+                return None
+
+            expression = (
+                f"[{name}_{index}(item) for item in value]"
+                if field.many
+                else f"{name}_{index}(value)"
+            )
+        else:
+            return None
+
+        lines.extend(
+            [
+                f"    value = obj.get({attribute!r}, missing)",
+                "    if value is not missing:",
+                f"        result[{field.data_key or attr_name!r}] = (",
+                f"            None if value is None else {expression}",
+                "        )",
+            ]
+        )
+
+    lines.append("    return result")
+
+    return _build(name, lines, namespace)
+
+
+def _compile_load(schema, namespace, name):
+    if _has_hooks(schema):
+        return None
+
+    namespace["load_fallback"] = schema.load
+
+    load_fields = schema.load_fields.items()
+    lines = [
+        f"def {name}(data):",
+        # only the exact keys can be loaded without unknown or missing errors
+        f"    if type(data) is not dict or len(data) != {len(load_fields)}:",
+        "        return load_fallback(data)",
+        "    result = {}",
+    ]
+
+    for attr_name, field in load_fields:
+        key = field.data_key or attr_name
+        attribute = field.attribute or attr_name
+
+        if (
+            not field.required
+            or field.validators
+            or not _is_plain_key(key)
+            or "." in attribute
+        ):
+            return None
+
+        field_type = type(field)
+
+        if field_type is fields.String:
+            value_type = "str"
+        elif field_type is fields.Integer:
+            value_type = "int"
+        else:
+            return None
+
+        lines.extend(
+            [
+                f"    value = data.get({key!r})",
+                f"    if type(value) is not {value_type}:",
+                "        return load_fallback(data)",
+                f"    result[{attribute!r}] = value",
+            ]
+        )
+
+    lines.append("    return result")
+
+    return _build(name, lines, namespace)
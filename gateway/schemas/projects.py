@@ -1,4 +1,27 @@
-from marshmallow import Schema, fields
+from gateway.schemas.compiled import CompiledSchema
+from marshmallow import EXCLUDE, Schema, ValidationError, fields, validate
+
+
+PROJECT_FIELDS = ("id", "name", "created_datetime_utc")
+PROJECTS_PAGE_SIZE = 100
+
+
+def validate_project_fields(value):
+    if not set(value.split(",")) <= set(PROJECT_FIELDS):
+        raise ValidationError(
+            f"Must be a comma separated list of {', '.join(PROJECT_FIELDS)}."
+        )
+
+
+class GetProjectsRequest(Schema):
+    class Meta:
+        unknown = EXCLUDE
+
+    cursor = fields.Integer(validate=validate.Range(min=0))
+    limit = fields.Integer(
+        missing=PROJECTS_PAGE_SIZE, validate=validate.Range(min=1, max=1000)
+    )
+    only = fields.String(data_key="fields", validate=validate_project_fields)
 
 
 class GetProjectResponse(Schema):
@@ -9,3 +32,10 @@ class GetProjectResponse(Schema):
 
 class GetProjectsResponse(Schema):
     projects = fields.Nested(GetProjectResponse, many=True, required=True)
+    # pass as ?cursor= to get the next page, null on the last page
+    cursor = fields.Integer(required=True, allow_none=True)
+
+
+get_projects_request = CompiledSchema(GetProjectsRequest())
+get_project_response = CompiledSchema(GetProjectResponse())
+get_projects_response = CompiledSchema(GetProjectsResponse())
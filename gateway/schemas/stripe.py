@@ -1,3 +1,4 @@
+from gateway.schemas.compiled import CompiledSchema
 from marshmallow import Schema, fields
 
 
@@ -10,3 +11,11 @@ class CreateStripeCheckoutSessionRequest(Schema):
 
 class CreateStripeCheckoutSessionResponse(Schema):
     session_id = fields.String(required=True)
+
+
+create_stripe_checkout_session_request = CompiledSchema(
+    CreateStripeCheckoutSessionRequest()
+)
+create_stripe_checkout_session_response = CompiledSchema(
+    CreateStripeCheckoutSessionResponse()
+)
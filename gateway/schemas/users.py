@@ -1,4 +1,5 @@
-from marshmallow import Schema, fields
+from gateway.schemas.compiled import CompiledSchema
+from marshmallow import EXCLUDE, Schema, fields, validate
 
 
 class AuthUserRequest(Schema):
@@ -30,9 +31,31 @@ class ResendUserTokenEmailRequest(Schema):
     password = fields.String(required=True)
 
 
+class GetUserNotificationsRequest(Schema):
+    class Meta:
+        unknown = EXCLUDE
+
+    after = fields.String(validate=validate.Regexp(r"^\d+-\d+$"))
+    limit = fields.Integer(missing=20, validate=validate.Range(min=1, max=100))
+
+
 class GetUserNotificationResponse(Schema):
-    pass
+    id = fields.String(required=True)
+    type = fields.String(required=True)
+    message = fields.String(required=True)
+    created_datetime_utc = fields.String(required=True)
 
 
 class GetUserNotificationsResponse(Schema):
     notifications = fields.Nested(GetUserNotificationResponse, many=True, required=True)
+    # pass as ?after= to get the next page
+    after = fields.String(required=True, allow_none=True)
+
+
+auth_user_request = CompiledSchema(AuthUserRequest())
+user_auth_response = CompiledSchema(UserAuthResponse())
+create_user_request = CompiledSchema(CreateUserRequest())
+verify_user_token_request = CompiledSchema(VerifyUserTokenRequest())
+resend_user_token_email_request = CompiledSchema(ResendUserTokenEmailRequest())
+get_user_notifications_request = CompiledSchema(GetUserNotificationsRequest())
+get_user_notifications_response = CompiledSchema(GetUserNotificationsResponse())
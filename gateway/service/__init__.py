@@ -1,7 +1,9 @@
+from gateway.service.private.batch import BatchServiceMixin
 from gateway.service.private.projects import ProjectsServiceMixin
 from gateway.service.private.stripe import StripeServiceMixin
 from gateway.service.private.users import UsersServiceMixin
 from gateway.service.public.health_check import HealthCheckServiceMixin
+from gateway.service.public.metrics import MetricsServiceMixin
 from gateway.service.public.rate_limit import RateLimitServiceMixin
 
 
@@ -11,5 +13,7 @@ class GatewayService(
     ProjectsServiceMixin,
     RateLimitServiceMixin,
     StripeServiceMixin,
+    MetricsServiceMixin,
+    BatchServiceMixin,
 ):
     pass
@@ -1,9 +1,13 @@
 from gateway.dependencies.redis.provider import Redis
-from nameko.rpc import RpcProxy
+from gateway.dependencies.redis.push import PushHub
+from gateway.dependencies.rpc.provider import RpcProxy
 
 
 class ServiceMixin:
     name = "gateway"
 
-    accounts_rpc = RpcProxy("accounts")
+    accounts_rpc = RpcProxy(
+        "accounts", coalesce=("get_verified_projects", "user_already_exists")
+    )
     redis = Redis()
+    push = PushHub()
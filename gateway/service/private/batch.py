@@ -0,0 +1,24 @@
+from gateway.dependencies.batch import BatchDispatcher
+from gateway.entrypoints import http
+from gateway.schemas import batch as batch_schemas
+from gateway.service.base import ServiceMixin
+from werkzeug import Response
+
+
+class BatchServiceMixin(ServiceMixin):
+
+    batch_dispatcher = BatchDispatcher()
+
+    @http(
+        "POST",
+        "/v1/batch",
+        schema=batch_schemas.batch_request,
+        batchable=False,
+        # each batch runs up to BATCH_MAX_REQUESTS handlers
+        private_rate_limit=20,
+    )
+    def batch(self, request):
+        return Response(
+            self.batch_dispatcher(request, request.validated_data["requests"]),
+            mimetype="application/json",
+        )
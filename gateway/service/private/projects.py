@@ -1,23 +1,125 @@
+import json
+
+from gateway.dependencies.redis.cache import ResponseCache
 from gateway.entrypoints import http
 from gateway.schemas import projects as projects_schemas
 from gateway.service.base import ServiceMixin
 from gateway.utils.jwt_utils import jwt_required
+from gateway.utils.streaming import stream_json_list
+from nameko import config
+from nameko.events import BROADCAST, event_handler
 from werkzeug import Response
 
 
+def get_page(projects, limit):
+    """
+        Returns the first ``limit`` projects of a page loaded with one extra
+        project (accounts pages in id order) and the cursor of the next page,
+        or None if there isn't one.
+    """
+    if len(projects) > limit:
+        return projects[:limit], projects[limit - 1]["id"]
+
+    return projects, None
+
+
 class ProjectsServiceMixin(ServiceMixin):
+
+    projects_cache = ResponseCache("projects")
+
     @jwt_required()
     @http("GET", "/v1/projects")
     def get_projects(self, request):
+        jwt_data = request.jwt_data
+        user_id = jwt_data["user_id"]
 
-        import time
-        time.sleep(1)
+        page = projects_schemas.get_projects_request.load(request.args.to_dict())
 
-        jwt_data = request.jwt_data
+        # accounts only takes after=, limit= and fields= once it pages, until
+        # then every request gets the full list and no cursor to follow
+        paginated = config.get("PROJECTS_PAGINATION_ENABLED", False)
+
+        if paginated and page != {"limit": projects_schemas.PROJECTS_PAGE_SIZE}:
+            return self._get_projects_page(user_id, page)
+
+        # the default page with every field is what clients load, so it's the
+        # only one cached (and invalidated) per user
+        def load_projects():
+            if paginated:
+                projects, cursor = self._load_projects(user_id, page["limit"])
+            else:
+                projects = self.accounts_rpc.get_verified_projects(user_id)
+                cursor = None
+
+            return projects_schemas.get_projects_response.dumps(
+                {"projects": projects, "cursor": cursor}
+            )
+
+        response = Response(
+            self.projects_cache.get(user_id, load_projects),
+            mimetype="application/json",
+        )
 
-        projects = self.accounts_rpc.get_verified_projects(jwt_data["user_id"])
+        if request.if_none_match:
+            # saves hashing the body to compare it, the entry is in L1 by now.
+            # The entrypoint answers a match with a 304
+            etag = self.projects_cache.get_etag(user_id)
 
+            if etag is not None:
+                response.set_etag(etag)
+
+        return response
+
+    def _load_projects(self, user_id, limit, cursor=None, only=None):
+        # the extra project tells whether there is a next page, and the cursor
+        # needs the ids even when they weren't asked for
+        projects = self.accounts_rpc.get_verified_projects(
+            user_id,
+            after=cursor,
+            limit=limit + 1,
+            fields=tuple(sorted(only | {"id"})) if only else None,
+        )
+
+        return get_page(projects, limit)
+
+    def _get_projects_page(self, user_id, page):
+        only = set(page["only"].split(",")) if "only" in page else None
+
+        projects, cursor = self._load_projects(
+            user_id, page["limit"], page.get("cursor"), only
+        )
+
+        dump = projects_schemas.get_project_response.dump
+
+        if only is not None:
+
+            def dump(project, dump=dump):
+                return {
+                    key: value for key, value in dump(project).items() if key in only
+                }
+
+        if len(projects) <= int(config.get("PROJECTS_STREAM_THRESHOLD", 200)):
+            projects = [dump(project) for project in projects]
+
+            return Response(
+                json.dumps({"projects": projects, "cursor": cursor}),
+                mimetype="application/json",
+            )
+
+        # large pages are encoded as they are sent instead of in one string
         return Response(
-            projects_schemas.GetProjectsResponse().dumps({"projects": projects}),
+            stream_json_list("projects", projects, dump, {"cursor": cursor}),
             mimetype="application/json",
         )
+
+    @event_handler(
+        "accounts",
+        "user_projects_updated",
+        handler_type=BROADCAST,
+        reliable_delivery=False,
+    )
+    def invalidate_projects_cache(self, payload):
+        # every gateway node drops the user's projects from its cache and
+        # tells the user's sockets on it to refetch them
+        self.projects_cache.invalidate(payload["user_id"])
+        self.push.send(payload["user_id"], "projects_updated", {})
@@ -1,5 +1,3 @@
-import json
-
 from gateway.entrypoints import http
 from gateway.exceptions.stripe import UnableToCreateCheckoutSession
 from gateway.schemas import stripe as stripe_schemas
@@ -14,12 +12,10 @@ class StripeServiceMixin(ServiceMixin):
         "POST",
         "/v1/stripe/checkout-session",
         expected_exceptions=(UnableToCreateCheckoutSession,),
+        schema=stripe_schemas.create_stripe_checkout_session_request,
     )
     def create_stripe_checkout_session(self, request):
-
-        checkout_session_details = stripe_schemas.CreateStripeCheckoutSessionRequest().load(
-            json.loads(request.data)
-        )
+        checkout_session_details = request.validated_data
 
         jwt_data = request.jwt_data
         session_id = self.accounts_rpc.create_stripe_checkout_session(
@@ -34,7 +30,7 @@ class StripeServiceMixin(ServiceMixin):
         )
 
         return Response(
-            stripe_schemas.CreateStripeCheckoutSessionResponse().dumps(
+            stripe_schemas.create_stripe_checkout_session_response.dumps(
                 {"session_id": session_id}
             ),
             mimetype="application/json",
@@ -1,5 +1,4 @@
-import json
-
+from gateway.dependencies.redis.notifications import NotificationInbox
 from gateway.entrypoints import http
 from gateway.exceptions.users import (
     UserAlreadyExists,
@@ -8,27 +7,31 @@ from gateway.exceptions.users import (
 )
 from gateway.schemas import users as users_schemas
 from gateway.service.base import ServiceMixin
-from werkzeug import Response
 from gateway.utils.jwt_utils import jwt_required
+from nameko.events import event_handler
+from werkzeug import Response
 
 
 class UsersServiceMixin(ServiceMixin):
+
+    notification_inbox = NotificationInbox()
+
     @http(
         "POST",
         "/v1/user/auth",
         expected_exceptions=(UserNotVerified,),
         private_rate_limit=60,
+        priority="high",
+        schema=users_schemas.auth_user_request,
     )
     def auth_user(self, request):
-        user_auth_details = users_schemas.AuthUserRequest().load(
-            json.loads(request.data)
-        )
+        user_auth_details = request.validated_data
         jwt_result = self.accounts_rpc.auth_user(
             user_auth_details["email"], user_auth_details["password"]
         )
 
         return Response(
-            users_schemas.UserAuthResponse().dumps(jwt_result),
+            users_schemas.user_auth_response.dumps(jwt_result),
             mimetype="application/json",
         )
 
@@ -51,13 +54,10 @@ class UsersServiceMixin(ServiceMixin):
         "/v1/user",
         expected_exceptions=(UserAlreadyExists,),
         private_rate_limit=60,
+        schema=users_schemas.create_user_request,
     )
     def create_user(self, request):
-        create_user_details = users_schemas.CreateUserRequest().load(
-            json.loads(request.data)
-        )
-
-        self.accounts_rpc.create_user(create_user_details)
+        self.accounts_rpc.create_user(request.validated_data)
 
         return Response(mimetype="application/json")
 
@@ -66,12 +66,10 @@ class UsersServiceMixin(ServiceMixin):
         "/v1/user/token",
         expected_exceptions=(UserNotAuthorised,),
         private_rate_limit=60,
+        schema=users_schemas.verify_user_token_request,
     )
     def verify_user_token(self, request):
-
-        user_token_details = users_schemas.VerifyUserTokenRequest().load(
-            json.loads(request.data)
-        )
+        user_token_details = request.validated_data
 
         self.accounts_rpc.verify_user(
             user_token_details["email"], user_token_details["token"]
@@ -84,11 +82,10 @@ class UsersServiceMixin(ServiceMixin):
         "/v1/user/resend-email",
         expected_exceptions=(UserNotAuthorised,),
         private_rate_limit=15,
+        schema=users_schemas.resend_user_token_email_request,
     )
     def resend_user_token_email(self, request):
-        user_resend_details = users_schemas.ResendUserTokenEmailRequest().load(
-            json.loads(request.data)
-        )
+        user_resend_details = request.validated_data
 
         self.accounts_rpc.resend_user_token(
             user_resend_details["email"], user_resend_details["password"]
@@ -99,18 +96,28 @@ class UsersServiceMixin(ServiceMixin):
     @jwt_required()
     @http("GET", "/v1/user/notifications")
     def get_user_notifications(self, request):
-        import time
-
-        time.sleep(1)
-
-        jwt_data = request.jwt_data
+        page = users_schemas.get_user_notifications_request.load(
+            request.args.to_dict()
+        )
+        after = page.get("after")
 
-        # todo: get user notifications!!!
-        notifications = []
+        notifications = self.notification_inbox.get(
+            request.jwt_data["user_id"], after=after, limit=page["limit"]
+        )
 
         return Response(
-            users_schemas.GetUserNotificationsResponse().dumps(
-                {"notifications": notifications}
+            users_schemas.get_user_notifications_response.dumps(
+                {
+                    "notifications": notifications,
+                    "after": notifications[-1]["id"] if notifications else after,
+                }
             ),
             mimetype="application/json",
         )
+
+    @event_handler("accounts", "user_notification")
+    def add_user_notification(self, payload):
+        user_id = payload["user_id"]
+        notification = self.notification_inbox.add(user_id, payload["notification"])
+
+        self.push.publish(user_id, "notification", notification)
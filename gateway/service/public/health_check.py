@@ -5,7 +5,7 @@ from gateway.service.base import ServiceMixin
 
 
 class HealthCheckServiceMixin(ServiceMixin):
-    @http("GET", "/health-check")
+    @http("GET", "/health-check", priority="critical")
     def health_check(self, request):
 
         self.redis.set("health-check", datetime.datetime.utcnow().isoformat())
@@ -0,0 +1,47 @@
+from gateway.dependencies.redis.scripts import script_registry
+from gateway.dependencies.redis.utils import (
+    get_identifier_hash_cache_stats,
+    get_redis_pool_stats,
+)
+from gateway.entrypoints import http
+from gateway.exceptions.base import UnauthorizedRequest
+from gateway.service.base import ServiceMixin
+from gateway.utils.jwt_utils import jwt_cache
+from gateway.utils.metrics import metrics
+from gateway.utils.timing import stage_timings
+from nameko import config
+from werkzeug import Response
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+metrics.register_stats("gateway_jwt_cache", jwt_cache.get_stats)
+metrics.register_stats("gateway_identifier_hash_cache", get_identifier_hash_cache_stats)
+metrics.register_stats(
+    "gateway_redis_pool",
+    # the pool's connection options only tell the pools apart
+    lambda: {
+        str(index): {key: value for key, value in stats.items() if key != "options"}
+        for index, stats in enumerate(get_redis_pool_stats())
+    },
+    labels=("pool",),
+)
+metrics.register_stats(
+    "gateway_redis_script", script_registry.get_stats, labels=("script",)
+)
+metrics.register_stats(
+    "gateway_http_request_stage", stage_timings.get_stats, labels=("route", "stage")
+)
+
+
+class MetricsServiceMixin(ServiceMixin):
+    @http("GET", "/metrics", priority="critical", batchable=False)
+    def get_metrics(self, request):
+        # not for the public internet, only scrapers on METRICS_ALLOWED_ADDRS
+        allowed = config.get("METRICS_ALLOWED_ADDRS", "127.0.0.1").split(",")
+
+        if "*" not in allowed and request.remote_addr not in allowed:
+            raise UnauthorizedRequest("Request is unauthorized.")
+
+        return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
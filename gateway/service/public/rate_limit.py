@@ -1,7 +1,7 @@
-import datetime
 import json
 
-from gateway.dependencies.redis.lua_scripts import GET_RATE_LIMIT_QUERY
+from gateway.dependencies.redis.provider import check_rate_limits
+from gateway.dependencies.redis.rate_limit_registry import rate_limited_routes
 from gateway.dependencies.redis.utils import hash_identifier
 from gateway.entrypoints import http
 from gateway.service.base import ServiceMixin
@@ -11,26 +11,33 @@ from werkzeug import Response
 class RateLimitServiceMixin(ServiceMixin):
     @http("GET", "/v1/rate-limit", rate_limit=60, auth_required=True)
     def rate_limit(self, request):
-        end_timestamp = int(datetime.datetime.utcnow().timestamp() * 1000)
-
-        auth_token = request.auth_token
-
-        result = {}
-
-        endpoints = ["/v1/rate-limit"]
-
-        for endpoint in endpoints:
-            script = self.redis.register_script(GET_RATE_LIMIT_QUERY)
-
-            num_of_existing_scores = script(
-                keys=[f"{hash_identifier(auth_token)}:{endpoint}"], args=[end_timestamp]
-            )
-
-            rate_limit = int(self.redis.get(f"rate-limit:{endpoint}"))
-
-            result[endpoint] = {
-                "limit": rate_limit,
-                "remaining": rate_limit - num_of_existing_scores,
+        auth_token = hash_identifier(request.auth_token)
+
+        endpoints = sorted(rate_limited_routes.items())
+
+        # public rate limits are per api token, private ones per ip address.
+        # cost=0 checks the quota without using any of it
+        quotas = check_rate_limits(
+            [
+                (
+                    auth_token if entrypoint.rate_limit else request.remote_addr,
+                    endpoint,
+                    entrypoint.rate_limit or entrypoint.private_rate_limit,
+                    entrypoint.rate_limit_algorithm,
+                    0,
+                )
+                for endpoint, entrypoint in endpoints
+            ],
+            client=self.redis,
+        )
+
+        result = {
+            endpoint: {
+                "limit": entrypoint.rate_limit or entrypoint.private_rate_limit,
+                "remaining": quota.remaining,
+                "reset": quota.reset,
             }
+            for (endpoint, entrypoint), quota in zip(endpoints, quotas)
+        }
 
         return Response(json.dumps(result), mimetype="application/json")
@@ -0,0 +1,153 @@
+import zlib
+
+from nameko import config
+
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+GZIP = "gzip"
+BROTLI = "br"
+ZSTD = "zstd"
+
+# mimetypes worth compressing, anything else (images, archives, ...) is
+# usually compressed already
+COMPRESSIBLE_MIMETYPES = frozenset(
+    ["application/json", "application/javascript", "image/svg+xml"]
+)
+
+
+def gzip_compress(data, level):
+    # wbits 31 writes a gzip header, without gzip.compress's mtime
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    return compressor.compress(data) + compressor.flush()
+
+
+def brotli_compress(data, level):
+    return brotli.compress(data, quality=level)
+
+
+def zstd_compress(data, level):
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def gzip_compressor(level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    return compressor.compress, compressor.flush
+
+
+def brotli_compressor(level):
+    compressor = brotli.Compressor(quality=level)
+
+    return compressor.process, compressor.finish
+
+
+def zstd_compressor(level):
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    return compressor.compress, compressor.flush
+
+
+STREAM_COMPRESSORS = {
+    GZIP: gzip_compressor,
+    BROTLI: brotli_compressor,
+    ZSTD: zstd_compressor,
+}
+
+
+def get_available_encoders():
+    """
+        Returns ``{encoding: (compress, default level)}`` for the encodings
+        that can be used in this process. brotli and zstd are only available
+        when the optional brotli and zstandard packages are installed.
+    """
+    encoders = {GZIP: (gzip_compress, 6)}
+
+    if brotli is not None:
+        encoders[BROTLI] = (brotli_compress, 4)
+
+    if zstandard is not None:
+        encoders[ZSTD] = (zstd_compress, 3)
+
+    return encoders
+
+
+def is_compressible(mimetype):
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_MIMETYPES
+
+
+class Compressor:
+    """
+        Picks the encoding for a response from the request's Accept-Encoding
+        and compresses it.
+
+        COMPRESSION_ENCODINGS lists the encodings to use in order of
+        preference (encodings that aren't installed are ignored), and
+        COMPRESSION_LEVELS overrides the level used per encoding.
+    """
+
+    def __init__(self):
+        self.encoders = {}
+
+    def configure(self):
+        available = get_available_encoders()
+        levels = config.get("COMPRESSION_LEVELS") or {}
+
+        self.min_size = int(config.get("COMPRESSION_MIN_SIZE", 1024))
+        self.encoders = {}
+
+        for encoding in config.get("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(","):
+            encoding = encoding.strip()
+
+            if encoding in available:
+                compress, level = available[encoding]
+                self.encoders[encoding] = (compress, int(levels.get(encoding, level)))
+
+        return self
+
+    def negotiate(self, accept_encodings):
+        """
+            Returns the encoding with the highest quality in
+            ``accept_encodings`` (a werkzeug Accept), preferring encodings
+            listed first when they are equal, or None.
+        """
+        best, best_quality = None, 0
+
+        for encoding in self.encoders:
+            quality = accept_encodings[encoding]
+
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+
+        return best
+
+    def compress(self, encoding, data):
+        compress, level = self.encoders[encoding]
+
+        return compress(data, level)
+
+    def compress_stream(self, encoding, chunks):
+        """
+            Compresses an iterable of byte chunks as they are produced, for
+            streamed responses.
+        """
+        _, level = self.encoders[encoding]
+        compress, flush = STREAM_COMPRESSORS[encoding](level)
+
+        for chunk in chunks:
+            data = compress(chunk)
+
+            if data:
+                yield data
+
+        yield flush()
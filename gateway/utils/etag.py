@@ -0,0 +1,43 @@
+import hashlib
+
+from gateway.utils.compression import BROTLI, GZIP, ZSTD
+
+
+# compressed responses get the encoding appended to their ETag
+ENCODING_SUFFIXES = tuple(f"-{encoding}" for encoding in (GZIP, BROTLI, ZSTD))
+
+
+def compute_etag(data):
+    """
+        Returns a strong ETag for a response body (str or bytes).
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def etag_matches(request, etag):
+    """
+        Whether ``etag`` is in the request's If-None-Match, compared weakly as
+        If-None-Match requires, and ignoring any encoding suffix.
+    """
+    if_none_match = request.if_none_match
+
+    if not if_none_match:
+        return False
+
+    return if_none_match.contains_weak(etag) or any(
+        if_none_match.contains_weak(etag + suffix) for suffix in ENCODING_SUFFIXES
+    )
+
+
+def not_modified(response):
+    """
+        Turns ``response`` into a 304, keeping its headers (ETag, Vary, ...).
+    """
+    response.status_code = 304
+    # werkzeug drops the entity headers of 304s when they are sent
+    response.set_data(b"")
+
+    return response
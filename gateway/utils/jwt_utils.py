@@ -1,8 +1,12 @@
+import hashlib
 import logging
+import time
+from collections import OrderedDict
 from functools import wraps
 
 import jwt
 from gateway.exceptions.users import UserNotAuthorised
+from gateway.utils.timing import get_timer
 from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
 from nameko import config
 
@@ -10,6 +14,99 @@ from nameko import config
 logger = logging.getLogger(__name__)
 
 
+class JWTCache:
+    """
+        Bounded LRU cache of verified jwts, keyed by the sha256 digest of the
+        token so raw tokens are never kept in memory.
+
+        Only tokens that passed ``jwt.decode`` are cached (so ``nbf`` has
+        already been checked) and an entry is only served until the token's
+        ``exp``, capped at JWT_CACHE_TTL seconds. The secret and cache settings
+        are read from config once, on first use.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self.secret = None
+
+    def configure(self):
+        self.secret = config.get("JWT_SECRET")
+        self.max_size = int(config.get("JWT_CACHE_SIZE", 1024))
+        self.ttl = float(config.get("JWT_CACHE_TTL", 300))
+
+    def clear(self):
+        self.entries.clear()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self.secret = None
+
+    def decode(self, token):
+        if self.secret is None:
+            self.configure()
+
+        if isinstance(token, str):
+            token = token.encode("utf-8")
+
+        key = hashlib.sha256(token).digest()
+        now = time.time()
+
+        entry = self.entries.get(key)
+
+        if entry is not None:
+            data, expires_at = entry
+
+            if now < expires_at:
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return data
+
+            del self.entries[key]
+            self.stats["evictions"] += 1
+
+        self.stats["misses"] += 1
+
+        data = jwt.decode(token, self.secret, algorithms=["HS256"])
+
+        expires_at = now + self.ttl
+        if isinstance(data, dict) and isinstance(data.get("exp"), (int, float)):
+            expires_at = min(expires_at, data["exp"])
+
+        if self.max_size > 0:
+            if len(self.entries) >= self.max_size:
+                self.evict(now)
+
+            self.entries[key] = (data, expires_at)
+
+        return data
+
+    def evict(self, now):
+        expired = [
+            key for key, (_, expires_at) in self.entries.items() if now >= expires_at
+        ]
+
+        for key in expired:
+            del self.entries[key]
+
+        # still full, so drop the least recently used
+        while len(self.entries) >= self.max_size:
+            self.entries.popitem(last=False)
+            expired.append(None)
+
+        self.stats["evictions"] += len(expired)
+
+    def get_stats(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+
+        return dict(
+            self.stats,
+            size=len(self.entries),
+            hit_rate=self.stats["hits"] / lookups if lookups else 0.0,
+        )
+
+
+jwt_cache = JWTCache()
+
+
 def jwt_required():
     """
         Entrypoint decorator that requires a valid jwt in the Authorization header.
@@ -33,10 +130,8 @@ def jwt_required():
             if not jwt_header:
                 raise UserNotAuthorised()
             try:
-                jwt_data = jwt.decode(
-                    jwt_header, config.get("JWT_SECRET"), algorithms=["HS256"]
-                )
-                request.jwt_data = jwt_data
+                with get_timer(request).stage("jwt"):
+                    request.jwt_data = jwt_cache.decode(jwt_header)
                 args = list(args)
                 args[1] = request
                 # todo: inject into request here!
@@ -0,0 +1,183 @@
+import math
+from bisect import bisect_left
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+
+    return repr(float(value))
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+        for label_values, value in sorted(self.values.items()):
+            lines.append(
+                f"{self.name}{_format_labels(self.labels, label_values)} "
+                f"{_format_value(value)}"
+            )
+
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *label_values, amount=1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value, *label_values):
+        self.values[label_values] = value
+
+
+class Histogram(Metric):
+    """
+        Fixed bucket histogram. Observations are counted in the first bucket
+        they fit in and the buckets are only made cumulative when rendered.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *label_values):
+        counts = self.values.get(label_values)
+
+        if counts is None:
+            # one count per bucket, +Inf, then the sum
+            counts = self.values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+        for label_values, counts in sorted(self.values.items()):
+            total = 0
+
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                total += count
+                labels = _format_labels(
+                    self.labels, label_values, [("le", _format_value(bound))]
+                )
+                lines.append(f"{self.name}_bucket{labels} {total}")
+
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{labels} {total}")
+
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process metrics, rendered in the Prometheus text format by /metrics.
+
+    Counters, gauges and histograms are updated directly on the request path.
+    Components that already keep their own stats register a ``get_stats``
+    style callable with ``register_stats`` instead, and it is only read when
+    the metrics are rendered. Nested dicts in those stats become labels.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.stats = {}
+
+    def _register(self, metric):
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def register_stats(self, name, get_stats, labels=()):
+        """
+            Exposes every number in ``get_stats()`` as ``{name}_{key}``. The
+            keys of nested dicts are used as the values of ``labels``, outer
+            first.
+        """
+        self.stats[name] = (get_stats, tuple(labels))
+
+    def unregister_stats(self, name):
+        self.stats.pop(name, None)
+
+    def render(self):
+        lines = []
+
+        for _, metric in sorted(self.metrics.items()):
+            lines.extend(metric.render())
+
+        for name, (get_stats, labels) in sorted(self.stats.items()):
+            samples = {}
+            self._flatten(name, get_stats(), labels, (), samples)
+
+            for sample_name, values in sorted(samples.items()):
+                lines.append(f"# TYPE {sample_name} untyped")
+
+                for label_values, value in values:
+                    lines.append(
+                        f"{sample_name}{_format_labels(labels, label_values)} "
+                        f"{_format_value(value)}"
+                    )
+
+        return "\n".join(lines) + "\n"
+
+    def _flatten(self, name, stats, labels, label_values, samples):
+        for key, value in stats.items():
+            if isinstance(value, dict):
+                if len(label_values) < len(labels):
+                    self._flatten(
+                        name, value, labels, label_values + (key,), samples
+                    )
+                else:
+                    self._flatten(
+                        f"{name}_{key}", value, labels, label_values, samples
+                    )
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                # anything else (names, flags, options, ...) isn't a sample
+                samples.setdefault(f"{name}_{key}", []).append((label_values, value))
+
+
+metrics = MetricsRegistry()
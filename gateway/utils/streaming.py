@@ -0,0 +1,34 @@
+import json
+
+
+def stream_json_list(key, items, dump, extra=None, chunk_size=100):
+    """
+        Yields ``{key: [dump(item), ...], **extra}`` as utf-8 encoded JSON,
+        ``chunk_size`` items at a time, so only one chunk of the encoded list
+        is held in memory however long ``items`` is.
+
+        Example:
+            Response(
+                stream_json_list("projects", projects, schema.dump),
+                mimetype="application/json",
+            )
+    """
+    yield f"{{{json.dumps(key)}: [".encode("utf-8")
+
+    chunk = []
+    separator = ""
+
+    for item in items:
+        chunk.append(json.dumps(dump(item)))
+
+        if len(chunk) == chunk_size:
+            yield (separator + ", ".join(chunk)).encode("utf-8")
+            chunk, separator = [], ", "
+
+    if chunk:
+        yield (separator + ", ".join(chunk)).encode("utf-8")
+
+    # the extra keys go after the list, "{...}" without its braces
+    tail = json.dumps(extra)[1:-1] if extra else ""
+
+    yield (f"], {tail}}}" if tail else "]}").encode("utf-8")
@@ -0,0 +1,115 @@
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """
+        Accumulates how long a request spends in each stage (auth, rate_limit,
+        jwt, rpc, ...) using ``time.perf_counter``.
+
+        Example:
+            with request.timer.stage("rpc"):
+                ...
+    """
+
+    __slots__ = ("stages",)
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class NullStageTimer(StageTimer):
+    """
+        StageTimer used while timings are disabled, so timed code doesn't have
+        to check.
+    """
+
+    __slots__ = ()
+
+    _null_stage = _NullStage()
+
+    def stage(self, name):
+        return self._null_stage
+
+    def add(self, name, seconds):
+        pass
+
+
+NULL_TIMER = NullStageTimer()
+
+
+def get_timer(request):
+    timer = getattr(request, "timer", None)
+
+    return timer if isinstance(timer, StageTimer) else NULL_TIMER
+
+
+def get_worker_timer(worker_ctx):
+    # http workers are called with the request as their first argument
+    return get_timer(worker_ctx.args[0]) if worker_ctx.args else NULL_TIMER
+
+
+class StageTimings:
+    """
+        Aggregates stage timings in process, per route and stage.
+    """
+
+    def __init__(self):
+        self.routes = {}
+
+    def record(self, route, stages):
+        route_stages = self.routes.setdefault(route, {})
+
+        for name, seconds in stages.items():
+            stats = route_stages.get(name)
+
+            if stats is None:
+                stats = route_stages[name] = {
+                    "count": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0,
+                }
+
+            stats["count"] += 1
+            stats["total_seconds"] += seconds
+
+            if seconds > stats["max_seconds"]:
+                stats["max_seconds"] = seconds
+
+    def reset(self):
+        self.routes = {}
+
+    def get_stats(self):
+        return {
+            route: {
+                name: dict(
+                    stats, average_seconds=stats["total_seconds"] / stats["count"]
+                )
+                for name, stats in stages.items()
+            }
+            for route, stages in self.routes.items()
+        }
+
+
+stage_timings = StageTimings()
@@ -13,7 +13,9 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/findfeatures/gateway-service",
-    packages=setuptools.find_packages(exclude=["tests", "alembic", "build", "dist"]),
+    packages=setuptools.find_packages(
+        exclude=["tests", "benchmarks", "alembic", "build", "dist"]
+    ),
     zip_safe=True,
     install_requires=[
         "nameko==3.0.0-rc6",
@@ -26,7 +28,6 @@ setuptools.setup(
         "PyJWT==1.7.1",
         "redis==3.3.11",
         "walrus==0.8.0",
-        "passlib==1.7.2",
         "stripe==2.41.1",
         "socketio==0.2.1"
     ],
@@ -42,6 +43,8 @@ setuptools.setup(
             "pytest-cov==2.7.1",
             "pytest-pgsql==1.1.1",
             "pdbpp==0.10.2",
-        ]
+            "fakeredis[lua]==1.1.0",
+        ],
+        "compression": ["brotli==1.0.7", "zstandard==0.13.0"],
     },
 )
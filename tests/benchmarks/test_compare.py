@@ -0,0 +1,33 @@
+from benchmarks.compare import compare
+
+
+def report(throughput, p50):
+    return {
+        "meta": {},
+        "routes": {
+            "GET /health-check": {
+                "throughput_rps": throughput,
+                "latency_ms": {"p50": p50, "p95": p50, "p99": None},
+            }
+        },
+    }
+
+
+def test_compare():
+    comparison = compare(report(100, 10), report(150, 5))
+
+    assert comparison == {
+        "GET /health-check": {
+            "throughput_rps": (100, 150, 50.0),
+            "p50": (10, 5, -50.0),
+            "p95": (10, 5, -50.0),
+            "p99": (None, None, None),
+        }
+    }
+
+
+def test_compare_only_includes_routes_in_both():
+    after = report(150, 5)
+    after["routes"]["GET /v1/projects"] = after["routes"]["GET /health-check"]
+
+    assert list(compare(report(100, 10), after)) == ["GET /health-check"]
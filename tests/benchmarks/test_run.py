@@ -0,0 +1,23 @@
+from collections import Counter
+
+from benchmarks.run import percentile, summarise
+
+
+def test_percentile():
+    values = list(range(1, 101))
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) is None
+
+
+def test_summarise():
+    result = summarise([0.001, 0.002, 0.003], Counter({200: 2, 429: 1}), 1, 0.5)
+
+    assert result["requests"] == 4
+    assert result["errors"] == 1
+    assert result["status_codes"] == {"200": 2, "429": 1}
+    assert result["throughput_rps"] == 6
+    assert result["latency_ms"]["p50"] == 2
+    assert result["latency_ms"]["max"] == 3
@@ -0,0 +1,25 @@
+import pytest
+from benchmarks.serializers import get_cases, run_case
+from gateway.schemas import users
+
+
+def test_run_case():
+    for _, schema_cls, compiled, method, data in get_cases(2):
+        timings = run_case(schema_cls, compiled, method, data, number=1)
+
+        assert set(timings) == {
+            "marshmallow_per_call",
+            "marshmallow_shared",
+            "compiled",
+        }
+
+
+def test_run_case_with_different_output():
+    with pytest.raises(AssertionError):
+        run_case(
+            users.AuthUserRequest,
+            users.user_auth_response,
+            "dumps",
+            {"JWT": "token"},
+            number=1,
+        )
@@ -0,0 +1,11 @@
+from benchmarks.stubs import StubAccounts
+
+
+def test_get_verified_projects():
+    accounts = StubAccounts(latency=0, projects=5)
+
+    assert len(accounts.get_verified_projects(1)) == 5
+    assert accounts.get_verified_projects(1, after=1, limit=2, fields=("id",)) == [
+        {"id": 2},
+        {"id": 3},
+    ]
@@ -5,6 +5,7 @@ import mock
 import nameko
 import pytest
 import yaml
+from gateway.utils.jwt_utils import jwt_cache
 from nameko.cli.main import setup_yaml_parser
 from nameko.testing.services import replace_dependencies
 
@@ -55,6 +56,8 @@ def create_service(container_factory):
 
 @pytest.fixture
 def mock_jwt_token(config):
+    jwt_cache.clear()
     with mock.patch("gateway.utils.jwt_utils.jwt.decode") as jwt:
         with mock.patch("gateway.utils.jwt_utils.get_jwt_header", return_value="test"):
             yield jwt
+    jwt_cache.clear()
@@ -0,0 +1,78 @@
+import pytest
+from gateway.dependencies.admission import (
+    CRITICAL,
+    HIGH,
+    LOW,
+    NORMAL,
+    AdmissionController,
+)
+from gateway.exceptions.base import ServiceOverloaded
+from nameko import config as nameko_config
+
+
+@pytest.fixture
+def admission(config):
+    admission = AdmissionController()
+
+    with nameko_config.patch(
+        {"max_workers": 10, "ADMISSION_MAX_IN_FLIGHT": 20, "ADMISSION_RETRY_AFTER": 2}
+    ):
+        admission.setup()
+
+    return admission
+
+
+def fill(admission, count):
+    for _ in range(count):
+        admission.admit(CRITICAL)
+
+
+@pytest.mark.parametrize(
+    "priority, in_flight", [(LOW, 15), (NORMAL, 18), (HIGH, 20)]
+)
+def test_priority_limits(admission, priority, in_flight):
+    fill(admission, in_flight - 1)
+    admission.admit(priority)
+
+    with pytest.raises(ServiceOverloaded) as exc:
+        admission.admit(priority)
+
+    assert exc.value.retry_after == 2
+    assert admission.stats["shed"][priority] == 1
+
+
+def test_critical_is_never_shed(admission):
+    fill(admission, 100)
+
+    assert admission.in_flight == 100
+
+
+def test_release(admission):
+    fill(admission, 15)
+    admission.release()
+
+    admission.admit(LOW)
+
+
+def test_queue_wait_sheds_low_priorities_while_queueing(admission):
+    for _ in range(20):
+        admission.record_queue_wait(5)
+
+    # nothing is queueing for a worker
+    admission.admit(NORMAL)
+
+    fill(admission, 9)
+
+    with pytest.raises(ServiceOverloaded):
+        admission.admit(NORMAL)
+
+    admission.admit(HIGH)
+
+
+def test_default_max_in_flight(config):
+    admission = AdmissionController()
+
+    with nameko_config.patch({"max_workers": 10, "ADMISSION_MAX_IN_FLIGHT": None}):
+        admission.setup()
+
+    assert admission.max_in_flight == 20
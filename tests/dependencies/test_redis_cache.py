@@ -0,0 +1,203 @@
+import uuid
+
+import eventlet
+import pytest
+from gateway.dependencies.redis.cache import ResponseCache
+from gateway.dependencies.redis.utils import get_redis_connection
+from gateway.utils.etag import compute_etag
+from mock import Mock, patch
+from nameko import config as nameko_config
+from redis.exceptions import ConnectionError
+
+
+@pytest.fixture
+def cache(config):
+    cache = ResponseCache(f"test-{uuid.uuid4()}")
+    cache.container = Mock()
+    cache.container.spawn_managed_thread.side_effect = eventlet.spawn
+
+    cache.setup()
+    cache.start()
+
+    yield cache
+
+    for key in cache.client.keys(cache.redis_key("*")):
+        cache.client.delete(key)
+
+
+def test_miss_calls_loader_once(cache):
+    loader = Mock(return_value="value")
+
+    assert cache.get("key", loader) == "value"
+    assert cache.get("key", loader) == "value"
+
+    assert loader.call_count == 1
+    assert cache.stats["misses"] == 1
+    assert cache.stats["l1_hits"] == 1
+
+
+def test_l2_is_shared(cache):
+    cache.get("key", Mock(return_value="value"))
+
+    other = ResponseCache(cache.name)
+    other.setup()
+    other.start()
+
+    loader = Mock()
+    assert other.get("key", loader) == "value"
+
+    assert not loader.called
+    assert other.stats["l2_hits"] == 1
+    assert "key" in other.entries
+
+
+def test_setup_reads_config(config):
+    cache = ResponseCache("projects")
+
+    with nameko_config.patch(
+        {
+            "PROJECTS_CACHE_TTL": 1,
+            "PROJECTS_CACHE_STALE_TTL": 2,
+            "PROJECTS_CACHE_L1_SIZE": 3,
+        }
+    ):
+        cache.setup()
+
+    assert (cache.ttl, cache.stale_ttl, cache.l1_size) == (1, 2, 3)
+
+
+def test_stale_entry_is_served_and_refreshed(cache):
+    cache.get("key", Mock(return_value="old"))
+
+    stored_at = cache.entries["key"].stored_at
+    loader = Mock(return_value="new")
+
+    with patch(
+        "gateway.dependencies.redis.cache.time.time",
+        return_value=stored_at + cache.ttl,
+    ):
+        assert cache.get("key", loader) == "old"
+
+    eventlet.sleep(0.1)
+
+    assert loader.call_count == 1
+    assert cache.stats["stale_hits"] == 1
+    assert cache.stats["refreshes"] == 1
+    assert cache.get("key", loader) == "new"
+
+
+def test_concurrent_stale_hits_refresh_once(cache):
+    cache.get("key", Mock(return_value="old"))
+
+    stored_at = cache.entries["key"].stored_at
+    loader = Mock(return_value="new")
+
+    with patch(
+        "gateway.dependencies.redis.cache.time.time",
+        return_value=stored_at + cache.ttl,
+    ):
+        # no refresh has run yet when the second hit happens
+        assert cache.get("key", loader) == "old"
+        assert cache.get("key", loader) == "old"
+
+    eventlet.sleep(0.1)
+
+    assert cache.stats["stale_hits"] == 2
+    assert cache.container.spawn_managed_thread.call_count == 1
+    assert loader.call_count == 1
+    assert cache.loading == {}
+
+
+def test_failed_refresh_keeps_stale_entry(cache):
+    cache.get("key", Mock(return_value="old"))
+
+    stored_at = cache.entries["key"].stored_at
+
+    with patch(
+        "gateway.dependencies.redis.cache.time.time",
+        return_value=stored_at + cache.ttl,
+    ):
+        cache.get("key", Mock(side_effect=Exception("boom")))
+        eventlet.sleep(0.1)
+
+        assert cache.get("key", Mock()) == "old"
+
+    assert cache.stats["refresh_errors"] == 1
+
+
+def test_expired_entry_is_loaded(cache):
+    cache.get("key", Mock(return_value="old"))
+
+    stored_at = cache.entries["key"].stored_at
+
+    with patch(
+        "gateway.dependencies.redis.cache.time.time",
+        return_value=stored_at + cache.ttl + cache.stale_ttl,
+    ):
+        assert cache.get("key", Mock(return_value="new")) == "new"
+
+    assert cache.stats["misses"] == 2
+
+
+def test_invalidate(cache):
+    cache.get("key", Mock(return_value="old"))
+
+    cache.invalidate("key")
+
+    assert cache.client.get(cache.redis_key("key")) is None
+    assert cache.get("key", Mock(return_value="new")) == "new"
+
+
+def test_invalidated_load_is_not_stored(cache):
+    def loader():
+        cache.invalidate("key")
+        return "old"
+
+    assert cache.get("key", loader) == "old"
+
+    assert "key" not in cache.entries
+    assert cache.client.get(cache.redis_key("key")) is None
+
+
+def test_l1_is_bounded(cache):
+    cache.l1_size = 2
+
+    for key in ("a", "b", "c"):
+        cache.get(key, Mock(return_value=key))
+
+    assert list(cache.entries) == ["b", "c"]
+
+
+def test_redis_errors_are_misses(cache):
+    with patch("redis.client.Redis.execute_command", side_effect=ConnectionError):
+        assert cache.get("key", Mock(return_value="value")) == "value"
+        cache.invalidate("key")
+
+    assert get_redis_connection().get(cache.redis_key("key")) is None
+
+
+def test_get_etag(cache):
+    assert cache.get_etag("key") is None
+
+    cache.get("key", Mock(return_value="value"))
+
+    assert cache.get_etag("key") == compute_etag("value")
+
+
+def test_get_etag_from_l2(cache):
+    cache.get("key", Mock(return_value="value"))
+
+    other = ResponseCache(cache.name)
+    other.setup()
+    other.start()
+
+    assert other.get_etag("key") == compute_etag("value")
+
+
+def test_get_etag_of_stale_value(cache):
+    cache.get("key", Mock(return_value="value"))
+
+    with patch("gateway.dependencies.redis.cache.time.time") as time:
+        time.return_value = cache.entries["key"].stored_at + cache.ttl
+
+        assert cache.get_etag("key") is None
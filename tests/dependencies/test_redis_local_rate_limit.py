@@ -0,0 +1,163 @@
+import uuid
+
+import eventlet
+import pytest
+from gateway.dependencies.redis.local_rate_limit import LocalRateLimiter
+from gateway.dependencies.redis.provider import FIXED_WINDOW, GCRA, rate_limit_key
+from gateway.dependencies.redis.utils import get_redis_connection
+from gateway.exceptions.base import RateLimitExceeded
+from mock import Mock
+from nameko import config as nameko_config
+
+
+@pytest.fixture
+def identifier(config):
+    identifier = f"test-{uuid.uuid4()}"
+    yield identifier
+
+    get_redis_connection().delete(rate_limit_key(identifier, "/test"))
+
+
+@pytest.fixture
+def limiter(config):
+    limiter = LocalRateLimiter()
+    limiter.container = Mock()
+    limiter.container.spawn_managed_thread.side_effect = eventlet.spawn
+
+    with nameko_config.patch({"RATE_LIMIT_LOCAL_MAX_AGE": 60}):
+        limiter.setup()
+
+    yield limiter
+
+    limiter.kill()
+
+
+def redis_count(identifier):
+    return get_redis_connection().zcard(rate_limit_key(identifier, "/test"))
+
+
+def test_first_request_is_checked_in_redis(limiter, identifier):
+    result = limiter.check(identifier, "/test", 10, 0.5, sensitive=False)
+
+    assert result.remaining == 9
+    assert limiter.stats["sync"] == 1
+    assert redis_count(identifier) == 1
+
+
+def test_requests_below_ratio_are_admitted_locally(limiter, identifier):
+    results = [
+        limiter.check(identifier, "/test", 10, 0.5, sensitive=False) for _ in range(7)
+    ]
+
+    assert [result.remaining for result in results] == [9, 8, 7, 6, 5, 4, 3]
+    # the first request and every request after half the limit is used
+    assert limiter.stats["sync"] == 3
+    assert limiter.stats["local"] == 4
+    assert redis_count(identifier) == 3
+
+
+def test_reconcile_sends_pending_counts(limiter, identifier):
+    for _ in range(5):
+        limiter.check(identifier, "/test", 10, 0.5, sensitive=False)
+
+    limiter.reconcile()
+
+    assert redis_count(identifier) == 5
+    assert limiter.stats["reconciliations"] == 1
+    assert limiter.stats["reconciled"] == 4
+
+    state = limiter.states[rate_limit_key(identifier, "/test")]
+    assert state.pending == 0
+    assert state.remaining == 5
+
+
+def test_reconcile_counts_over_admitted_requests(limiter, identifier):
+    for _ in range(5):
+        limiter.check(identifier, "/test", 10, 0.5, sensitive=False)
+
+    # another node uses up the rest of the quota in the meantime
+    client = get_redis_connection()
+    for index in range(9):
+        client.zadd(rate_limit_key(identifier, "/test"), {f"other:{index}": 1e15})
+
+    limiter.reconcile()
+
+    assert limiter.stats["over_admitted"] == 4
+
+    with pytest.raises(RateLimitExceeded):
+        limiter.check(identifier, "/test", 10, 0.5, sensitive=False)
+
+
+def test_reconcile_records_over_limit_requests(limiter, identifier):
+    for _ in range(5):
+        limiter.check(identifier, "/test", 10, 0.5, sensitive=False)
+
+    client = get_redis_connection()
+    for index in range(7):
+        client.zadd(rate_limit_key(identifier, "/test"), {f"other:{index}": 1e15})
+
+    limiter.reconcile()
+
+    # the 4 pending requests don't fit, but are still recorded up to the limit
+    assert limiter.stats["over_admitted"] == 4
+    assert redis_count(identifier) == 10
+
+
+def test_reconcile_records_over_limit_requests_in_counters(limiter, identifier):
+    for _ in range(5):
+        limiter.check(
+            identifier, "/test", 10, 0.5, sensitive=False, algorithm=FIXED_WINDOW
+        )
+
+    key = rate_limit_key(identifier, "/test", FIXED_WINDOW)
+    client = get_redis_connection()
+    client.incrby(key, 7)
+
+    limiter.reconcile()
+
+    assert limiter.stats["over_admitted"] == 4
+    assert int(client.get(key)) == 12
+
+    client.delete(key)
+
+
+def test_local_state_expires(limiter, identifier):
+    limiter.max_age = 0
+
+    for _ in range(3):
+        limiter.check(identifier, "/test", 10, 0.5, sensitive=False)
+
+    assert limiter.stats["local"] == 0
+    assert redis_count(identifier) == 3
+
+
+def test_max_keys(limiter, identifier):
+    limiter.max_keys = 0
+
+    limiter.check(identifier, "/test", 10, 0.5, sensitive=False)
+
+    assert limiter.states == {}
+
+
+def test_other_algorithms(limiter, identifier):
+    for _ in range(5):
+        limiter.check(identifier, "/test", 10, 0.5, sensitive=False, algorithm=GCRA)
+
+    limiter.reconcile()
+
+    key = rate_limit_key(identifier, "/test", GCRA)
+    assert limiter.states[key].remaining == 5
+
+    get_redis_connection().delete(key)
+
+
+def test_stop_reconciles_pending_counts(limiter, identifier):
+    limiter.sync_interval = 60
+    limiter.start()
+
+    for _ in range(3):
+        limiter.check(identifier, "/test", 10, 0.5, sensitive=False)
+
+    limiter.stop()
+
+    assert redis_count(identifier) == 3
@@ -0,0 +1,131 @@
+import eventlet
+import pytest
+from gateway.dependencies.redis.monitoring import (
+    MONITORING_STREAM_NAME,
+    MonitoringEmitter,
+    build_monitor_event,
+)
+from gateway.dependencies.redis.utils import get_redis_connection
+from mock import Mock, patch
+from nameko import config as nameko_config
+from redis.exceptions import ConnectionError
+
+
+@pytest.fixture
+def redis_client(config):
+    client = get_redis_connection()
+    client.delete(MONITORING_STREAM_NAME)
+    yield client
+    client.delete(MONITORING_STREAM_NAME)
+
+
+@pytest.fixture
+def create_emitter(redis_client):
+    emitters = []
+
+    def create(**options):
+        emitter = MonitoringEmitter()
+        emitter.container = Mock()
+        emitter.container.spawn_managed_thread.side_effect = eventlet.spawn
+
+        with nameko_config.patch(options):
+            emitter.setup()
+
+        emitters.append(emitter)
+        return emitter
+
+    yield create
+
+    for emitter in emitters:
+        emitter.kill()
+
+
+def test_build_monitor_event():
+    assert build_monitor_event("API_REQUEST", {"url": "/"}) == {
+        "url": "/",
+        "__MONITOR_NAME": "API_REQUEST",
+    }
+
+
+def test_build_monitor_event_rejects_monitor_name():
+    with pytest.raises(ValueError):
+        build_monitor_event("API_REQUEST", {"__MONITOR_NAME": "OTHER"})
+
+
+def test_emitter_rejects_unknown_overflow_policy(create_emitter):
+    with pytest.raises(ValueError):
+        create_emitter(MONITORING_OVERFLOW_POLICY="drop-everything")
+
+
+def test_emitter_flush_sends_batches(create_emitter, redis_client):
+    emitter = create_emitter(MONITORING_BATCH_SIZE=2)
+
+    for index in range(5):
+        emitter.send("API_REQUEST", {"index": index})
+
+    emitter.flush()
+
+    events = redis_client.xrange(MONITORING_STREAM_NAME)
+
+    assert [fields["index"] for _, fields in events] == ["0", "1", "2", "3", "4"]
+    assert emitter.stats["sent"] == 5
+    assert not emitter.queue
+
+
+def test_emitter_drop_oldest(create_emitter):
+    emitter = create_emitter(
+        MONITORING_QUEUE_SIZE=2, MONITORING_OVERFLOW_POLICY="drop-oldest"
+    )
+
+    for index in range(3):
+        emitter.send("API_REQUEST", {"index": index})
+
+    assert [event["index"] for event in emitter.queue] == [1, 2]
+    assert emitter.stats["dropped"] == 1
+
+
+def test_emitter_drop_newest(create_emitter):
+    emitter = create_emitter(
+        MONITORING_QUEUE_SIZE=2, MONITORING_OVERFLOW_POLICY="drop-newest"
+    )
+
+    for index in range(3):
+        emitter.send("API_REQUEST", {"index": index})
+
+    assert [event["index"] for event in emitter.queue] == [0, 1]
+    assert emitter.stats["dropped"] == 1
+
+
+def test_emitter_counts_failed_batches(create_emitter):
+    emitter = create_emitter()
+
+    emitter.send("API_REQUEST", {"index": 0})
+
+    with patch("redis.client.Pipeline.execute", side_effect=ConnectionError):
+        emitter.flush()
+
+    assert emitter.stats["failed"] == 1
+    assert not emitter.queue
+
+
+def test_emitter_flushes_when_batch_is_full(create_emitter, redis_client):
+    emitter = create_emitter(MONITORING_BATCH_SIZE=2, MONITORING_FLUSH_INTERVAL=60)
+    emitter.start()
+
+    emitter.send("API_REQUEST", {"index": 0})
+    emitter.send("API_REQUEST", {"index": 1})
+
+    with eventlet.Timeout(5):
+        while redis_client.xlen(MONITORING_STREAM_NAME) < 2:
+            eventlet.sleep(0.01)
+
+
+def test_emitter_flushes_on_stop(create_emitter, redis_client):
+    emitter = create_emitter(MONITORING_FLUSH_INTERVAL=60)
+    emitter.start()
+
+    emitter.send("API_REQUEST", {"index": 0})
+
+    emitter.stop()
+
+    assert redis_client.xlen(MONITORING_STREAM_NAME) == 1
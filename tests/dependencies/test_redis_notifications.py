@@ -0,0 +1,85 @@
+import uuid
+
+import pytest
+from gateway.dependencies.redis.notifications import (
+    NotificationInbox,
+    next_stream_id,
+    notifications_key,
+)
+from gateway.dependencies.redis.utils import get_redis_connection
+from mock import Mock, call
+from nameko import config as nameko_config
+
+
+@pytest.fixture
+def inbox(config):
+    inbox = NotificationInbox()
+
+    with nameko_config.patch({"NOTIFICATIONS_MAX_PER_USER": 5}):
+        inbox.setup()
+
+    inbox.start()
+
+    user_id = f"test-{uuid.uuid4()}"
+
+    yield inbox, user_id
+
+    get_redis_connection().delete(notifications_key(user_id))
+
+
+def add(inbox, user_id, count):
+    return [
+        inbox.add(user_id, {"type": "info", "message": f"message {index}"})["id"]
+        for index in range(count)
+    ]
+
+
+def test_next_stream_id():
+    assert next_stream_id("1526919030474-55") == "1526919030474-56"
+
+
+def test_add_and_get(inbox):
+    inbox, user_id = inbox
+
+    added = inbox.add(user_id, {"type": "info", "message": "message 0"})
+
+    (notification,) = inbox.get(user_id)
+
+    assert notification == added
+    assert notification["type"] == "info"
+    assert notification["message"] == "message 0"
+    assert "created_datetime_utc" in notification
+    assert inbox.client.ttl(notifications_key(user_id)) > 0
+
+
+def test_get_pages_with_after(inbox):
+    inbox, user_id = inbox
+
+    stream_ids = add(inbox, user_id, 4)
+
+    page = inbox.get(user_id, limit=2)
+    assert [notification["id"] for notification in page] == stream_ids[:2]
+
+    page = inbox.get(user_id, after=page[-1]["id"], limit=2)
+    assert [notification["id"] for notification in page] == stream_ids[2:]
+
+    assert inbox.get(user_id, after=page[-1]["id"], limit=2) == []
+
+
+def test_empty_inbox(inbox):
+    inbox, user_id = inbox
+
+    assert inbox.get(user_id) == []
+
+
+def test_inbox_is_trimmed(inbox):
+    inbox, user_id = inbox
+    inbox.client = Mock()
+    pipe = inbox.client.pipeline.return_value
+    pipe.execute.return_value = ["1-0", True]
+
+    inbox.add(user_id, {"type": "info", "message": "message"})
+
+    (_, _), kwargs = pipe.xadd.call_args
+    assert kwargs == {"maxlen": 5, "approximate": True}
+    assert pipe.expire.call_args == call(notifications_key(user_id), inbox.ttl)
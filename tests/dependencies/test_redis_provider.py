@@ -1,5 +1,19 @@
+import uuid
+
 import pytest
-from gateway.dependencies.redis.provider import Redis
+from gateway.dependencies.redis.provider import (
+    FIXED_WINDOW,
+    GCRA,
+    RATE_LIMIT_ALGORITHMS,
+    SLIDING_LOG,
+    SLIDING_WINDOW_COUNTER,
+    Redis,
+    check_rate_limit,
+    check_rate_limits,
+    rate_limit_key,
+)
+from gateway.dependencies.redis.utils import get_redis_connection
+from gateway.exceptions.base import RateLimitExceeded
 from mock import Mock, call, patch
 
 
@@ -37,3 +51,88 @@ def test_redis_get_dependency(redis_dependency):
     client = redis_dependency.get_dependency(Mock())
 
     assert client is not None
+
+
+@pytest.fixture
+def rate_limit_identifier(config):
+    identifier = f"test-{uuid.uuid4()}"
+    yield identifier
+
+    client = get_redis_connection()
+    for algorithm in RATE_LIMIT_ALGORITHMS:
+        client.delete(rate_limit_key(identifier, "/test", algorithm))
+
+
+@pytest.mark.parametrize("algorithm", sorted(RATE_LIMIT_ALGORITHMS))
+def test_check_rate_limit(rate_limit_identifier, algorithm):
+    results = [
+        check_rate_limit(
+            rate_limit_identifier, "/test", 3, sensitive=False, algorithm=algorithm
+        )
+        for _ in range(3)
+    ]
+
+    assert [result.remaining for result in results] == [2, 1, 0]
+    assert all(result.allowed for result in results)
+    assert all(0 < result.reset <= 60 for result in results)
+
+    with pytest.raises(RateLimitExceeded) as exc:
+        check_rate_limit(
+            rate_limit_identifier, "/test", 3, sensitive=False, algorithm=algorithm
+        )
+
+    assert 0 < exc.value.reset <= 60
+
+
+@pytest.mark.parametrize("algorithm", sorted(RATE_LIMIT_ALGORITHMS))
+def test_check_rate_limit_without_cost_does_not_use_quota(
+    rate_limit_identifier, algorithm
+):
+    for _ in range(2):
+        result = check_rate_limit(
+            rate_limit_identifier,
+            "/test",
+            3,
+            sensitive=False,
+            algorithm=algorithm,
+            cost=0,
+        )
+
+        assert result.allowed
+        assert result.remaining == 3
+
+
+@pytest.mark.parametrize(
+    "algorithm", [FIXED_WINDOW, SLIDING_WINDOW_COUNTER, GCRA], ids=str
+)
+def test_check_rate_limit_uses_constant_memory(rate_limit_identifier, algorithm):
+    for _ in range(10):
+        check_rate_limit(
+            rate_limit_identifier, "/test", 10, sensitive=False, algorithm=algorithm
+        )
+
+    client = get_redis_connection()
+    key = rate_limit_key(rate_limit_identifier, "/test", algorithm)
+
+    assert client.type(key) in ("string", "hash")
+    assert client.pttl(key) > 0
+
+
+def test_check_rate_limits(rate_limit_identifier):
+    check_rate_limit(rate_limit_identifier, "/test", 3, sensitive=False)
+
+    results = check_rate_limits(
+        [
+            (rate_limit_identifier, "/test", 3, SLIDING_LOG, 0),
+            (rate_limit_identifier, "/test", 3, GCRA, 1),
+        ]
+    )
+
+    assert [(result.allowed, result.remaining) for result in results] == [
+        (True, 2),
+        (True, 2),
+    ]
+
+
+def test_check_rate_limits_without_checks():
+    assert check_rate_limits([]) == []
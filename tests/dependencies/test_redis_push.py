@@ -0,0 +1,211 @@
+import eventlet
+import pytest
+from eventlet.queue import Queue
+from gateway.dependencies.redis.push import PUSH_CHANNEL, PushHub, PushServer
+from gateway.dependencies.redis.utils import get_redis_connection
+from jwt.exceptions import InvalidTokenError
+from nameko import config as nameko_config
+from mock import patch
+from nameko.testing.services import dummy, entrypoint_hook
+
+
+class PushService:
+    name = "push"
+
+    push = PushHub()
+
+    @dummy
+    def publish(self, user_id, event, data):
+        self.push.publish(user_id, event, data)
+
+
+class FakeSocket:
+    def __init__(self, send_error=None):
+        self.sent = Queue()
+        self.messages = Queue()
+        self.send_error = send_error
+        self.closed = False
+
+    def wait(self):
+        return self.messages.get()
+
+    def send(self, payload):
+        if self.send_error:
+            raise self.send_error
+        self.sent.put(payload)
+
+    def close(self):
+        self.closed = True
+        self.messages.put(None)
+
+
+@pytest.fixture
+def container(config, container_factory):
+    with nameko_config.patch({"PUSH_MAX_CONNECTIONS_PER_USER": 2}):
+        container = container_factory(PushService)
+        container.start()
+
+    return container
+
+
+@pytest.fixture
+def server(container):
+    return next(
+        extension
+        for extension in container.extensions
+        if isinstance(extension, PushServer)
+    )
+
+
+def wait_for_subscription():
+    client = get_redis_connection()
+
+    with eventlet.Timeout(1):
+        while client.pubsub_numsub(PUSH_CHANNEL)[0][1] < 1:
+            eventlet.sleep(0.01)
+
+
+def connect(server, user_id="1", ws=None):
+    ws = ws or FakeSocket()
+    eventlet.spawn(server._handle_socket, user_id, ws)
+    eventlet.sleep()
+
+    return ws
+
+
+def test_requires_jwt(server, web_session, mock_jwt_token):
+    assert web_session.get("/v1/push").status_code == 401
+
+    mock_jwt_token.side_effect = InvalidTokenError()
+
+    response = web_session.get("/v1/push", params={"token": "token"})
+
+    assert response.status_code == 401
+    assert response.json()["error"] == "USER_NOT_AUTHORISED"
+
+
+def test_accepts_jwt_from_query(server, web_session, mock_jwt_token):
+    mock_jwt_token.return_value = {"user_id": 1}
+
+    response = web_session.get("/v1/push", params={"token": "token"})
+
+    # authenticated, but not a websocket handshake
+    assert response.status_code == 400
+
+
+def test_connections_per_user_are_limited(server, web_session, mock_jwt_token):
+    mock_jwt_token.return_value = {"user_id": 1}
+
+    connect(server)
+    connect(server)
+
+    response = web_session.get("/v1/push", params={"token": "token"})
+
+    assert response.status_code == 503
+    assert server.stats["rejected"] == 1
+
+
+def test_send(server):
+    ws = connect(server)
+    other = connect(server, user_id="2")
+
+    assert server.send(1, "notification", {"id": "1-0"}) == 1
+    assert ws.sent.get(timeout=1) == (
+        '{"type": "event", "event": "notification", "data": {"id": "1-0"}}'
+    )
+    assert other.sent.empty()
+
+
+def test_closed_sockets_are_removed(server):
+    ws = connect(server)
+
+    assert server.get_stats()["connections"] == 1
+
+    ws.close()
+    eventlet.sleep()
+
+    assert server.sockets == {}
+    assert server.get_stats()["connections"] == 0
+    assert server.send("1", "notification", {}) == 0
+
+
+def test_failed_send_closes_socket(server):
+    ws = connect(server, ws=FakeSocket(send_error=OSError()))
+
+    server.send("1", "notification", {})
+    eventlet.sleep(0.01)
+
+    assert ws.closed
+    assert server.stats["dropped"] == 1
+    assert server.sockets == {}
+
+
+def test_publish_reaches_sockets_through_redis(container, server):
+    wait_for_subscription()
+    ws = connect(server)
+
+    with entrypoint_hook(container, "publish") as publish:
+        publish(1, "projects_updated", {})
+
+    assert ws.sent.get(timeout=1) == (
+        '{"type": "event", "event": "projects_updated", "data": {}}'
+    )
+
+
+def test_malformed_messages_are_skipped(container, server):
+    wait_for_subscription()
+    ws = connect(server)
+
+    client = get_redis_connection()
+
+    with patch("gateway.dependencies.redis.push.logger") as logger:
+        client.publish(PUSH_CHANNEL, "not json")
+        client.publish(PUSH_CHANNEL, '{"user_id": "1"}')
+
+        with entrypoint_hook(container, "publish") as publish:
+            publish(1, "projects_updated", {})
+
+        # still listening
+        assert ws.sent.get(timeout=1)
+
+    assert logger.exception.call_count == 2
+
+
+def test_stop_closes_sockets_and_subscription(container, server):
+    wait_for_subscription()
+    ws = connect(server)
+
+    container.stop()
+
+    assert ws.closed
+    assert server.sockets == {}
+    assert server._gt is None
+    assert server._pubsub is None
+
+
+def test_idle_subscription_does_not_time_out(config, container_factory):
+    # fresh pools, so anything pooled would get the short socket timeout
+    with patch.dict(
+        "gateway.dependencies.redis.utils._pools", clear=True
+    ), nameko_config.patch({"REDIS_SOCKET_TIMEOUT": 0.1}):
+        container = container_factory(PushService)
+        container.start()
+
+        server = next(
+            extension
+            for extension in container.extensions
+            if isinstance(extension, PushServer)
+        )
+
+        wait_for_subscription()
+        ws = connect(server)
+
+        with patch("gateway.dependencies.redis.push.logger") as logger:
+            eventlet.sleep(0.5)
+
+            with entrypoint_hook(container, "publish") as publish:
+                publish(1, "projects_updated", {})
+
+            assert ws.sent.get(timeout=1)
+
+        assert not logger.warning.called
@@ -0,0 +1,43 @@
+from gateway.dependencies.redis.rate_limit_registry import (
+    RateLimitRegistry,
+    get_rate_limits,
+    rate_limited_routes,
+)
+from gateway.dependencies.redis.utils import get_redis_connection
+from gateway.entrypoints import http
+from gateway.service import GatewayService  # noqa: F401 - registers the routes
+from mock import patch
+from redis.exceptions import ConnectionError
+
+
+def test_routes_are_registered_without_redis():
+    # every redis command goes through execute_command, however the client
+    # was imported
+    with patch("redis.client.Redis.execute_command") as execute_command:
+
+        class Service:
+            @http("GET", "/test/registry", private_rate_limit=5)
+            def registry(self, request):
+                pass
+
+    assert not execute_command.called
+    assert "/test/registry" in rate_limited_routes
+    assert get_rate_limits()["/test/registry"] == 5
+
+    del rate_limited_routes["/test/registry"]
+
+
+def test_start_publishes_rate_limits(config):
+    client = get_redis_connection()
+    client.delete("rate-limit:/v1/user/auth")
+
+    RateLimitRegistry().start()
+
+    assert client.get("rate-limit:/v1/user/auth") == str(
+        get_rate_limits()["/v1/user/auth"]
+    )
+
+
+def test_start_ignores_redis_errors(config):
+    with patch("redis.client.Redis.execute_command", side_effect=ConnectionError):
+        RateLimitRegistry().start()
@@ -0,0 +1,109 @@
+import pytest
+from gateway.dependencies.redis import lua_scripts
+from gateway.dependencies.redis.provider import Redis
+from gateway.dependencies.redis.scripts import ScriptRegistry
+from gateway.dependencies.redis.utils import get_redis_connection
+from mock import Mock
+from redis.exceptions import ResponseError
+
+
+@pytest.fixture
+def registry(config):
+    return ScriptRegistry(
+        {"ECHO": "return ARGV[1]", "FAIL": "return redis.error_reply('boom')"}
+    )
+
+
+@pytest.fixture
+def client(config):
+    client = get_redis_connection()
+    client.script_flush()
+    return client
+
+
+def test_registry_from_module_collects_every_script():
+    registry = ScriptRegistry.from_module(lua_scripts)
+
+    assert set(registry.scripts) == {
+        "SLIDING_LOG",
+        "FIXED_WINDOW",
+        "SLIDING_WINDOW_COUNTER",
+        "GCRA",
+    }
+
+
+def test_registry_load(registry, client):
+    registry.load(client)
+
+    assert client.script_exists(*registry.shas.values()) == [True, True]
+
+
+def test_registry_call(registry, client):
+    registry.load(client)
+
+    assert registry.call("ECHO", args=["hello"], client=client) == "hello"
+
+    stats = registry.get_stats()["ECHO"]
+    assert stats["calls"] == 1
+    assert stats["errors"] == 0
+    assert stats["reloads"] == 0
+    assert stats["average_seconds"] > 0
+
+
+def test_registry_call_reloads_missing_script(registry, client):
+    registry.load(client)
+    client.script_flush()
+
+    assert registry.call("ECHO", args=["hello"], client=client) == "hello"
+
+    assert registry.get_stats()["ECHO"]["reloads"] == 1
+    assert client.script_exists(registry.shas["ECHO"]) == [True]
+
+
+def test_registry_call_counts_errors(registry, client):
+    with pytest.raises(ResponseError):
+        registry.call("FAIL", client=client)
+
+    stats = registry.get_stats()["FAIL"]
+    assert stats["calls"] == 1
+    assert stats["errors"] == 1
+
+
+def test_redis_dependency_loads_scripts_on_start(client):
+    dependency = Redis()
+    dependency.container = Mock()
+    dependency.setup()
+    dependency.start()
+
+    shas = dependency.scripts.shas.values()
+
+    assert all(client.script_exists(*shas))
+
+
+def test_registry_call_many(registry, client):
+    registry.load(client)
+
+    results = registry.call_many(
+        [("ECHO", (), ["first"]), ("ECHO", (), ["second"])], client=client
+    )
+
+    assert results == ["first", "second"]
+    assert registry.get_stats()["ECHO"]["calls"] == 2
+
+
+def test_registry_call_many_reloads_missing_scripts(registry, client):
+    results = registry.call_many([("ECHO", (), ["hello"])], client=client)
+
+    assert results == ["hello"]
+    assert registry.get_stats()["ECHO"]["reloads"] == 1
+
+
+def test_registry_call_many_raises_errors(registry, client):
+    registry.load(client)
+
+    with pytest.raises(ResponseError):
+        registry.call_many([("ECHO", (), ["hello"]), ("FAIL", (), ())], client=client)
+
+    stats = registry.get_stats()
+    assert stats["ECHO"]["errors"] == 0
+    assert stats["FAIL"]["errors"] == 1
@@ -0,0 +1,124 @@
+import uuid
+
+import pytest
+from gateway.dependencies.redis.provider import Redis
+from gateway.dependencies.redis.utils import (
+    close_redis_pools,
+    get_identifier_hash_cache_stats,
+    get_redis_connection,
+    get_redis_pool_stats,
+    hash_identifier,
+    purge_legacy_rate_limit_keys,
+)
+from mock import Mock
+from nameko import config as nameko_config
+
+
+@pytest.fixture
+def clean_pools(config):
+    close_redis_pools()
+    yield
+    close_redis_pools()
+
+
+def test_get_redis_connection_shares_pool(clean_pools):
+    first = get_redis_connection()
+    second = get_redis_connection()
+
+    assert first.connection_pool is second.connection_pool
+
+
+def test_get_redis_connection_different_options_use_different_pools(clean_pools):
+    decoded = get_redis_connection()
+    raw = get_redis_connection(decode_responses=False)
+
+    assert decoded.connection_pool is not raw.connection_pool
+
+
+def test_redis_dependency_shares_pool_with_helpers(clean_pools):
+    dependency = Redis()
+    dependency.container = Mock()
+    dependency.setup()
+    dependency.start()
+
+    client = dependency.get_dependency(Mock())
+
+    assert client.connection_pool is get_redis_connection().connection_pool
+
+
+def test_redis_pool_is_bounded_by_config(clean_pools):
+    with nameko_config.patch({"REDIS_MAX_CONNECTIONS": 3}):
+        client = get_redis_connection()
+
+    assert client.connection_pool.max_connections == 3
+
+
+def test_get_redis_pool_stats(clean_pools):
+    client = get_redis_connection()
+    client.ping()
+
+    connection = client.connection_pool.get_connection("PING")
+
+    stats = get_redis_pool_stats()
+
+    assert len(stats) == 1
+    assert stats[0]["options"] == {"decode_responses": True}
+    assert stats[0]["created_connections"] == 1
+    assert stats[0]["idle_connections"] == 0
+    assert stats[0]["in_use_connections"] == 1
+
+    client.connection_pool.release(connection)
+
+    stats = get_redis_pool_stats()
+
+    assert stats[0]["idle_connections"] == 1
+    assert stats[0]["in_use_connections"] == 0
+
+
+def test_hash_identifier_is_deterministic(config):
+    assert hash_identifier("web-app") == hash_identifier("web-app")
+    assert hash_identifier("web-app") != hash_identifier("other-app")
+    assert "web-app" not in hash_identifier("web-app")
+
+
+def test_hash_identifier_is_keyed_by_secret(config):
+    hashed = hash_identifier("web-app")
+
+    with nameko_config.patch({"RATE_LIMIT_HASH_SECRET": "another_secret"}):
+        assert hash_identifier("web-app") != hashed
+
+
+def test_hash_identifier_is_cached(config):
+    hash_identifier("cached-token")
+    hits = get_identifier_hash_cache_stats()["hits"]
+
+    hash_identifier("cached-token")
+
+    assert get_identifier_hash_cache_stats()["hits"] == hits + 1
+
+
+@pytest.fixture
+def rate_limit_keys(clean_pools):
+    # throwaway keys, so no real rate limit key is left with the wrong type
+    salt = uuid.uuid4().hex
+    keys = (
+        f"$pbkdf2-sha256$29000${salt}$hash:/test/purge",
+        f"{hash_identifier(salt)}:/test/purge",
+    )
+
+    yield keys
+
+    get_redis_connection().delete(*keys)
+
+
+def test_purge_legacy_rate_limit_keys(rate_limit_keys):
+    legacy_key, key = rate_limit_keys
+
+    client = get_redis_connection()
+    client.set(legacy_key, 1)
+    client.set(key, 1)
+
+    assert purge_legacy_rate_limit_keys(client, batch_size=1) == 1
+
+    assert not client.exists(legacy_key)
+    assert client.exists(key)
@@ -0,0 +1,140 @@
+import pytest
+from gateway.dependencies.rpc.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+)
+from gateway.exceptions.rpc import CircuitBreakerOpen
+from mock import patch
+
+
+@pytest.fixture
+def clock():
+    with patch("gateway.dependencies.rpc.circuit_breaker.time.monotonic") as clock:
+        clock.return_value = 100
+        yield clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(
+        "accounts",
+        window_size=4,
+        min_calls=4,
+        error_threshold=0.5,
+        slow_call_seconds=1,
+        slow_call_threshold=0.75,
+        reset_timeout=10,
+    )
+
+
+def call(breaker, duration=0, failed=False):
+    generation = breaker.before_call()
+    breaker.record(generation, duration, failed)
+
+
+def test_opens_on_error_threshold(breaker):
+    for failed in (False, True, False):
+        call(breaker, failed=failed)
+
+    assert breaker.state == CLOSED
+
+    call(breaker, failed=True)
+
+    assert breaker.state == OPEN
+    assert breaker.stats["opened"] == 1
+
+
+def test_opens_on_slow_call_threshold(breaker):
+    for duration in (1, 1, 0):
+        call(breaker, duration=duration)
+
+    assert breaker.state == CLOSED
+
+    call(breaker, duration=2)
+
+    assert breaker.state == OPEN
+    assert breaker.stats["slow_calls"] == 3
+
+
+def test_old_calls_leave_the_window(breaker):
+    for failed in (True, False, False, False, True, False, False):
+        call(breaker, failed=failed)
+
+    assert breaker.state == CLOSED
+
+
+def test_rejects_calls_while_open(breaker, clock):
+    breaker._open()
+    clock.return_value = 104
+
+    with pytest.raises(CircuitBreakerOpen) as exc:
+        breaker.before_call()
+
+    assert exc.value.retry_after == 6
+    assert breaker.stats["rejected"] == 1
+
+
+def test_half_open_probe_closes(breaker, clock):
+    breaker._open()
+    clock.return_value = 110
+
+    generation = breaker.before_call()
+
+    assert breaker.state == HALF_OPEN
+
+    # only one probe at a time
+    with pytest.raises(CircuitBreakerOpen):
+        breaker.before_call()
+
+    breaker.record(generation, 0, failed=False)
+
+    assert breaker.state == CLOSED
+    call(breaker)
+
+
+def test_failed_probe_opens_again(breaker, clock):
+    breaker._open()
+    clock.return_value = 110
+
+    call(breaker, failed=True)
+
+    assert breaker.state == OPEN
+    assert breaker.opened_at == 110
+    assert breaker.stats["opened"] == 2
+
+
+def test_released_probe_lets_the_next_one_through(breaker, clock):
+    breaker._open()
+    clock.return_value = 110
+
+    generation = breaker.before_call()
+    # the probe's worker is killed before it records an outcome
+    breaker.release(generation)
+
+    call(breaker)
+
+    assert breaker.state == CLOSED
+
+
+def test_results_from_before_a_state_change_are_ignored(breaker, clock):
+    # started while closed, finishes after the breaker opened
+    late = breaker.before_call()
+    breaker._open()
+    clock.return_value = 110
+
+    probe = breaker.before_call()
+    breaker.record(late, 0, failed=False)
+
+    # the trial call still decides
+    assert breaker.state == HALF_OPEN
+
+    breaker.release(late)
+
+    with pytest.raises(CircuitBreakerOpen):
+        breaker.before_call()
+
+    breaker.record(probe, 0, failed=True)
+
+    assert breaker.state == OPEN
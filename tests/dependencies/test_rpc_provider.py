@@ -0,0 +1,123 @@
+import eventlet
+import pytest
+from gateway.dependencies.rpc.circuit_breaker import CLOSED, OPEN
+from gateway.dependencies.rpc.provider import RpcClient, RpcProxy
+from gateway.exceptions.rpc import CircuitBreakerOpen, RpcTimeout
+from gateway.exceptions.users import UserNotAuthorised
+from gateway.utils.timing import StageTimer
+from mock import Mock, patch
+from nameko import config as nameko_config
+
+
+@pytest.fixture
+def create_provider(config):
+    def create(coalesce=(), **options):
+        provider = RpcProxy("accounts", coalesce=coalesce)
+
+        with patch("nameko.rpc.ServiceRpc.setup"), nameko_config.patch(options):
+            provider.setup()
+
+        return provider
+
+    return create
+
+
+def test_only_opted_in_methods_are_coalesced(create_provider):
+    provider = create_provider(coalesce=("get_verified_projects",))
+    client = RpcClient(Mock(), provider)
+
+    client.get_verified_projects(1)
+    client.create_user({"email": "test"})
+
+    assert client.client.get_verified_projects.call_args[0] == (1,)
+    assert client.client.create_user.called
+    assert provider.single_flight.get_stats() == {
+        "get_verified_projects": {"calls": 1, "coalesced": 0}
+    }
+
+
+def test_method_timeouts(create_provider):
+    provider = create_provider(
+        RPC_TIMEOUT=5, RPC_METHOD_TIMEOUTS={"accounts.get_verified_projects": 2}
+    )
+
+    assert provider.get_timeout("get_verified_projects") == 2
+    assert provider.get_timeout("create_user") == 5
+
+
+def test_call_times_out(create_provider):
+    provider = create_provider(RPC_TIMEOUT=0.01)
+    client = RpcClient(Mock(), provider)
+    client.client.create_user.side_effect = lambda details: eventlet.sleep(1)
+
+    with pytest.raises(RpcTimeout):
+        client.create_user({})
+
+    assert provider.circuit_breaker.stats["failures"] == 1
+
+
+def test_remote_errors_are_not_failures(create_provider):
+    provider = create_provider()
+    client = RpcClient(Mock(), provider)
+    client.client.auth_user.side_effect = UserNotAuthorised()
+
+    with pytest.raises(UserNotAuthorised):
+        client.auth_user("email", "password")
+
+    assert provider.circuit_breaker.stats["failures"] == 0
+
+
+def test_circuit_breaker_fails_fast(create_provider):
+    provider = create_provider(RPC_CIRCUIT_BREAKER_MIN_CALLS=2)
+    client = RpcClient(Mock(), provider)
+    client.client.get_verified_projects.side_effect = ConnectionError()
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            client.get_verified_projects()
+
+    assert provider.circuit_breaker.state == OPEN
+
+    with pytest.raises(CircuitBreakerOpen):
+        client.get_verified_projects()
+
+    assert client.client.get_verified_projects.call_count == 2
+
+
+def test_killed_probe_releases_the_circuit_breaker(create_provider):
+    provider = create_provider()
+    provider.circuit_breaker._open()
+    provider.circuit_breaker.opened_at -= provider.circuit_breaker.reset_timeout
+
+    client = RpcClient(Mock(), provider)
+    client.client.get_verified_projects.side_effect = eventlet.greenlet.GreenletExit()
+
+    with pytest.raises(eventlet.greenlet.GreenletExit):
+        client.get_verified_projects()
+
+    client.client.get_verified_projects.side_effect = None
+    client.get_verified_projects()
+
+    assert provider.circuit_breaker.state == CLOSED
+
+
+def test_get_dependency(create_provider):
+    provider = create_provider()
+    provider.publisher = Mock()
+    provider.reply_listener = Mock()
+
+    client = provider.get_dependency(Mock(context_data={}, args=()))
+
+    assert isinstance(client, RpcClient)
+    assert client.client.service_name == "accounts"
+
+
+def test_calls_are_timed(create_provider):
+    provider = create_provider()
+    timer = StageTimer()
+    client = RpcClient(Mock(), provider, timer)
+
+    client.get_verified_projects(1)
+    client.create_user({})
+
+    assert set(timer.stages) == {"rpc"}
@@ -0,0 +1,104 @@
+import eventlet
+import pytest
+from eventlet.event import Event
+from gateway.dependencies.rpc.single_flight import SingleFlight
+
+
+@pytest.fixture
+def single_flight():
+    return SingleFlight()
+
+
+def test_identical_calls_are_coalesced(single_flight):
+    release = Event()
+    calls = []
+
+    def fn(value):
+        calls.append(value)
+        release.wait()
+        return {"value": value}
+
+    threads = [eventlet.spawn(single_flight.call, "fn", fn, 1) for _ in range(5)]
+    eventlet.sleep(0)
+    release.send()
+
+    assert [thread.wait() for thread in threads] == [{"value": 1}] * 5
+    assert calls == [1]
+    assert single_flight.get_stats() == {"fn": {"calls": 1, "coalesced": 4}}
+    assert single_flight.in_flight == {}
+
+
+def test_different_arguments_are_not_coalesced(single_flight):
+    release = Event()
+
+    def fn(value, other=None):
+        release.wait()
+        return value
+
+    threads = [
+        eventlet.spawn(single_flight.call, "fn", fn, 1),
+        eventlet.spawn(single_flight.call, "fn", fn, 2),
+        eventlet.spawn(single_flight.call, "fn", fn, 1, other=True),
+    ]
+    eventlet.sleep(0)
+    release.send()
+
+    assert [thread.wait() for thread in threads] == [1, 2, 1]
+    assert single_flight.stats["fn"] == {"calls": 3, "coalesced": 0}
+
+
+def test_exceptions_are_fanned_out(single_flight):
+    release = Event()
+
+    def fn():
+        release.wait()
+        raise ValueError("boom")
+
+    threads = [eventlet.spawn(single_flight.call, "fn", fn) for _ in range(3)]
+    eventlet.sleep(0)
+    release.send()
+
+    for thread in threads:
+        with pytest.raises(ValueError):
+            thread.wait()
+
+    assert single_flight.stats["fn"] == {"calls": 1, "coalesced": 2}
+    assert single_flight.in_flight == {}
+
+
+def test_timed_out_leader_releases_waiters(single_flight):
+    release = Event()
+
+    def fn():
+        release.wait()
+        return 1
+
+    def leader():
+        with eventlet.Timeout(0.01):
+            return single_flight.call("fn", fn)
+
+    threads = [eventlet.spawn(leader), eventlet.spawn(single_flight.call, "fn", fn)]
+
+    for thread in threads:
+        with pytest.raises(eventlet.Timeout):
+            thread.wait()
+
+    assert single_flight.in_flight == {}
+
+    release.send()
+
+    # later calls aren't left waiting on the timed out one
+    assert single_flight.call("fn", fn) == 1
+
+
+def test_sequential_calls_are_not_coalesced(single_flight):
+    assert single_flight.call("fn", lambda: 1) == 1
+    assert single_flight.call("fn", lambda: 2) == 2
+
+    assert single_flight.stats["fn"] == {"calls": 2, "coalesced": 0}
+
+
+def test_unhashable_arguments_are_called_directly(single_flight):
+    assert single_flight.call("fn", lambda value: value, {"a": 1}) == {"a": 1}
+
+    assert single_flight.stats["fn"] == {"calls": 1, "coalesced": 0}
@@ -0,0 +1,113 @@
+import inspect
+from types import SimpleNamespace
+
+import pytest
+from gateway.schemas import projects, stripe, users
+from gateway.schemas.compiled import CompiledSchema
+from marshmallow import Schema, ValidationError, fields, post_dump
+
+
+PROJECT = {"id": 1, "name": "project", "created_datetime_utc": "2020-01-01"}
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        {"projects": []},
+        {"projects": [PROJECT, dict(PROJECT, id=2, name="ünïcode \"quoted\"")]},
+        {"projects": [dict(PROJECT, id="3", name=b"bytes", extra=1)]},
+        {"projects": [{"id": None, "name": None}]},
+        {"projects": [SimpleNamespace(**PROJECT)]},
+        {"projects": None},
+        {},
+        SimpleNamespace(projects=[PROJECT]),
+    ],
+)
+def test_dumps_matches_marshmallow(obj):
+    assert projects.get_projects_response.dumps(
+        obj
+    ) == projects.GetProjectsResponse().dumps(obj)
+
+
+@pytest.mark.parametrize(
+    "compiled, data",
+    [
+        (users.auth_user_request, {"email": "a@b.com", "password": "password"}),
+        (
+            stripe.create_stripe_checkout_session_request,
+            {
+                "plan": "plan",
+                "success_url": "https://findfeatures.io/success",
+                "cancel_url": "https://findfeatures.io/cancel",
+                "project_id": 1,
+            },
+        ),
+    ],
+)
+def test_load_matches_marshmallow(compiled, data):
+    assert compiled.load(data) == compiled.schema.load(data)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"email": "a@b.com"},
+        {"email": "a@b.com", "password": 1},
+        {"email": "a@b.com", "password": None},
+        {"email": "a@b.com", "password": "password", "unknown": 1},
+        {"email": "a@b.com", "unknown": 1},
+        ["email"],
+    ],
+)
+def test_load_errors_match_marshmallow(data):
+    with pytest.raises(ValidationError) as compiled_error:
+        users.auth_user_request.load(data)
+
+    with pytest.raises(ValidationError) as error:
+        users.AuthUserRequest().load(data)
+
+    assert compiled_error.value.messages == error.value.messages
+
+
+def test_load_coerces_like_marshmallow():
+    data = {
+        "plan": "plan",
+        "success_url": "success",
+        "cancel_url": "cancel",
+        "project_id": "1",
+    }
+
+    assert stripe.create_stripe_checkout_session_request.load(data) == {
+        "plan": "plan",
+        "success_url": "success",
+        "cancel_url": "cancel",
+        "project_id": 1,
+    }
+
+
+def test_schemas_are_compiled():
+    assert not inspect.ismethod(projects.get_projects_response.dump)
+    assert not inspect.ismethod(users.auth_user_request.load)
+
+
+def test_uncompilable_schema_uses_marshmallow():
+    class EnvelopeSchema(Schema):
+        name = fields.String()
+
+        @post_dump
+        def envelope(self, data, **kwargs):
+            return {"data": data}
+
+    compiled = CompiledSchema(EnvelopeSchema())
+
+    assert compiled.dump == compiled.schema.dump
+    assert compiled.dumps({"name": "name"}) == '{"data": {"name": "name"}}'
+
+
+def test_data_key_and_attribute():
+    class RenamedSchema(Schema):
+        name = fields.String(data_key="displayName", attribute="display_name")
+
+    compiled = CompiledSchema(RenamedSchema())
+
+    assert compiled.dump({"display_name": "name"}) == {"displayName": "name"}
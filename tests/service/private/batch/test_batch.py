@@ -0,0 +1,243 @@
+import pytest
+from gateway.dependencies.redis.rate_limit_registry import rate_limited_routes
+from gateway.dependencies.redis.utils import get_redis_connection, hash_identifier
+from gateway.entrypoints import http
+from gateway.schemas import users as users_schemas
+from gateway.service import GatewayService
+from gateway.service.private.batch import BatchServiceMixin
+from mock import call, patch
+from nameko import config as nameko_config
+from nameko.containers import ServiceContainer
+from nameko.testing.services import replace_dependencies
+
+
+@pytest.fixture(autouse=True)
+def clear_redis(config):
+    keys = (
+        "cache:projects:1",
+        "notifications:1",
+        f"{hash_identifier('web-app')}:/v1/rate-limit",
+        "127.0.0.1:/v1/batch",
+    )
+
+    # other tests use the same api token
+    get_redis_connection().delete(*keys)
+    yield
+    get_redis_connection().delete(*keys)
+
+
+@pytest.fixture
+def accounts(config):
+    container = ServiceContainer(GatewayService)
+    accounts = replace_dependencies(container, "accounts_rpc")
+    container.start()
+
+    return accounts
+
+
+def test_batch(accounts, web_session, mock_jwt_token):
+    mock_jwt_token.return_value = {"user_id": 1}
+
+    accounts.get_verified_projects.return_value = []
+
+    response = web_session.post(
+        "/v1/batch",
+        json={
+            "requests": [
+                {"path": "/v1/projects"},
+                {"path": "/v1/user/notifications?limit=5"},
+                {"path": "/health-check"},
+                {"path": "/v1/rate-limit", "headers": {"Authorization": "web-app"}},
+            ]
+        },
+        headers={"Authorization": "jwt"},
+    )
+
+    assert response.status_code == 200
+
+    projects, notifications, health_check, rate_limit = response.json()["responses"]
+
+    assert projects["status"] == 200
+    assert projects["body"] == {"projects": [], "cursor": None}
+    assert accounts.get_verified_projects.call_args == call(1)
+
+    assert notifications["status"] == 200
+    assert notifications["body"] == {"notifications": [], "after": None}
+
+    assert health_check["status"] == 200
+
+    # sent with its own api token instead of the batch's jwt
+    assert rate_limit["status"] == 200
+    assert rate_limit["headers"]["X-Rate-Limit-Left"] == "59"
+
+    # the jwt is verified once for the whole batch
+    assert mock_jwt_token.call_count == 1
+
+
+def test_batch_sub_request_errors(accounts, web_session):
+    response = web_session.post(
+        "/v1/batch",
+        json={
+            "requests": [
+                {"path": "/v1/projects"},
+                {"path": "/v1/unknown"},
+                {"method": "POST", "path": "/v1/projects"},
+                {"method": "POST", "path": "/v1/user", "body": {"email": "a"}},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+
+    statuses = [
+        (sub_response["status"], sub_response["body"]["error"])
+        for sub_response in response.json()["responses"]
+    ]
+
+    assert statuses == [
+        (401, "USER_NOT_AUTHORISED"),
+        (404, "ROUTE_NOT_FOUND"),
+        (404, "ROUTE_NOT_FOUND"),
+        (400, "VALIDATION_ERROR"),
+    ]
+    assert accounts.create_user.call_count == 0
+
+
+def test_batch_checks_rate_limits(accounts, web_session):
+    response = web_session.post(
+        "/v1/batch",
+        json={"requests": [{"path": "/v1/rate-limit"}, {"path": "/v1/rate-limit"}]},
+        headers={"Authorization": "web-app"},
+    )
+
+    first, second = response.json()["responses"]
+
+    assert first["status"] == 200
+    assert first["headers"]["X-Rate-Limit"] == "60"
+    assert first["headers"]["X-Rate-Limit-Left"] == "59"
+    # checked together, before either handler ran
+    assert first["body"]["/v1/rate-limit"]["remaining"] == 58
+    assert second["headers"]["X-Rate-Limit-Left"] == "58"
+
+
+def test_batch_is_not_batchable(accounts, web_session):
+    response = web_session.post(
+        "/v1/batch",
+        json={"requests": [{"method": "POST", "path": "/v1/batch", "body": {}}]},
+    )
+
+    assert response.json()["responses"][0]["status"] == 404
+
+
+@pytest.mark.parametrize("method", ["PUT", "PATCH", "DELETE"])
+def test_batch_methods_are_limited(accounts, web_session, method):
+    response = web_session.post(
+        "/v1/batch", json={"requests": [{"method": method, "path": "/v1/projects"}]}
+    )
+
+    assert response.status_code == 400
+    assert response.json()["error"] == "VALIDATION_ERROR"
+
+
+@pytest.mark.parametrize("count", [0, 3])
+def test_batch_size_is_limited(config, web_session, count):
+    with nameko_config.patch({"BATCH_MAX_REQUESTS": 2}):
+        container = ServiceContainer(GatewayService)
+        replace_dependencies(container, "accounts_rpc")
+        container.start()
+
+    response = web_session.post(
+        "/v1/batch", json={"requests": [{"path": "/health-check"}] * count}
+    )
+
+    assert response.status_code == 400
+    assert response.json()["error"] == "VALIDATION_ERROR"
+
+
+
+
+@pytest.fixture
+def gated(config, container_factory):
+    routes = dict(rate_limited_routes)
+
+    # declared here, rate limited routes are registered as they're declared
+    class GatedService(BatchServiceMixin):
+        name = "gated"
+
+        @http("GET", "/gated/local", private_rate_limit=1, rate_limit_local_ratio=0.5)
+        def local(self, request):
+            return "ok"
+
+        @http("GET", "/gated/low", priority="low")
+        def low(self, request):
+            return "ok"
+
+        @http(
+            "POST",
+            "/gated/body",
+            schema=users_schemas.auth_user_request,
+            max_body_size=64,
+        )
+        def body(self, request):
+            return "ok"
+
+    container = container_factory(GatedService)
+    container.start()
+
+    yield {entrypoint.url: entrypoint for entrypoint in container.entrypoints}
+
+    rate_limited_routes.clear()
+    rate_limited_routes.update(routes)
+    get_redis_connection().delete("127.0.0.1:/gated/local")
+
+
+def test_batch_checks_local_rate_limits(gated, web_session):
+    limiter = gated["/gated/local"].local_rate_limiter
+
+    response = web_session.post(
+        "/v1/batch",
+        json={"requests": [{"path": "/gated/local"}, {"path": "/gated/local"}]},
+    )
+
+    first, second = response.json()["responses"]
+
+    assert first["status"] == 200
+    assert second["status"] == 429
+    assert second["headers"]["X-Rate-Limit-Left"] == "0"
+    assert limiter.stats["local"] + limiter.stats["sync"] == 2
+
+
+def test_batch_checks_sub_request_bodies(gated, web_session):
+    response = web_session.post(
+        "/v1/batch",
+        json={
+            "requests": [
+                {"method": "POST", "path": "/gated/body", "body": {"email": "a" * 64}}
+            ]
+        },
+    )
+
+    assert response.json()["responses"][0]["status"] == 413
+
+
+def test_batch_sub_requests_share_its_admission(gated, web_session):
+    admission = gated["/gated/low"].admission
+
+    with patch.object(admission, "admit", wraps=admission.admit) as admit:
+        response = web_session.post(
+            "/v1/batch", json={"requests": [{"path": "/gated/low"}] * 3}
+        )
+
+    assert [sub["status"] for sub in response.json()["responses"]] == [200] * 3
+    # only the batch itself takes a slot
+    assert admit.call_count == 1
+    assert admission.in_flight == 0
+
+
+def test_batch_is_rate_limited(accounts, web_session):
+    response = web_session.post(
+        "/v1/batch", json={"requests": [{"path": "/health-check"}]}
+    )
+
+    assert response.headers["X-Rate-Limit"] == "20"
+    assert response.headers["X-Rate-Limit-Left"] == "19"
@@ -1,10 +1,14 @@
 import json
 
+import pytest
+from gateway.dependencies.redis.cache import ResponseCache
+from gateway.dependencies.redis.utils import get_redis_connection
 from gateway.exceptions.users import UserNotAuthorised
 from gateway.service import GatewayService
-from mock import ANY, call
+from mock import ANY, call, patch
+from nameko import config as nameko_config
 from nameko.containers import ServiceContainer
-from nameko.testing.services import replace_dependencies
+from nameko.testing.services import entrypoint_hook, replace_dependencies
 
 
 """
@@ -21,6 +25,12 @@ class GetProjectsResponse(Schema):
 """
 
 
+@pytest.fixture(autouse=True)
+def clear_projects_cache(config):
+    yield
+    get_redis_connection().delete("cache:projects:1")
+
+
 def test_get_projects(config, web_session, mock_jwt_token):
     container = ServiceContainer(GatewayService)
     accounts = replace_dependencies(container, "accounts_rpc")
@@ -45,6 +55,7 @@ def test_get_projects(config, web_session, mock_jwt_token):
 
     response = web_session.get("/v1/projects")
 
+    # the plain first page doesn't need an accounts service that pages
     assert accounts.get_verified_projects.call_args == call(user_id)
 
     assert response.status_code == 200
@@ -60,5 +71,251 @@ def test_get_projects(config, web_session, mock_jwt_token):
                 "name": "test_project_2",
                 "created_datetime_utc": "2019-01-02T00:00:00Z",
             },
+        ],
+        "cursor": None,
+    }
+
+
+def test_get_projects_is_cached(config, web_session, mock_jwt_token):
+    container = ServiceContainer(GatewayService)
+    accounts = replace_dependencies(container, "accounts_rpc")
+    container.start()
+
+    mock_jwt_token.return_value = {"user_id": 1}
+
+    accounts.get_verified_projects.return_value = []
+
+    assert web_session.get("/v1/projects").json() == {"projects": [], "cursor": None}
+    assert web_session.get("/v1/projects").json() == {"projects": [], "cursor": None}
+
+    assert accounts.get_verified_projects.call_count == 1
+
+    with entrypoint_hook(container, "invalidate_projects_cache") as hook:
+        hook({"user_id": 1})
+
+    accounts.get_verified_projects.return_value = [
+        {"id": 1, "name": "test_project", "created_datetime_utc": "2019-01-01"}
+    ]
+
+    response = web_session.get("/v1/projects")
+
+    assert accounts.get_verified_projects.call_count == 2
+    assert len(response.json()["projects"]) == 1
+
+
+def test_get_projects_not_modified(config, web_session, mock_jwt_token):
+    container = ServiceContainer(GatewayService)
+    accounts = replace_dependencies(container, "accounts_rpc")
+    container.start()
+
+    mock_jwt_token.return_value = {"user_id": 1}
+
+    accounts.get_verified_projects.return_value = []
+
+    response = web_session.get("/v1/projects")
+    etag = response.headers["ETag"]
+
+    response = web_session.get("/v1/projects", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+    # answered from the cache, without loading the projects again
+    assert accounts.get_verified_projects.call_count == 1
+
+
+def test_get_projects_etag_is_only_read_when_asked(config, web_session, mock_jwt_token):
+    container = ServiceContainer(GatewayService)
+    accounts = replace_dependencies(container, "accounts_rpc")
+    container.start()
+
+    mock_jwt_token.return_value = {"user_id": 1}
+
+    accounts.get_verified_projects.return_value = []
+
+    with patch.object(ResponseCache, "get_etag", return_value=None) as get_etag:
+        web_session.get("/v1/projects")
+
+        assert get_etag.call_count == 0
+
+        web_session.get("/v1/projects", headers={"If-None-Match": '"other"'})
+
+        assert get_etag.call_count == 1
+
+
+def test_get_projects_not_modified_compressed(config, web_session, mock_jwt_token):
+    container = ServiceContainer(GatewayService)
+    accounts = replace_dependencies(container, "accounts_rpc")
+    container.start()
+
+    mock_jwt_token.return_value = {"user_id": 1}
+
+    accounts.get_verified_projects.return_value = make_projects(50)
+
+    headers = {"Accept-Encoding": "gzip"}
+    response = web_session.get("/v1/projects", headers=headers)
+    etag = response.headers["ETag"]
+
+    assert etag.endswith('-gzip"')
+
+    response = web_session.get(
+        "/v1/projects", headers=dict(headers, **{"If-None-Match": etag})
+    )
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+
+def make_projects(count, start=1):
+    return [
+        {"id": id_, "name": f"project_{id_}", "created_datetime_utc": "2019-01-01"}
+        for id_ in range(start, start + count)
+    ]
+
+
+def test_get_projects_is_not_paginated_by_default(config, web_session, mock_jwt_token):
+    container = ServiceContainer(GatewayService)
+    accounts = replace_dependencies(container, "accounts_rpc")
+    container.start()
+
+    mock_jwt_token.return_value = {"user_id": 1}
+
+    accounts.get_verified_projects.return_value = make_projects(101)
+
+    # until accounts pages, there's no cursor that could be followed
+    for params in [{}, {"limit": 2}]:
+        response = web_session.get("/v1/projects", params=params)
+
+        assert response.json() == {"projects": make_projects(101), "cursor": None}
+
+    assert accounts.get_verified_projects.call_args_list == [call(1)]
+
+
+@pytest.fixture
+def paginated(config):
+    with nameko_config.patch({"PROJECTS_PAGINATION_ENABLED": True}):
+        yield
+
+
+def get_verified_projects(projects):
+    def get_verified_projects(user_id, after=None, limit=None, fields=None):
+        page = [
+            project for project in projects if after is None or project["id"] > after
         ]
+
+        return page[:limit]
+
+    return get_verified_projects
+
+
+def test_get_projects_default_page_cursor(paginated, web_session, mock_jwt_token):
+    container = ServiceContainer(GatewayService)
+    accounts = replace_dependencies(container, "accounts_rpc")
+    container.start()
+
+    mock_jwt_token.return_value = {"user_id": 1}
+
+    accounts.get_verified_projects.side_effect = get_verified_projects(
+        make_projects(150)
+    )
+
+    response = web_session.get("/v1/projects")
+
+    assert accounts.get_verified_projects.call_args == call(
+        1, after=None, limit=101, fields=None
+    )
+    assert response.json() == {"projects": make_projects(100), "cursor": 100}
+
+    response = web_session.get("/v1/projects", params={"cursor": 100})
+
+    assert accounts.get_verified_projects.call_args == call(
+        1, after=100, limit=101, fields=None
+    )
+    assert response.json() == {
+        "projects": make_projects(50, start=101),
+        "cursor": None,
     }
+
+
+def test_get_projects_pages(paginated, web_session, mock_jwt_token):
+    container = ServiceContainer(GatewayService)
+    accounts = replace_dependencies(container, "accounts_rpc")
+    container.start()
+
+    mock_jwt_token.return_value = {"user_id": 1}
+
+    accounts.get_verified_projects.return_value = make_projects(3)
+
+    response = web_session.get("/v1/projects", params={"limit": 2})
+
+    assert accounts.get_verified_projects.call_args == call(
+        1, after=None, limit=3, fields=None
+    )
+    assert response.json() == {"projects": make_projects(2), "cursor": 2}
+
+    accounts.get_verified_projects.return_value = make_projects(1, start=3)
+
+    response = web_session.get("/v1/projects", params={"limit": 2, "cursor": 2})
+
+    assert accounts.get_verified_projects.call_args == call(
+        1, after=2, limit=3, fields=None
+    )
+    assert response.json() == {"projects": make_projects(1, start=3), "cursor": None}
+    # only the default first page is cached
+    assert get_redis_connection().exists("cache:projects:1") == 0
+
+
+def test_get_projects_fields(paginated, web_session, mock_jwt_token):
+    container = ServiceContainer(GatewayService)
+    accounts = replace_dependencies(container, "accounts_rpc")
+    container.start()
+
+    mock_jwt_token.return_value = {"user_id": 1}
+
+    accounts.get_verified_projects.return_value = [{"id": 1, "name": "project_1"}]
+
+    response = web_session.get("/v1/projects", params={"fields": "name"})
+
+    # the ids are still loaded for the cursor
+    assert accounts.get_verified_projects.call_args == call(
+        1, after=None, limit=101, fields=("id", "name")
+    )
+    assert response.json() == {"projects": [{"name": "project_1"}], "cursor": None}
+
+
+@pytest.mark.parametrize(
+    "params", [{"fields": "name,password"}, {"limit": 0}, {"cursor": "abc"}]
+)
+def test_get_projects_invalid_page(config, web_session, mock_jwt_token, params):
+    container = ServiceContainer(GatewayService)
+    accounts = replace_dependencies(container, "accounts_rpc")
+    container.start()
+
+    mock_jwt_token.return_value = {"user_id": 1}
+
+    response = web_session.get("/v1/projects", params=params)
+
+    assert response.status_code == 400
+    assert accounts.get_verified_projects.call_count == 0
+
+
+def test_get_projects_streams_large_pages(paginated, web_session, mock_jwt_token):
+    with nameko_config.patch({"PROJECTS_STREAM_THRESHOLD": 2}):
+        container = ServiceContainer(GatewayService)
+        accounts = replace_dependencies(container, "accounts_rpc")
+        container.start()
+
+        mock_jwt_token.return_value = {"user_id": 1}
+
+        accounts.get_verified_projects.return_value = make_projects(4)
+
+        response = web_session.get(
+            "/v1/projects",
+            params={"limit": 3},
+            headers={"Accept-Encoding": "gzip"},
+        )
+
+    assert response.headers["Transfer-Encoding"] == "chunked"
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.json() == {"projects": make_projects(3), "cursor": 3}
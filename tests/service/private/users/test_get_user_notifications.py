@@ -0,0 +1,93 @@
+import pytest
+from gateway.dependencies.redis.notifications import notifications_key
+from gateway.dependencies.redis.utils import get_redis_connection
+from gateway.service import GatewayService
+from mock import ANY
+from nameko.containers import ServiceContainer
+from nameko.testing.services import entrypoint_hook, replace_dependencies
+
+
+@pytest.fixture(autouse=True)
+def clear_notifications(config):
+    yield
+    get_redis_connection().delete(notifications_key(1))
+
+
+@pytest.fixture
+def container(config):
+    container = ServiceContainer(GatewayService)
+    replace_dependencies(container, "accounts_rpc")
+    container.start()
+
+    return container
+
+
+def add_notifications(container, count):
+    with entrypoint_hook(container, "add_user_notification") as hook:
+        for index in range(count):
+            hook(
+                {
+                    "user_id": 1,
+                    "notification": {"type": "info", "message": f"message {index}"},
+                }
+            )
+
+
+def test_get_user_notifications(container, web_session, mock_jwt_token):
+    mock_jwt_token.return_value = {"user_id": 1}
+
+    add_notifications(container, 3)
+
+    response = web_session.get("/v1/user/notifications?limit=2")
+
+    assert response.status_code == 200
+
+    body = response.json()
+
+    assert body["notifications"] == [
+        {
+            "id": ANY,
+            "type": "info",
+            "message": "message 0",
+            "created_datetime_utc": ANY,
+        },
+        {
+            "id": ANY,
+            "type": "info",
+            "message": "message 1",
+            "created_datetime_utc": ANY,
+        },
+    ]
+    assert body["after"] == body["notifications"][-1]["id"]
+
+    response = web_session.get(f"/v1/user/notifications?after={body['after']}")
+    body = response.json()
+
+    assert [notification["message"] for notification in body["notifications"]] == [
+        "message 2"
+    ]
+
+    response = web_session.get(f"/v1/user/notifications?after={body['after']}")
+
+    assert response.json() == {"notifications": [], "after": body["after"]}
+
+
+def test_get_user_notifications_empty(container, web_session, mock_jwt_token):
+    mock_jwt_token.return_value = {"user_id": 1}
+
+    response = web_session.get("/v1/user/notifications")
+
+    assert response.status_code == 200
+    assert response.json() == {"notifications": [], "after": None}
+
+
+@pytest.mark.parametrize("query", ["after=invalid", "limit=0", "limit=1000"])
+def test_get_user_notifications_invalid_page(
+    container, web_session, mock_jwt_token, query
+):
+    mock_jwt_token.return_value = {"user_id": 1}
+
+    response = web_session.get(f"/v1/user/notifications?{query}")
+
+    assert response.status_code == 400
+    assert response.json()["error"] == "VALIDATION_ERROR"
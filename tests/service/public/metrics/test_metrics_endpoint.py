@@ -0,0 +1,48 @@
+import nameko
+from gateway.service import GatewayService
+from nameko.containers import ServiceContainer
+from nameko.testing.services import replace_dependencies
+
+
+def test_metrics(config, web_session):
+    container = ServiceContainer(GatewayService)
+    redis = replace_dependencies(container, "redis")
+    container.start()
+
+    redis.set.return_value = "1"
+    web_session.get("/health-check")
+
+    response = web_session.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert (
+        'gateway_http_requests_total{method="GET",route="/health-check",status="200"}'
+        in response.text
+    )
+    assert "gateway_http_request_duration_seconds_bucket" in response.text
+    assert "gateway_admission_busy_workers" in response.text
+    assert "gateway_jwt_cache_hits" in response.text
+    assert 'gateway_redis_pool_in_use_connections{pool="0"}' in response.text
+    assert "gateway_redis_pool_options" not in response.text
+
+
+def test_metrics_are_not_batchable(config, web_session):
+    container = ServiceContainer(GatewayService)
+    replace_dependencies(container, "redis")
+    container.start()
+
+    response = web_session.post("/v1/batch", json={"requests": [{"path": "/metrics"}]})
+
+    assert response.json()["responses"][0]["status"] == 404
+
+
+def test_metrics_from_unknown_address(config, web_session):
+    container = ServiceContainer(GatewayService)
+    replace_dependencies(container, "redis")
+    container.start()
+
+    with nameko.config.patch({"METRICS_ALLOWED_ADDRS": "10.0.0.1"}):
+        response = web_session.get("/metrics")
+
+    assert response.status_code == 401
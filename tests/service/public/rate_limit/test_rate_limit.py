@@ -0,0 +1,72 @@
+from gateway.dependencies.redis.utils import get_redis_connection, hash_identifier
+from gateway.service import GatewayService
+from nameko.containers import ServiceContainer
+from nameko.testing.services import replace_dependencies
+
+
+def clear_rate_limit():
+    get_redis_connection().delete(f"{hash_identifier('web-app')}:/v1/rate-limit")
+
+
+def test_rate_limit(config, web_session):
+    clear_rate_limit()
+
+    container = ServiceContainer(GatewayService)
+    replace_dependencies(container, "accounts_rpc")
+    container.start()
+
+    response = web_session.get("/v1/rate-limit", headers={"Authorization": "web-app"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Rate-Limit"] == "60"
+    assert response.headers["X-Rate-Limit-Left"] == "59"
+    assert 0 < int(response.headers["X-Rate-Limit-Reset"]) <= 60
+
+    result = response.json()
+
+    assert result["/v1/rate-limit"]["limit"] == 60
+    assert result["/v1/rate-limit"]["remaining"] == 59
+
+    # every rate limited route is reported
+    assert result["/v1/user/resend-email"]["limit"] == 15
+    assert set(result) == {
+        "/v1/rate-limit",
+        "/v1/user/auth",
+        "/v1/user/<email>",
+        "/v1/user",
+        "/v1/user/token",
+        "/v1/user/resend-email",
+        "/v1/batch",
+    }
+
+
+def test_rate_limit_exceeded(config, web_session):
+    clear_rate_limit()
+
+    container = ServiceContainer(GatewayService)
+    replace_dependencies(container, "accounts_rpc")
+    container.start()
+
+    for _ in range(60):
+        web_session.get("/v1/rate-limit", headers={"Authorization": "web-app"})
+
+    response = web_session.get("/v1/rate-limit", headers={"Authorization": "web-app"})
+
+    assert response.status_code == 429
+    assert response.json() == {"error": "RATE_LIMIT_EXCEEDED", "message": ""}
+    assert response.headers["X-Rate-Limit-Left"] == "0"
+    assert 0 < int(response.headers["Retry-After"]) <= 60
+
+
+def test_rate_limit_missing_authorization(config, web_session):
+    container = ServiceContainer(GatewayService)
+    replace_dependencies(container, "accounts_rpc")
+    container.start()
+
+    response = web_session.get("/v1/rate-limit")
+
+    assert response.status_code == 400
+    assert response.json() == {
+        "error": "AUTHORIZATION_HEADER_MISSING",
+        "message": "Authorization header is required.",
+    }
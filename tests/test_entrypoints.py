@@ -0,0 +1,363 @@
+import json
+
+import pytest
+from gateway.dependencies.redis.monitoring import MonitoringEmitter
+from gateway.entrypoints import HttpEntrypoint, http
+from gateway.exceptions.rpc import CircuitBreakerOpen
+from gateway.schemas import users as users_schemas
+from gateway.utils.timing import stage_timings
+from mock import patch
+from nameko import config as nameko_config
+from werkzeug import Response
+
+
+def test_unknown_rate_limit_algorithm(config):
+    with pytest.raises(ValueError):
+        HttpEntrypoint(
+            "GET", "/test", private_rate_limit=10, rate_limit_algorithm="unknown"
+        )
+
+
+def test_public_rate_limit_requires_auth(config):
+    with pytest.raises(ValueError):
+        HttpEntrypoint("GET", "/test", rate_limit=10)
+
+
+def test_public_and_private_rate_limit(config):
+    with pytest.raises(ValueError):
+        HttpEntrypoint(
+            "GET", "/test", rate_limit=10, private_rate_limit=10, auth_required=True
+        )
+
+
+@pytest.mark.parametrize("ratio", [0, 1.5])
+def test_invalid_rate_limit_local_ratio(config, ratio):
+    with pytest.raises(ValueError):
+        HttpEntrypoint(
+            "GET", "/test", private_rate_limit=10, rate_limit_local_ratio=ratio
+        )
+
+
+class CorsService:
+    name = "cors"
+
+    @http("GET", "/cors")
+    def wildcard(self, request):
+        return "ok"
+
+    @http("GET", "/cors/origins", origin=["https://a.io", "https://b.io"], max_age=60)
+    def origins(self, request):
+        return "ok"
+
+
+def test_preflight_does_not_spawn_worker(config, container_factory, web_session):
+    container = container_factory(CorsService)
+    container.start()
+
+    with patch.object(container, "spawn_worker") as spawn_worker:
+        response = web_session.options(
+            "/cors", headers={"Access-Control-Request-Headers": "Authorization"}
+        )
+
+    assert not spawn_worker.called
+    assert response.status_code == 200
+    assert response.headers["Access-Control-Allow-Origin"] == "*"
+    assert response.headers["Access-Control-Allow-Headers"] == "Authorization"
+    assert response.headers["Access-Control-Allow-Credentials"] == "true"
+    assert response.headers["Access-Control-Max-Age"] == "600"
+
+
+def test_cors_headers_on_response(config, container_factory, web_session):
+    container = container_factory(CorsService)
+    container.start()
+
+    response = web_session.get("/cors")
+
+    assert response.text == "ok"
+    assert response.headers["Access-Control-Allow-Origin"] == "*"
+    assert "Access-Control-Allow-Headers" not in response.headers
+    assert "Access-Control-Max-Age" not in response.headers
+
+
+@pytest.mark.parametrize(
+    "origin, allowed",
+    [("https://a.io", "https://a.io"), ("https://c.io", None), (None, None)],
+)
+def test_cors_origin_matching(config, container_factory, web_session, origin, allowed):
+    container = container_factory(CorsService)
+    container.start()
+
+    headers = {"Origin": origin} if origin else {}
+
+    for method in ("options", "get"):
+        response = getattr(web_session, method)("/cors/origins", headers=headers)
+
+        assert response.headers.get("Access-Control-Allow-Origin") == allowed
+        assert response.headers["Vary"] == "Origin"
+
+    assert response.headers.get("Access-Control-Max-Age") is None
+    preflight = web_session.options("/cors/origins", headers=headers)
+    assert preflight.headers["Access-Control-Max-Age"] == "60"
+
+
+class UnavailableService:
+    name = "unavailable"
+
+    @http("GET", "/unavailable")
+    def unavailable(self, request):
+        raise CircuitBreakerOpen("accounts is unavailable", retry_after=4.2)
+
+
+def test_circuit_breaker_open_is_mapped(config, container_factory, web_session):
+    container = container_factory(UnavailableService)
+    container.start()
+
+    response = web_session.get("/unavailable")
+
+    assert response.status_code == 503
+    assert response.json()["error"] == "SERVICE_UNAVAILABLE"
+    assert response.headers["Retry-After"] == "5"
+
+
+class OverloadedService:
+    name = "overloaded"
+
+    @http("GET", "/overloaded")
+    def overloaded(self, request):
+        return "ok"
+
+    @http("GET", "/overloaded/critical", priority="critical")
+    def critical(self, request):
+        return "ok"
+
+
+def test_unknown_priority(config):
+    with pytest.raises(ValueError):
+        HttpEntrypoint("GET", "/test", priority="unknown")
+
+
+def test_overloaded_requests_are_shed(config, container_factory, web_session):
+    container = container_factory(OverloadedService)
+    container.start()
+
+    admission = next(iter(container.entrypoints)).admission
+    admission.in_flight = admission.max_in_flight
+
+    with patch.object(container, "spawn_worker") as spawn_worker:
+        response = web_session.get("/overloaded")
+
+    assert not spawn_worker.called
+    assert response.status_code == 503
+    assert response.json()["error"] == "SERVICE_OVERLOADED"
+    assert response.headers["Retry-After"] == "1"
+    assert response.headers["Access-Control-Allow-Origin"] == "*"
+
+    response = web_session.get("/overloaded/critical")
+
+    assert response.status_code == 200
+
+
+def test_in_flight_is_released(config, container_factory, web_session):
+    container = container_factory(OverloadedService)
+    container.start()
+
+    admission = next(iter(container.entrypoints)).admission
+
+    web_session.get("/overloaded")
+
+    assert admission.in_flight == 0
+    assert admission.stats["admitted"] == 1
+
+
+class TimedService:
+    name = "timed"
+
+    @http("GET", "/timed", auth_required=True)
+    def timed(self, request):
+        return "ok"
+
+
+def test_stage_timings(config, container_factory, web_session):
+    container = container_factory(TimedService)
+    container.start()
+
+    stage_timings.reset()
+
+    with patch.object(MonitoringEmitter, "send") as send:
+        web_session.get("/timed", headers={"Authorization": "web-app"})
+
+    (_, event), _ = send.call_args
+
+    assert {"stage_auth", "stage_queue_wait", "stage_handler"} <= set(event)
+    assert set(stage_timings.get_stats()["GET /timed"]) == {
+        "auth",
+        "queue_wait",
+        "handler",
+    }
+
+
+def test_stage_timings_disabled(config, container_factory, web_session):
+    with nameko_config.patch({"STAGE_TIMINGS_ENABLED": False}):
+        container = container_factory(TimedService)
+        container.start()
+
+    with patch.object(MonitoringEmitter, "send") as send:
+        web_session.get("/timed", headers={"Authorization": "web-app"})
+
+    (_, event), _ = send.call_args
+
+    assert not [key for key in event if key.startswith("stage_")]
+
+
+class BodyService:
+    name = "body"
+
+    @http("POST", "/body", schema=users_schemas.auth_user_request, max_body_size=64)
+    def body(self, request):
+        return json.dumps(request.validated_data)
+
+    @http(
+        "POST",
+        "/body/auth",
+        schema=users_schemas.auth_user_request,
+        max_body_size=64,
+        auth_required=True,
+    )
+    def auth_body(self, request):
+        return json.dumps(request.validated_data)
+
+
+def test_schema_loads_body(config, container_factory, web_session):
+    container = container_factory(BodyService)
+    container.start()
+
+    body = {"email": "a@b.com", "password": "password"}
+    response = web_session.post(
+        "/body", json=body, headers={"Content-Type": "application/json"}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == body
+
+
+@pytest.mark.parametrize(
+    "data, headers, status_code, error",
+    [
+        ("x" * 65, {}, 413, "REQUEST_BODY_TOO_LARGE"),
+        ("{}", {"Content-Type": "application/xml"}, 415, "UNSUPPORTED_MEDIA_TYPE"),
+        ("{", {}, 400, "VALIDATION_ERROR"),
+        ('{"email": "a@b.com"}', {}, 400, "VALIDATION_ERROR"),
+    ],
+)
+def test_invalid_body_does_not_spawn_worker(
+    config, container_factory, web_session, data, headers, status_code, error
+):
+    container = container_factory(BodyService)
+    container.start()
+
+    with patch.object(container, "spawn_worker") as spawn_worker:
+        response = web_session.post("/body", data=data, headers=headers)
+
+    assert response.status_code == status_code
+    assert response.json()["error"] == error
+    assert not spawn_worker.called
+
+
+@pytest.mark.parametrize(
+    "data, headers",
+    [("x" * 65, {}), ("{}", {"Content-Type": "application/xml"}), ("{", {})],
+)
+def test_body_is_checked_after_auth(
+    config, container_factory, web_session, data, headers
+):
+    container = container_factory(BodyService)
+    container.start()
+
+    response = web_session.post(
+        "/body/auth", data=data, headers=dict(headers, Authorization="wrong")
+    )
+
+    assert response.status_code == 401
+    assert response.json()["error"] == "UNAUTHORISED_REQUEST"
+
+
+class CompressedService:
+    name = "compressed"
+
+    @http("GET", "/compressed/<int:size>")
+    def compressed(self, request, size):
+        return Response(json.dumps("x" * size), mimetype="application/json")
+
+    @http("GET", "/uncompressed", compress=False)
+    def uncompressed(self, request):
+        return Response(json.dumps("x" * 2000), mimetype="application/json")
+
+
+@pytest.mark.parametrize(
+    "path, accept_encoding, content_encoding, vary",
+    [
+        ("/compressed/2000", "gzip", "gzip", True),
+        ("/compressed/2000", "identity", None, True),
+        ("/compressed/10", "gzip", None, False),
+        ("/uncompressed", "gzip", None, False),
+    ],
+)
+def test_compression(
+    config,
+    container_factory,
+    web_session,
+    path,
+    accept_encoding,
+    content_encoding,
+    vary,
+):
+    container = container_factory(CompressedService)
+    container.start()
+
+    response = web_session.get(path, headers={"Accept-Encoding": accept_encoding})
+
+    assert response.status_code == 200
+    assert response.headers.get("Content-Encoding") == content_encoding
+    assert ("Accept-Encoding" in response.headers.get("Vary", "")) is vary
+    assert response.json().startswith("x")
+
+
+def test_etag(config, container_factory, web_session):
+    container = container_factory(CompressedService)
+    container.start()
+
+    response = web_session.get("/compressed/10")
+    etag = response.headers["ETag"]
+
+    response = web_session.get("/compressed/10", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+    response = web_session.get("/compressed/20", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+
+
+def test_etag_of_compressed_response(config, container_factory, web_session):
+    container = container_factory(CompressedService)
+    container.start()
+
+    headers = {"Accept-Encoding": "gzip"}
+    etag = web_session.get("/compressed/2000", headers=headers).headers["ETag"]
+
+    assert etag.endswith('-gzip"')
+
+    for accept_encoding, not_modified_etag in (
+        ("gzip", etag),
+        ("identity", etag.replace("-gzip", "")),
+    ):
+        response = web_session.get(
+            "/compressed/2000",
+            headers={"Accept-Encoding": accept_encoding, "If-None-Match": etag},
+        )
+
+        assert response.status_code == 304
+        # the same validators as the 200 for that Accept-Encoding
+        assert response.headers["ETag"] == not_modified_etag
+        assert "Accept-Encoding" in response.headers["Vary"]
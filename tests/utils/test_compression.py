@@ -0,0 +1,70 @@
+import gzip
+
+import pytest
+from gateway.utils.compression import Compressor, gzip_compress, is_compressible
+from nameko import config
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+
+def accept(header):
+    return parse_accept_header(header, Accept)
+
+
+@pytest.fixture
+def compressor():
+    with config.patch({"COMPRESSION_ENCODINGS": "br,unknown,gzip"}):
+        yield Compressor().configure()
+
+
+def test_unavailable_encodings_are_ignored(compressor):
+    assert set(compressor.encoders) <= {"br", "gzip"}
+    assert "gzip" in compressor.encoders
+
+
+@pytest.mark.parametrize(
+    "header, encoding",
+    [
+        ("gzip, deflate", "gzip"),
+        ("deflate", None),
+        ("gzip;q=0", None),
+        ("*", "gzip"),
+        ("", None),
+    ],
+)
+def test_negotiate(compressor, header, encoding):
+    compressor.encoders.pop("br", None)
+
+    assert compressor.negotiate(accept(header)) == encoding
+
+
+def test_negotiate_prefers_quality_then_order():
+    compressor = Compressor()
+    compressor.encoders = {"zstd": None, "br": None, "gzip": None}
+
+    assert compressor.negotiate(accept("gzip, br")) == "br"
+    assert compressor.negotiate(accept("gzip, br;q=0.5")) == "gzip"
+
+
+def test_gzip_compress():
+    data = b'{"projects": []}' * 100
+
+    assert gzip.decompress(gzip_compress(data, 6)) == data
+    # no mtime in the header, so the output is the same every time
+    assert gzip_compress(data, 6) == gzip_compress(data, 6)
+
+
+@pytest.mark.parametrize(
+    "mimetype, compressible",
+    [("application/json", True), ("text/plain", True), ("image/png", False)],
+)
+def test_is_compressible(mimetype, compressible):
+    assert is_compressible(mimetype) is compressible
+
+
+def test_compress_stream(compressor):
+    chunks = [b'{"projects": [', b'{"id": 1}', b"]}"]
+
+    compressed = b"".join(compressor.compress_stream("gzip", iter(chunks)))
+
+    assert gzip.decompress(compressed) == b"".join(chunks)
@@ -0,0 +1,44 @@
+import pytest
+from gateway.utils.etag import compute_etag, etag_matches, not_modified
+from werkzeug import Request, Response
+from werkzeug.test import EnvironBuilder
+
+
+def request(if_none_match=None):
+    headers = {"If-None-Match": if_none_match} if if_none_match else {}
+
+    return Request(EnvironBuilder(headers=headers).get_environ())
+
+
+def test_compute_etag():
+    assert compute_etag("body") == compute_etag(b"body")
+    assert compute_etag("body") != compute_etag("other body")
+
+
+@pytest.mark.parametrize(
+    "if_none_match, matches",
+    [
+        (None, False),
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"abc-gzip"', True),
+        ('"other", "abc"', True),
+        ("*", True),
+        ('"other"', False),
+        ('"abc-unknown"', False),
+    ],
+)
+def test_etag_matches(if_none_match, matches):
+    assert etag_matches(request(if_none_match), "abc") is matches
+
+
+def test_not_modified():
+    response = Response("body", headers={"Vary": "Origin"})
+    response.set_etag("abc")
+
+    response = not_modified(response)
+
+    assert response.status_code == 304
+    assert response.get_data() == b""
+    assert response.headers["ETag"] == '"abc"'
+    assert response.headers["Vary"] == "Origin"
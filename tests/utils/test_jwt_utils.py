@@ -1,8 +1,11 @@
+import time
+
 import jwt
 import pytest
 from gateway.exceptions.users import UserNotAuthorised
-from gateway.utils.jwt_utils import jwt_required
-from mock import Mock
+from gateway.utils.jwt_utils import JWTCache, jwt_required
+from gateway.utils.timing import StageTimer
+from mock import Mock, patch
 from nameko import config as nameko_config
 
 
@@ -68,3 +71,89 @@ def test_jwt_required_raises_error_if_jwt_expired(config):
 
     with pytest.raises(UserNotAuthorised):
         service.fake_function(mock_request)
+
+
+@pytest.fixture
+def jwt_cache(config):
+    cache = JWTCache()
+    cache.configure()
+    return cache
+
+
+def encode(payload):
+    return jwt.encode(payload, nameko_config.get("JWT_SECRET"), algorithm="HS256")
+
+
+def test_jwt_cache_only_verifies_token_once(jwt_cache):
+    token = encode({"test": "123"})
+
+    with patch("gateway.utils.jwt_utils.jwt.decode", wraps=jwt.decode) as decode:
+        assert jwt_cache.decode(token) == {"test": "123"}
+        assert jwt_cache.decode(token.decode("utf-8")) == {"test": "123"}
+
+    assert decode.call_count == 1
+    assert jwt_cache.get_stats() == {
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+        "size": 1,
+        "hit_rate": 0.5,
+    }
+
+
+def test_jwt_cache_does_not_keep_raw_tokens(jwt_cache):
+    token = encode({"test": "123"})
+
+    jwt_cache.decode(token)
+
+    assert token not in jwt_cache.entries
+
+
+def test_jwt_cache_respects_exp(jwt_cache):
+    exp = int(time.time()) + 60
+    token = encode({"test": "123", "exp": exp})
+
+    jwt_cache.decode(token)
+
+    assert next(iter(jwt_cache.entries.values()))[1] == exp
+
+    with patch("gateway.utils.jwt_utils.time.time", return_value=exp):
+        jwt_cache.decode(token)
+
+    # the expired entry was dropped and the token verified again
+    assert jwt_cache.stats["evictions"] == 1
+    assert jwt_cache.stats["misses"] == 2
+
+
+def test_jwt_cache_does_not_cache_immature_tokens(jwt_cache):
+    token = encode({"test": "123", "nbf": int(time.time()) + 60})
+
+    with pytest.raises(jwt.ImmatureSignatureError):
+        jwt_cache.decode(token)
+
+    assert not jwt_cache.entries
+
+
+def test_jwt_cache_is_bounded(jwt_cache):
+    jwt_cache.max_size = 2
+
+    tokens = [encode({"test": index}) for index in range(3)]
+
+    for token in tokens:
+        jwt_cache.decode(token)
+
+    assert len(jwt_cache.entries) == 2
+    assert jwt_cache.stats["evictions"] == 1
+
+    # the least recently used token was evicted
+    jwt_cache.decode(tokens[0])
+    assert jwt_cache.stats["misses"] == 4
+
+
+def test_jwt_required_times_decode(config):
+    mock_request = Mock(timer=StageTimer())
+    mock_request.headers = {"Authorization": encode({"test": "123"}).decode("utf-8")}
+
+    FakeService().fake_function(mock_request)
+
+    assert "jwt" in mock_request.timer.stages
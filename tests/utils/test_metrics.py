@@ -0,0 +1,101 @@
+from gateway.utils.metrics import MetricsRegistry
+
+
+def test_counter():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests.", ("method", "status"))
+
+    counter.inc("GET", 200)
+    counter.inc("GET", 200, amount=2)
+    counter.inc("POST", 500)
+
+    assert registry.render() == (
+        "# HELP requests_total Requests.\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{method="GET",status="200"} 3.0\n'
+        'requests_total{method="POST",status="500"} 1.0\n'
+    )
+
+
+def test_counter_is_only_registered_once():
+    registry = MetricsRegistry()
+
+    assert registry.counter("requests_total", "Requests.") is registry.counter(
+        "requests_total", "Requests."
+    )
+
+
+def test_gauge():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("in_flight", "In flight requests.")
+
+    gauge.set(3)
+    gauge.set(2)
+
+    assert registry.render().splitlines()[-1] == "in_flight 2.0"
+
+
+def test_histogram():
+    registry = MetricsRegistry()
+    histogram = registry.histogram(
+        "duration_seconds", "Durations.", ("route",), buckets=(0.1, 1)
+    )
+
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.1, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(3, "/a")
+
+    assert registry.render().splitlines()[2:] == [
+        'duration_seconds_bucket{route="/a",le="0.1"} 2',
+        'duration_seconds_bucket{route="/a",le="1.0"} 3',
+        'duration_seconds_bucket{route="/a",le="+Inf"} 4',
+        'duration_seconds_sum{route="/a"} 3.65',
+        'duration_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("total", "Total.", ("route",)).inc('/a"b\\')
+
+    assert registry.render().splitlines()[-1] == 'total{route="/a\\"b\\\\"} 1.0'
+
+
+def test_register_stats():
+    registry = MetricsRegistry()
+    registry.register_stats(
+        "cache",
+        lambda: {
+            "hits": 2,
+            "state": "closed",
+            "enabled": True,
+            "shed": {"low": 1},
+            "hit_rate": 0.5,
+        },
+    )
+    registry.register_stats(
+        "script",
+        lambda: {"incr": {"calls": 3}, "decr": {"calls": 1}},
+        labels=("script",),
+    )
+
+    assert registry.render() == (
+        "# TYPE cache_hit_rate untyped\n"
+        "cache_hit_rate 0.5\n"
+        "# TYPE cache_hits untyped\n"
+        "cache_hits 2.0\n"
+        "# TYPE cache_shed_low untyped\n"
+        "cache_shed_low 1.0\n"
+        "# TYPE script_calls untyped\n"
+        'script_calls{script="incr"} 3.0\n'
+        'script_calls{script="decr"} 1.0\n'
+    )
+
+
+def test_unregister_stats():
+    registry = MetricsRegistry()
+    registry.register_stats("cache", lambda: {"hits": 2})
+    registry.unregister_stats("cache")
+
+    assert registry.render() == "\n"
@@ -0,0 +1,24 @@
+import json
+
+import pytest
+from gateway.utils.streaming import stream_json_list
+
+
+@pytest.mark.parametrize("count", [0, 1, 3, 7])
+def test_stream_json_list(count):
+    chunks = list(
+        stream_json_list(
+            "items", range(count), lambda item: {"id": item}, {"cursor": None}, 3
+        )
+    )
+
+    assert json.loads(b"".join(chunks)) == {
+        "items": [{"id": item} for item in range(count)],
+        "cursor": None,
+    }
+    # the opening, one chunk per 3 items, then the closing
+    assert len(chunks) == 2 + (count + 2) // 3
+
+
+def test_stream_json_list_without_extra():
+    assert b"".join(stream_json_list("items", [1, 2], str)) == b'{"items": ["1", "2"]}'
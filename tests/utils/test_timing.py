@@ -0,0 +1,80 @@
+from gateway.utils.timing import (
+    NULL_TIMER,
+    StageTimer,
+    StageTimings,
+    get_timer,
+    get_worker_timer,
+)
+from mock import Mock, patch
+
+
+def test_stage_timer():
+    timer = StageTimer()
+
+    with patch("gateway.utils.timing.time.perf_counter", side_effect=[1, 3, 4, 5]):
+        with timer.stage("rpc"):
+            pass
+        with timer.stage("rpc"):
+            pass
+
+    timer.add("jwt", 0.5)
+
+    assert timer.stages == {"rpc": 3, "jwt": 0.5}
+
+
+def test_stage_is_recorded_on_error():
+    timer = StageTimer()
+
+    try:
+        with timer.stage("rpc"):
+            raise ValueError()
+    except ValueError:
+        pass
+
+    assert "rpc" in timer.stages
+
+
+def test_null_timer():
+    with NULL_TIMER.stage("rpc"):
+        pass
+
+    NULL_TIMER.add("jwt", 1)
+
+    assert NULL_TIMER.stages == {}
+
+
+def test_get_timer():
+    timer = StageTimer()
+
+    assert get_timer(Mock(timer=timer)) is timer
+    assert get_timer(Mock()) is NULL_TIMER
+    assert get_worker_timer(Mock(args=(Mock(timer=timer),))) is timer
+    assert get_worker_timer(Mock(args=())) is NULL_TIMER
+
+
+def test_stage_timings():
+    timings = StageTimings()
+
+    timings.record("GET /v1/projects", {"rpc": 1.0, "jwt": 0.5})
+    timings.record("GET /v1/projects", {"rpc": 3.0})
+
+    assert timings.get_stats() == {
+        "GET /v1/projects": {
+            "rpc": {
+                "count": 2,
+                "total_seconds": 4.0,
+                "max_seconds": 3.0,
+                "average_seconds": 2.0,
+            },
+            "jwt": {
+                "count": 1,
+                "total_seconds": 0.5,
+                "max_seconds": 0.5,
+                "average_seconds": 0.5,
+            },
+        }
+    }
+
+    timings.reset()
+
+    assert timings.get_stats() == {}